@@ -0,0 +1,535 @@
+"""
+IMS Weather Forecast Automation - Archive Index
+
+SQLite index of the XML archive, updated whenever a download is archived.
+For each archive entry (isr_*_YYYY-MM-DD.ref, see archive_store.py) it
+records the kind (cities/country), archive date, issue time, SHA-256
+digest, the compressed blob holding the XML, the forecast dates it covers
+and the per-city values, so that "latest archive", "which files cover
+date X", retention cleanup and random-date selection are indexed queries
+rather than directory globs and XML parses.
+
+The index lives next to the archive (archive/archive_index.db) and can be
+rebuilt from the entries at any time (rebuild_archive_index / --rebuild).
+Building the index only reads the archive directory. Legacy plain
+isr_*_YYYY-MM-DD.xml files are migrated into the compressed store only by
+the explicit --rebuild step.
+"""
+
+import logging
+import random
+import sqlite3
+import sys
+from contextlib import closing
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import List, Optional
+
+from archive_store import ENTRY_SUFFIX, archive_content, content_digest, get_blob_dir, read_blob, read_entry
+from extract_forecast import parse_cities_feed, parse_country_feed
+from utils import ARCHIVE_DIR, ARCHIVE_RETENTION_DAYS, cleanup_old_archives, setup_logging
+
+
+# ============================================================================
+# CONFIGURATION
+# ============================================================================
+
+ARCHIVE_INDEX_DB = ARCHIVE_DIR / "archive_index.db"
+
+# Bump when the schema changes; an outdated index is dropped and rebuilt
+ARCHIVE_INDEX_VERSION = 2
+
+# Archive entry prefix per feed kind: isr_cities_YYYY-MM-DD.ref
+ARCHIVE_PREFIXES = {
+    'cities': 'isr_cities_',
+    'country': 'isr_country_',
+}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    key   TEXT PRIMARY KEY,
+    value TEXT
+);
+CREATE TABLE IF NOT EXISTS archive_files (
+    filename       TEXT PRIMARY KEY,
+    kind           TEXT NOT NULL,
+    archive_date   TEXT NOT NULL,
+    issue_datetime TEXT,
+    digest         TEXT NOT NULL,
+    blob           TEXT NOT NULL,
+    size           INTEGER NOT NULL,
+    mtime_ns       INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS archive_files_kind_date ON archive_files (kind, archive_date);
+CREATE INDEX IF NOT EXISTS archive_files_blob ON archive_files (blob);
+CREATE TABLE IF NOT EXISTS file_dates (
+    filename TEXT NOT NULL REFERENCES archive_files (filename) ON DELETE CASCADE,
+    date     TEXT NOT NULL,
+    PRIMARY KEY (filename, date)
+);
+CREATE INDEX IF NOT EXISTS file_dates_date ON file_dates (date);
+CREATE TABLE IF NOT EXISTS city_forecasts (
+    filename     TEXT NOT NULL REFERENCES archive_files (filename) ON DELETE CASCADE,
+    date         TEXT NOT NULL,
+    name_eng     TEXT NOT NULL,
+    name_heb     TEXT,
+    latitude     REAL,
+    longitude    REAL,
+    max_temp     INTEGER,
+    min_temp     INTEGER,
+    weather_code INTEGER,
+    max_humidity INTEGER,
+    min_humidity INTEGER,
+    wind         TEXT,
+    PRIMARY KEY (filename, date, name_eng)
+);
+CREATE INDEX IF NOT EXISTS city_forecasts_date ON city_forecasts (date, name_eng);
+"""
+
+
+# ============================================================================
+# DATABASE
+# ============================================================================
+
+def connect(db_path: Path = ARCHIVE_INDEX_DB) -> sqlite3.Connection:
+    """
+    Open the archive index, creating or upgrading the schema as needed.
+
+    Args:
+        db_path: Index database file
+
+    Returns:
+        sqlite3 connection (use as a context manager for transactions)
+    """
+    db_path.parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(db_path, timeout=30)
+    conn.execute("PRAGMA foreign_keys = ON")
+    conn.executescript(SCHEMA)
+
+    row = conn.execute("SELECT value FROM meta WHERE key = 'version'").fetchone()
+    if row is None or int(row[0]) != ARCHIVE_INDEX_VERSION:
+        # Outdated schema: start over, the next lookup rebuilds from the entries
+        with conn:
+            for table in ('city_forecasts', 'file_dates', 'archive_files', 'meta'):
+                conn.execute(f"DROP TABLE IF EXISTS {table}")
+        conn.executescript(SCHEMA)
+        with conn:
+            conn.execute("INSERT INTO meta (key, value) VALUES ('version', ?)", (str(ARCHIVE_INDEX_VERSION),))
+    return conn
+
+
+def parse_archive_filename(filename: str) -> Optional[tuple]:
+    """
+    Split an archive entry (or legacy archive XML) filename into (kind, archive_date).
+
+    Args:
+        filename: e.g. 'isr_cities_2025-10-15.ref' or 'isr_cities_2025-10-15.xml'
+
+    Returns:
+        Tuple of (kind, 'YYYY-MM-DD'), or None if not an archive file
+    """
+    stem, suffix = Path(filename).stem, Path(filename).suffix
+    if suffix not in (ENTRY_SUFFIX, '.xml'):
+        return None
+    for kind, prefix in ARCHIVE_PREFIXES.items():
+        if stem.startswith(prefix):
+            date_str = stem[len(prefix):]
+            try:
+                datetime.strptime(date_str, '%Y-%m-%d')
+            except ValueError:
+                return None
+            return kind, date_str
+    return None
+
+
+# ============================================================================
+# INDEXING
+# ============================================================================
+
+def index_archive_file(path: Path, logger: logging.Logger, content: Optional[bytes] = None,
+                       db_path: Path = ARCHIVE_INDEX_DB) -> bool:
+    """
+    Add or refresh one archive entry in the index.
+
+    Args:
+        path: Archive entry (isr_cities_*.ref / isr_country_*.ref)
+        logger: Logger instance
+        content: Uncompressed XML if already in memory (default: read the blob)
+        db_path: Index database file
+
+    Returns:
+        True if indexed, False if the file is not an archive entry or unreadable
+    """
+    path = Path(path)
+    parsed_name = parse_archive_filename(path.name)
+    if parsed_name is None or path.suffix != ENTRY_SUFFIX:
+        return False
+    kind, archive_date = parsed_name
+
+    blob_path = read_entry(path)
+    if blob_path is None:
+        logger.warning(f"Could not index archive entry {path.name}: blob missing")
+        return False
+
+    try:
+        if content is None:
+            content = read_blob(blob_path)
+        stat = path.stat()
+    except (OSError, EOFError) as e:
+        logger.warning(f"Could not index archive entry {path.name}: {e}")
+        return False
+
+    if kind == 'cities':
+        parsed = parse_cities_feed(content, path.name, logger)
+    else:
+        parsed = parse_country_feed(content, logger)
+    if parsed is None:
+        logger.warning(f"Could not index archive file {path.name}: XML not parseable")
+        return False
+
+    if parsed.batch is not None:
+        batch = parsed.batch
+        dates = sorted(set(batch.dates))
+        city_rows = [
+            (path.name, city.date, city.name_eng, city.name_heb, city.latitude, city.longitude,
+             city.max_temp, city.min_temp, city.weather_code,
+             city.max_humidity, city.min_humidity, city.wind)
+            for city in batch
+        ]
+    else:
+        dates = sorted(parsed.descriptions)
+        city_rows = []
+
+    with closing(connect(db_path)) as conn, conn:
+        conn.execute("DELETE FROM archive_files WHERE filename = ?", (path.name,))
+        conn.execute(
+            "INSERT INTO archive_files (filename, kind, archive_date, issue_datetime, digest, blob, size, mtime_ns) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (path.name, kind, archive_date, parsed.issue_datetime,
+             content_digest(content), blob_path.name, stat.st_size, stat.st_mtime_ns)
+        )
+        conn.executemany("INSERT INTO file_dates (filename, date) VALUES (?, ?)",
+                         [(path.name, date) for date in dates])
+        conn.executemany(
+            "INSERT OR IGNORE INTO city_forecasts (filename, date, name_eng, name_heb, latitude, longitude, "
+            "max_temp, min_temp, weather_code, max_humidity, min_humidity, wind) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            city_rows
+        )
+
+    logger.info(f"Indexed archive entry: {path.name} ({len(dates)} dates, {len(city_rows)} city forecasts)")
+    return True
+
+
+def rebuild_archive_index(logger: logging.Logger, archive_dir: Path = ARCHIVE_DIR,
+                          db_path: Path = ARCHIVE_INDEX_DB, migrate: bool = False) -> int:
+    """
+    Bring the index in line with the archive directory.
+
+    New or modified entries (by size/mtime) are indexed, rows for entries
+    that no longer exist are dropped. Unchanged entries are not re-read.
+    The archive directory itself is left untouched unless migrate is set.
+
+    Args:
+        logger: Logger instance
+        archive_dir: Archive directory
+        db_path: Index database file
+        migrate: If True, first move legacy plain XML archive files into the
+            compressed store (deletes the plain files)
+
+    Returns:
+        Number of entries (re)indexed
+    """
+    if migrate:
+        migrate_legacy_archives(logger, archive_dir)
+    else:
+        legacy = find_legacy_archives(archive_dir)
+        if legacy:
+            logger.warning(f"{len(legacy)} plain XML archive file(s) are not indexed - "
+                           f"run 'python archive_index.py --rebuild' to migrate them")
+
+    with closing(connect(db_path)) as conn:
+        known = {
+            filename: (size, mtime_ns)
+            for filename, size, mtime_ns in conn.execute("SELECT filename, size, mtime_ns FROM archive_files")
+        }
+
+    on_disk = set()
+    indexed = 0
+    for path in sorted(archive_dir.glob(f'isr_*{ENTRY_SUFFIX}')):
+        if parse_archive_filename(path.name) is None:
+            continue
+        on_disk.add(path.name)
+        stat = path.stat()
+        if known.get(path.name) == (stat.st_size, stat.st_mtime_ns):
+            continue
+        if index_archive_file(path, logger, db_path=db_path):
+            indexed += 1
+
+    stale = [filename for filename in known if filename not in on_disk]
+    with closing(connect(db_path)) as conn, conn:
+        conn.executemany("DELETE FROM archive_files WHERE filename = ?", [(f,) for f in stale])
+        conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('built', ?)",
+                     (datetime.now().isoformat(timespec='seconds'),))
+
+    if indexed or stale:
+        logger.info(f"Archive index updated: {indexed} file(s) indexed, {len(stale)} removed")
+    return indexed
+
+
+def find_legacy_archives(archive_dir: Path = ARCHIVE_DIR) -> List[Path]:
+    """Return the plain isr_*_YYYY-MM-DD.xml archive files awaiting migration."""
+    return [path for path in sorted(archive_dir.glob('isr_*.xml'))
+            if parse_archive_filename(path.name) is not None]
+
+
+def migrate_legacy_archives(logger: logging.Logger, archive_dir: Path = ARCHIVE_DIR) -> int:
+    """
+    Move plain isr_*_YYYY-MM-DD.xml archive files into the compressed store.
+
+    Each file becomes a blob plus a .ref entry for the same date, and the
+    plain file is removed once both are written.
+
+    Args:
+        logger: Logger instance
+        archive_dir: Archive directory
+
+    Returns:
+        Number of files migrated
+    """
+    migrated = 0
+    for path in find_legacy_archives(archive_dir):
+        try:
+            archive_content(path.read_bytes(), path.with_suffix(ENTRY_SUFFIX), logger)
+            path.unlink()
+            migrated += 1
+        except OSError as e:
+            logger.warning(f"Could not migrate archive file {path.name}: {e}")
+
+    if migrated:
+        logger.info(f"Migrated {migrated} plain XML archive file(s) to compressed storage")
+    return migrated
+
+
+def ensure_archive_index(logger: logging.Logger, archive_dir: Path = ARCHIVE_DIR,
+                         db_path: Path = ARCHIVE_INDEX_DB) -> None:
+    """
+    Build the index from the archive directory if it has never been built.
+
+    Only reads the archive; legacy plain XML files are reported, not migrated.
+    """
+    with closing(connect(db_path)) as conn:
+        built = conn.execute("SELECT value FROM meta WHERE key = 'built'").fetchone()
+    if built is None:
+        logger.info("Building archive index from archive directory...")
+        rebuild_archive_index(logger, archive_dir, db_path)
+
+
+# ============================================================================
+# QUERIES
+# ============================================================================
+
+def _existing(conn: sqlite3.Connection, rows: List[tuple], archive_dir: Path) -> List[Path]:
+    """
+    Return blob paths for (entry filename, blob) rows whose entry and blob still
+    exist; drop index rows for the rest.
+    """
+    blob_dir = get_blob_dir(archive_dir)
+    paths = []
+    missing = []
+    for filename, blob in rows:
+        path = blob_dir / blob
+        if path.exists() and (archive_dir / filename).exists():
+            paths.append(path)
+        else:
+            missing.append((filename,))
+    if missing:
+        with conn:
+            conn.executemany("DELETE FROM archive_files WHERE filename = ?", missing)
+    return paths
+
+
+def latest_archive(kind: str, logger: logging.Logger, archive_dir: Path = ARCHIVE_DIR,
+                   db_path: Path = ARCHIVE_INDEX_DB) -> Optional[Path]:
+    """
+    Return the blob of the most recent archive entry of a kind.
+
+    Args:
+        kind: 'cities' or 'country'
+        logger: Logger instance
+        archive_dir: Archive directory
+        db_path: Index database file
+
+    Returns:
+        Path to the latest archive blob (.xml.gz / .xml.zst), or None if there is none
+    """
+    ensure_archive_index(logger, archive_dir, db_path)
+    with closing(connect(db_path)) as conn:
+        rows = conn.execute(
+            "SELECT filename, blob FROM archive_files WHERE kind = ? ORDER BY archive_date DESC", (kind,)
+        ).fetchall()
+        for path in _existing(conn, rows[:1], archive_dir):
+            return path
+        # The newest entry vanished - fall back to the next ones still on disk
+        paths = _existing(conn, rows[1:], archive_dir)
+    return paths[0] if paths else None
+
+
+def archives_covering(date: str, logger: logging.Logger, kind: str = 'cities',
+                      archive_dir: Path = ARCHIVE_DIR, db_path: Path = ARCHIVE_INDEX_DB) -> List[Path]:
+    """
+    Return the archive blobs that contain a forecast for a date, newest first.
+
+    Args:
+        date: Forecast date (YYYY-MM-DD)
+        logger: Logger instance
+        kind: 'cities' or 'country'
+        archive_dir: Archive directory
+        db_path: Index database file
+
+    Returns:
+        List of blob paths (one per distinct content)
+    """
+    ensure_archive_index(logger, archive_dir, db_path)
+    with closing(connect(db_path)) as conn:
+        rows = conn.execute(
+            "SELECT a.filename, a.blob FROM file_dates d JOIN archive_files a ON a.filename = d.filename "
+            "WHERE d.date = ? AND a.kind = ? ORDER BY a.archive_date DESC", (date, kind)
+        ).fetchall()
+        paths = _existing(conn, rows, archive_dir)
+    # Republished identical content: several entries share one blob
+    return list(dict.fromkeys(paths))
+
+
+def random_archive_date(logger: logging.Logger, rng: random.Random = None,
+                        archive_dir: Path = ARCHIVE_DIR,
+                        db_path: Path = ARCHIVE_INDEX_DB) -> Optional[str]:
+    """
+    Pick a random forecast date covered by any archived cities file.
+
+    Args:
+        logger: Logger instance
+        rng: Random generator (default: module random)
+        archive_dir: Archive directory
+        db_path: Index database file
+
+    Returns:
+        Date string (YYYY-MM-DD), or None if the archive is empty
+    """
+    ensure_archive_index(logger, archive_dir, db_path)
+    with closing(connect(db_path)) as conn:
+        dates = [row[0] for row in conn.execute(
+            "SELECT DISTINCT d.date FROM file_dates d JOIN archive_files a ON a.filename = d.filename "
+            "WHERE a.kind = 'cities' ORDER BY d.date"
+        )]
+    if not dates:
+        return None
+    return (rng or random).choice(dates)
+
+
+def cleanup_expired_archives(logger: logging.Logger, dry_run: bool = False,
+                             retention_days: int = ARCHIVE_RETENTION_DAYS,
+                             archive_dir: Path = ARCHIVE_DIR,
+                             db_path: Path = ARCHIVE_INDEX_DB) -> int:
+    """
+    Delete archive entries older than the retention period, found through the index.
+
+    Blobs no longer referenced by any entry are deleted with them. Falls back to the directory scan in utils.cleanup_old_archives if the
+    index can't be used.
+
+    Args:
+        logger: Logger instance
+        dry_run: If True, only show what would be deleted
+        retention_days: Keep files whose archive date is within this many days
+        archive_dir: Archive directory
+        db_path: Index database file
+
+    Returns:
+        Number of entries deleted (or would be deleted in dry-run)
+    """
+    cutoff = datetime.now() - timedelta(days=retention_days)
+
+    try:
+        ensure_archive_index(logger, archive_dir, db_path)
+        with closing(connect(db_path)) as conn:
+            # Same rule as the directory scan: archive date (midnight) before the cutoff instant
+            expired = [
+                (filename, blob) for filename, archive_date, blob in conn.execute(
+                    "SELECT filename, archive_date, blob FROM archive_files WHERE archive_date <= ? "
+                    "ORDER BY archive_date", (cutoff.strftime('%Y-%m-%d'),)
+                )
+                if datetime.strptime(archive_date, '%Y-%m-%d') < cutoff
+            ]
+            filenames = [filename for filename, _ in expired]
+
+            for filename in filenames:
+                if dry_run:
+                    logger.info(f"[DRY RUN] Would delete old archive: {filename}")
+                    continue
+                (archive_dir / filename).unlink(missing_ok=True)
+                logger.info(f"Deleted old archive: {filename}")
+
+            if not dry_run:
+                with conn:
+                    conn.executemany("DELETE FROM archive_files WHERE filename = ?", [(f,) for f in filenames])
+                # Collect blobs that no remaining entry points at
+                for blob in sorted({blob for _, blob in expired}):
+                    if conn.execute("SELECT 1 FROM archive_files WHERE blob = ? LIMIT 1", (blob,)).fetchone() is None:
+                        (get_blob_dir(archive_dir) / blob).unlink(missing_ok=True)
+                        logger.info(f"Deleted unreferenced archive blob: {blob}")
+
+    except sqlite3.Error as e:
+        logger.warning(f"Archive index unavailable ({e}) - scanning archive directory")
+        return cleanup_old_archives(logger, dry_run)
+
+    if not filenames:
+        logger.info(f"No archive files older than {retention_days} days found")
+    elif dry_run:
+        logger.info(f"[DRY RUN] Would delete {len(filenames)} old archive file(s)")
+    else:
+        logger.info(f"Deleted {len(filenames)} old archive file(s)")
+
+    return len(filenames)
+
+
+# ============================================================================
+# COMMAND-LINE INTERFACE
+# ============================================================================
+
+def main():
+    """Main entry point for the script."""
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        description='Inspect or rebuild the XML archive index'
+    )
+    parser.add_argument(
+        '--rebuild',
+        action='store_true',
+        help='Migrate plain XML archives, re-index new/changed entries and drop missing ones'
+    )
+    parser.add_argument(
+        '--covering',
+        type=str,
+        metavar='DATE',
+        help='List archive blobs that contain a forecast for DATE (YYYY-MM-DD)'
+    )
+
+    args = parser.parse_args()
+    logger = setup_logging()
+
+    if args.rebuild:
+        rebuild_archive_index(logger, migrate=True)
+
+    if args.covering:
+        for path in archives_covering(args.covering, logger):
+            logger.info(f"  {path.name}")
+    else:
+        for kind in ARCHIVE_PREFIXES:
+            logger.info(f"Latest {kind} archive: {latest_archive(kind, logger)}")
+
+    sys.exit(0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,241 @@
+"""
+IMS Weather Forecast Automation - Compressed Archive Store
+
+Content-addressed storage for the daily XML snapshots. Each unique UTF-8
+XML document is stored once, compressed, as archive/blobs/<sha256>.xml.zst
+(zstandard, if installed) or archive/blobs/<sha256>.xml.gz (gzip). The
+per-day archive entries (isr_cities_YYYY-MM-DD.ref / isr_country_...ref)
+are one-line text files naming the blob they point at, so an identical
+republish costs one tiny entry file instead of another full copy.
+
+Blobs are read with streaming decompression (open_blob), so the extractor
+can iterparse an archived feed without inflating it into memory first.
+"""
+
+import gzip
+import hashlib
+import logging
+import os
+import struct
+import tempfile
+from pathlib import Path
+from typing import BinaryIO, Optional, Tuple
+
+# zstandard is optional; gzip (standard library) is used without it
+try:
+    import zstandard
+    ZSTD_AVAILABLE = True
+except ImportError:
+    ZSTD_AVAILABLE = False
+
+from instrumentation import count
+from utils import ARCHIVE_DIR
+
+
+# ============================================================================
+# CONFIGURATION
+# ============================================================================
+
+BLOB_SUBDIR = "blobs"
+ENTRY_SUFFIX = ".ref"
+GZIP_SUFFIX = ".xml.gz"
+ZSTD_SUFFIX = ".xml.zst"
+BLOB_SUFFIXES = (ZSTD_SUFFIX, GZIP_SUFFIX)
+
+GZIP_LEVEL = 9
+ZSTD_LEVEL = 19  # Daily snapshots are written once and read rarely
+
+
+def get_blob_dir(archive_dir: Path = ARCHIVE_DIR) -> Path:
+    """Return the blob directory of an archive directory."""
+    return archive_dir / BLOB_SUBDIR
+
+
+def is_blob(path) -> bool:
+    """Return True if path names a compressed archive blob."""
+    return isinstance(path, (str, Path)) and str(path).endswith(BLOB_SUFFIXES)
+
+
+def content_digest(content: bytes) -> str:
+    """Return the SHA-256 hex digest that addresses a blob."""
+    return hashlib.sha256(content).hexdigest()
+
+
+# ============================================================================
+# BLOBS
+# ============================================================================
+
+def find_blob(digest: str, archive_dir: Path = ARCHIVE_DIR) -> Optional[Path]:
+    """
+    Return the stored blob for a content digest, in either compression.
+
+    Args:
+        digest: SHA-256 hex digest of the uncompressed XML
+        archive_dir: Archive directory
+
+    Returns:
+        Blob path, or None if the content is not stored
+    """
+    blob_dir = get_blob_dir(archive_dir)
+    for suffix in BLOB_SUFFIXES:
+        path = blob_dir / f"{digest}{suffix}"
+        if path.exists():
+            return path
+    return None
+
+
+def compress(content: bytes) -> Tuple[bytes, str]:
+    """
+    Compress XML bytes with the best available codec.
+
+    Returns:
+        Tuple of (compressed bytes, blob suffix)
+    """
+    if ZSTD_AVAILABLE:
+        return zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(content), ZSTD_SUFFIX
+    # mtime=0 keeps the output a pure function of the content
+    return gzip.compress(content, compresslevel=GZIP_LEVEL, mtime=0), GZIP_SUFFIX
+
+
+def write_blob(content: bytes, logger: logging.Logger, archive_dir: Path = ARCHIVE_DIR) -> Path:
+    """
+    Store XML bytes as a compressed blob, unless identical content is already stored.
+
+    Args:
+        content: Uncompressed UTF-8 XML bytes
+        logger: Logger instance
+        archive_dir: Archive directory
+
+    Returns:
+        Path of the (new or existing) blob
+
+    Raises:
+        OSError: If the blob can't be written
+    """
+    digest = content_digest(content)
+    existing = find_blob(digest, archive_dir)
+    if existing is not None:
+        logger.info(f"Archive blob already stored: {existing.name}")
+        return existing
+
+    data, suffix = compress(content)
+    blob_dir = get_blob_dir(archive_dir)
+    blob_dir.mkdir(parents=True, exist_ok=True)
+    path = blob_dir / f"{digest}{suffix}"
+
+    # Write-then-rename so a crash never leaves a truncated blob behind
+    fd, tmp_name = tempfile.mkstemp(dir=blob_dir, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_name, path)
+    except BaseException:
+        Path(tmp_name).unlink(missing_ok=True)
+        raise
+
+    count('archive.bytes_out', len(data))
+    logger.info(f"Stored archive blob: {path.name} ({len(content)} → {len(data)} bytes)")
+    return path
+
+
+def open_blob(path: Path) -> BinaryIO:
+    """
+    Open a blob for reading with streaming decompression.
+
+    Args:
+        path: Blob path (.xml.gz or .xml.zst)
+
+    Returns:
+        Binary file object yielding the uncompressed XML
+
+    Raises:
+        OSError: If the blob can't be opened or zstandard is missing for a .zst blob
+    """
+    path = Path(path)
+    if path.name.endswith(ZSTD_SUFFIX):
+        if not ZSTD_AVAILABLE:
+            raise OSError(f"zstandard is required to read {path.name}")
+        return zstandard.ZstdDecompressor().stream_reader(open(path, 'rb'), closefd=True)
+    return gzip.open(path, 'rb')
+
+
+def read_blob(path: Path) -> bytes:
+    """Return the uncompressed content of a blob."""
+    with open_blob(path) as f:
+        return f.read()
+
+
+def blob_content_size(path: Path) -> int:
+    """
+    Return the uncompressed size of a blob without decompressing it.
+
+    Read from the gzip ISIZE trailer (size mod 2**32) or the zstd frame
+    header; 0 if unknown.
+    """
+    path = Path(path)
+    try:
+        if path.name.endswith(ZSTD_SUFFIX):
+            if not ZSTD_AVAILABLE:
+                return 0
+            with open(path, 'rb') as f:
+                size = zstandard.frame_content_size(f.read(18))
+            return max(size, 0)
+        with open(path, 'rb') as f:
+            f.seek(-4, os.SEEK_END)
+            return struct.unpack('<I', f.read(4))[0]
+    except Exception:  # OSError, struct.error, zstandard.ZstdError on a damaged blob
+        return 0
+
+
+# ============================================================================
+# DATE ENTRIES
+# ============================================================================
+
+def write_entry(entry_path: Path, blob_path: Path) -> None:
+    """Point a per-day archive entry at a blob (atomic)."""
+    entry_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = entry_path.with_name(entry_path.name + '.tmp')
+    tmp_path.write_text(blob_path.name + '\n', encoding='ascii')
+    os.replace(tmp_path, entry_path)
+
+
+def read_entry(entry_path: Path) -> Optional[Path]:
+    """
+    Resolve a per-day archive entry to its blob (in the entry's archive directory).
+
+    Args:
+        entry_path: Entry file (isr_*_YYYY-MM-DD.ref)
+
+    Returns:
+        Blob path, or None if the entry or its blob is missing
+    """
+    try:
+        blob_name = entry_path.read_text(encoding='ascii').strip()
+    except (OSError, UnicodeDecodeError):
+        return None
+    if not blob_name.endswith(BLOB_SUFFIXES) or '/' in blob_name or '\\' in blob_name:
+        return None
+    blob_path = get_blob_dir(entry_path.parent) / blob_name
+    return blob_path if blob_path.exists() else None
+
+
+def archive_content(content: bytes, entry_path: Path, logger: logging.Logger) -> Path:
+    """
+    Archive XML bytes under a per-day entry (store blob if new, then write the entry).
+
+    Args:
+        content: Uncompressed UTF-8 XML bytes
+        entry_path: Entry file to create (isr_*_YYYY-MM-DD.ref); the blob goes
+            to the blobs/ directory next to it
+        logger: Logger instance
+
+    Returns:
+        Blob path the entry points at
+
+    Raises:
+        OSError: If the blob or entry can't be written
+    """
+    blob_path = write_blob(content, logger, entry_path.parent)
+    write_entry(entry_path, blob_path)
+    logger.info(f"Archived XML: {entry_path.name} → {blob_path.name}")
+    return blob_path
@@ -0,0 +1,292 @@
+"""
+IMS Weather Forecast Automation - Historical Backfill
+
+Re-renders the forecast story for every date in a range, e.g. after a
+design change. Jobs are planned from the archive index: for each date the
+newest archived cities/country blob covering it is parsed once (through the
+parsed-forecast cache) in the parent process, so workers receive ready
+ForecastBatch data and never touch XML. The static base layer is built or
+loaded once up front; each worker memory-maps the cached layer once and
+draws every image on a copy of it.
+
+Rendering runs on a process pool sized to the machine's cores. A manifest
+(output/backfill/manifest.json) records each date's output file, source
+archives, status and render time.
+
+Usage:
+    python forecast_workflow.py --from 2025-11-01 --to 2025-11-30
+"""
+
+import json
+import logging
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional
+
+from archive_index import archives_covering
+from extract_forecast import parse_cities_feed, parse_country_feed, read_source_bytes
+from forecast_cache import ParsedForecast
+from generate_forecast_map import generate_forecast_map, load_base_layer
+from utils import OUTPUT_DIR, format_hebrew_date, print_separator
+
+
+# ============================================================================
+# CONFIGURATION
+# ============================================================================
+
+BACKFILL_OUTPUT_DIR = OUTPUT_DIR / "backfill"
+MANIFEST_FILENAME = "manifest.json"
+
+# Per-job status in the manifest
+JOB_RENDERED = 'rendered'
+JOB_FAILED = 'failed'
+JOB_SKIPPED = 'skipped'  # No archived forecast covers the date
+
+
+def iter_dates(start_date: str, end_date: str) -> Iterator[str]:
+    """
+    Yield every date from start_date to end_date inclusive.
+
+    Raises:
+        ValueError: If a date is not YYYY-MM-DD or the range is reversed
+    """
+    start = datetime.strptime(start_date, '%Y-%m-%d')
+    end = datetime.strptime(end_date, '%Y-%m-%d')
+    if end < start:
+        raise ValueError(f"end date {end_date} is before start date {start_date}")
+    day = start
+    while day <= end:
+        yield day.strftime('%Y-%m-%d')
+        day += timedelta(days=1)
+
+
+# ============================================================================
+# PLANNING
+# ============================================================================
+
+def load_parsed(source: Path, kind: str, parsed: Dict[Path, Optional[ParsedForecast]],
+                logger) -> Optional[ParsedForecast]:
+    """Parse an archive blob once per backfill (memoized in parsed)."""
+    if source not in parsed:
+        content = read_source_bytes(source, logger)
+        if content is None:
+            parsed[source] = None
+        elif kind == 'cities':
+            parsed[source] = parse_cities_feed(content, source.name, logger)
+        else:
+            parsed[source] = parse_country_feed(content, logger)
+    return parsed[source]
+
+
+def plan_backfill(start_date: str, end_date: str, logger,
+                  output_dir: Path = BACKFILL_OUTPUT_DIR) -> List[Dict]:
+    """
+    Build one render job per date from the archive.
+
+    Each archive blob is parsed at most once, however many dates it covers.
+
+    Args:
+        start_date: First date (YYYY-MM-DD)
+        end_date: Last date (YYYY-MM-DD), inclusive
+        logger: Logger instance
+        output_dir: Directory for the rendered images
+
+    Returns:
+        List of job dicts with 'date', 'output', 'cities_source',
+        'country_source' and either 'forecast' (the generate_forecast_map
+        input) or 'status' = JOB_SKIPPED and an 'error'
+    """
+    parsed: Dict[Path, Optional[ParsedForecast]] = {}
+    jobs = []
+
+    for date in iter_dates(start_date, end_date):
+        job = {
+            'date': date,
+            'output': str(output_dir / f'forecast_map_{date}.png'),
+            'cities_source': None,
+            'country_source': None,
+        }
+        jobs.append(job)
+
+        cities = None
+        for source in archives_covering(date, logger, 'cities'):
+            forecast = load_parsed(source, 'cities', parsed, logger)
+            if forecast is None or forecast.batch is None:
+                continue
+            day = forecast.batch.for_date(date)
+            if len(day) > 0:
+                cities = day.sorted_north_to_south()
+                job['cities_source'] = source.name
+                break
+
+        if cities is None:
+            job['status'] = JOB_SKIPPED
+            job['error'] = 'no archived cities forecast covers this date'
+            logger.warning(f"Skipping {date}: no archived cities forecast covers it")
+            continue
+
+        description = None
+        for source in archives_covering(date, logger, 'country'):
+            forecast = load_parsed(source, 'country', parsed, logger)
+            if forecast is not None and forecast.descriptions.get(date):
+                description = forecast.descriptions[date]
+                job['country_source'] = source.name
+                break
+
+        job['forecast'] = {
+            'cities': cities,
+            'description': description,
+            'date': date,
+            'hebrew_date': format_hebrew_date(date),
+        }
+
+    logger.info(f"Planned {sum('forecast' in job for job in jobs)} of {len(jobs)} date(s) "
+                f"from {len(parsed)} archive file(s)")
+    return jobs
+
+
+# ============================================================================
+# WORKERS
+# ============================================================================
+
+# Per-process state, set up once by init_backfill_worker
+_worker_logger: Optional[logging.Logger] = None
+_worker_base_layer = None
+_worker_use_cache = True
+
+
+def init_backfill_worker(use_cache: bool = True) -> None:
+    """
+    Process pool initializer: quiet logger plus the base layer, loaded once.
+
+    Args:
+        use_cache: If False, build the base layer instead of mapping the cached
+            one and render every image instead of reusing cached renders
+    """
+    global _worker_logger, _worker_base_layer, _worker_use_cache
+    _worker_use_cache = use_cache
+    # Child of the workflow logger: warnings and errors still reach its handlers
+    _worker_logger = logging.getLogger('ims_forecast.backfill')
+    _worker_logger.setLevel(logging.WARNING)
+    _worker_base_layer = load_base_layer(_worker_logger, use_cache=use_cache)
+
+
+def render_backfill_job(forecast: Dict, output: str) -> Dict:
+    """
+    Render one date in a worker process.
+
+    Args:
+        forecast: generate_forecast_map input for the date
+        output: Output image path
+
+    Returns:
+        {'status', 'seconds', 'worker'}
+    """
+    start = time.perf_counter()
+    success = generate_forecast_map(forecast, Path(output), _worker_logger,
+                                    use_cache=_worker_use_cache, base_layer=_worker_base_layer)
+    return {
+        'status': JOB_RENDERED if success else JOB_FAILED,
+        'seconds': round(time.perf_counter() - start, 4),
+        'worker': os.getpid(),
+    }
+
+
+# ============================================================================
+# BACKFILL
+# ============================================================================
+
+def write_manifest(manifest: Dict, path: Path) -> None:
+    """Write the backfill manifest atomically."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix('.tmp')
+    tmp_path.write_text(json.dumps(manifest, indent=2, ensure_ascii=False), encoding='utf-8')
+    os.replace(tmp_path, path)
+
+
+def run_backfill(start_date: str, end_date: str, logger,
+                 workers: Optional[int] = None,
+                 output_dir: Path = BACKFILL_OUTPUT_DIR,
+                 use_cache: bool = True) -> Optional[Dict]:
+    """
+    Render every date in a range on a process pool and write the manifest.
+
+    Args:
+        start_date: First date (YYYY-MM-DD)
+        end_date: Last date (YYYY-MM-DD), inclusive
+        logger: Logger instance
+        workers: Worker processes (default: one per CPU core)
+        output_dir: Directory for the images and manifest
+        use_cache: If False, bypass the base-layer and rendered-image caches
+
+    Returns:
+        Manifest dict, or None if the date range is invalid
+    """
+    print_separator(logger, "=", 60)
+    logger.info(f"BACKFILL: {start_date} → {end_date}")
+    print_separator(logger, "=", 60)
+
+    run_start = time.perf_counter()
+    try:
+        jobs = plan_backfill(start_date, end_date, logger, output_dir)
+    except ValueError as e:
+        logger.error(f"Invalid backfill range: {e}")
+        return None
+    plan_seconds = time.perf_counter() - run_start
+
+    pending = [job for job in jobs if 'forecast' in job]
+    workers = max(1, min(workers or os.cpu_count() or 1, len(pending) or 1))
+
+    if pending:
+        # Build the shared base layer once, before the workers start reading it
+        output_dir.mkdir(parents=True, exist_ok=True)
+        load_base_layer(logger, use_cache=use_cache)
+
+        logger.info(f"Rendering {len(pending)} date(s) on {workers} worker process(es)...")
+        with ProcessPoolExecutor(max_workers=workers, initializer=init_backfill_worker,
+                                 initargs=(use_cache,)) as pool:
+            futures = {
+                pool.submit(render_backfill_job, job['forecast'], job['output']): job
+                for job in pending
+            }
+            for future in as_completed(futures):
+                job = futures[future]
+                try:
+                    job.update(future.result())
+                except Exception as e:
+                    job.update({'status': JOB_FAILED, 'error': str(e)})
+                if job['status'] == JOB_RENDERED:
+                    logger.info(f"  ✓ {job['date']} ({job['seconds']:.2f}s)")
+                else:
+                    logger.error(f"  ✗ {job['date']} failed{': ' + job['error'] if 'error' in job else ''}")
+
+    wall_seconds = time.perf_counter() - run_start
+    for job in jobs:
+        job.pop('forecast', None)
+    counts = {status: sum(job.get('status') == status for job in jobs)
+              for status in (JOB_RENDERED, JOB_FAILED, JOB_SKIPPED)}
+
+    manifest = {
+        'from': start_date,
+        'to': end_date,
+        'created': datetime.now().isoformat(timespec='seconds'),
+        'workers': workers,
+        'plan_seconds': round(plan_seconds, 3),
+        'render_seconds': round(sum(job.get('seconds', 0) for job in jobs), 3),
+        'wall_seconds': round(wall_seconds, 3),
+        **counts,
+        'jobs': jobs,
+    }
+    manifest_path = output_dir / MANIFEST_FILENAME
+    write_manifest(manifest, manifest_path)
+
+    print_separator(logger, "=", 60)
+    logger.info(f"Backfill complete in {wall_seconds:.1f}s: {counts[JOB_RENDERED]} rendered, "
+                f"{counts[JOB_FAILED]} failed, {counts[JOB_SKIPPED]} skipped")
+    logger.info(f"Manifest: {manifest_path}")
+    print_separator(logger, "=", 60)
+
+    return manifest
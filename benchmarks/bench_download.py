@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+"""
+Benchmark: conditional feed downloads against a local stand-in HTTP server.
+
+Drives download_forecast.fetch_xml() and process_feed() for one synthetic
+cities feed (see http_stand_in.py), fully offline, through a day's
+sequence of runs:
+
+    first         no stored validator: 200 with ETag, the current file and
+                  validators are written
+    unchanged     conditional GET with the stored ETag: 304, the current
+                  file is reused untouched and its cached parse is found by
+                  the stored digest (no file read)
+    republished   IMS publishes new content (new ETag): 200, the current
+                  file and validators are replaced
+    last-modified the server sends no ETag: a second run gets 304 through
+                  If-Modified-Since alone
+
+Reports wall time and body bytes per run. Checks the status of every
+step, the validators sent, that a 304 leaves the current file's bytes and
+mtime alone, and that the validator store follows the content. Exits with
+status 1 if a check fails. The archive, its index and the validator store
+live in a temporary directory.
+
+Usage:
+    python benchmarks/bench_download.py
+    python benchmarks/bench_download.py --locations 1000 --days 7
+"""
+
+import argparse
+import functools
+import logging
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+import archive_index  # noqa: E402
+import download_forecast  # noqa: E402
+from benchmarks.http_stand_in import FeedServer  # noqa: E402
+from benchmarks.synthetic_feeds import cities_xml_bytes  # noqa: E402
+from disk_cache import file_digest  # noqa: E402
+from download_forecast import (  # noqa: E402
+    FEED_DOWNLOADED, FEED_UNCHANGED, fetch_xml, get_stored_validator, load_validators,
+    process_feed, save_validators,
+)
+from extract_forecast import load_unchanged_feed  # noqa: E402
+
+DEFAULT_LOCATIONS = 1000
+DEFAULT_DAYS = 7
+FEED_PATH = '/isr_cities.xml'
+TODAY = '2025-01-01'
+
+
+class Feed:
+    """One feed under test: its definition, validator store and the stand-in."""
+
+    def __init__(self, server: FeedServer, work_dir: Path):
+        self.server = server
+        self.definition = {
+            'url': server.url(FEED_PATH),
+            'current_file': work_dir / 'isr_cities_utf8.xml',
+            'archive_path': lambda date: work_dir / 'archive' / f'isr_cities_{date}.ref',
+        }
+        self.validators_file = work_dir / 'http_validators.json'
+        self.session = download_forecast.create_session(1)
+        self.session.trust_env = False  # Never route 127.0.0.1 through a proxy
+
+    def run(self, logger: logging.Logger) -> Dict:
+        """One daily download: conditional when the stored validator still matches."""
+        validators = load_validators(self.validators_file)
+        validator = get_stored_validator(self.definition['url'], self.definition['current_file'], validators)
+        start = time.perf_counter()
+        result = fetch_xml(self.definition['url'], logger, session=self.session, validator=validator)
+        status = process_feed('cities', self.definition, result, TODAY, validators, logger)
+        elapsed = time.perf_counter() - start
+        save_validators(validators, self.validators_file)
+        return {'result': result, 'status': status, 'elapsed': elapsed,
+                'request': self.server.requests[-1], 'validators': validators}
+
+
+def report(label: str, run: Dict) -> None:
+    """Print one benchmark row."""
+    path, http_status, sent, body_bytes = run['request']
+    validators = ', '.join(sent) or 'none'
+    print(f"  {label:<13} : {run['elapsed'] * 1000:7.1f} ms  HTTP {http_status}  "
+          f"{body_bytes / 1024:8,.0f} KiB body  {run['status']:<10} (validators sent: {validators})")
+
+
+def expect(problems: List[str], label: str, condition: bool, message: str) -> None:
+    if not condition:
+        problems.append(f"{label}: {message}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark conditional feed downloads offline')
+    parser.add_argument('--locations', type=int, default=DEFAULT_LOCATIONS,
+                        help='Locations in the synthetic feed (default: %(default)s)')
+    parser.add_argument('--days', type=int, default=DEFAULT_DAYS,
+                        help='Forecast days in the synthetic feed (default: %(default)s)')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.ERROR, format='%(message)s')
+    logger = logging.getLogger('bench')
+    work_dir = Path(tempfile.mkdtemp(prefix='bench_download_'))
+    # Index today's archive entry in the temporary directory, not in archive/
+    download_forecast.index_archive_file = functools.partial(
+        archive_index.index_archive_file, db_path=work_dir / 'archive_index.db')
+
+    original = cities_xml_bytes(args.locations, args.days, TODAY, seed=1)
+    republished = cities_xml_bytes(args.locations, args.days, TODAY, seed=2)
+    print(f"Feed: {args.locations} locations x {args.days} days, {len(original) / 1024:,.0f} KiB")
+    problems: List[str] = []
+
+    with FeedServer() as server:
+        feed = Feed(server, work_dir)
+        current_file = feed.definition['current_file']
+        url = feed.definition['url']
+
+        server.publish(FEED_PATH, original)
+        run = feed.run(logger)
+        report('first', run)
+        expect(problems, 'first', run['request'][1] == 200 and not run['request'][2],
+               f"expected an unconditional 200, got {run['request'][1:3]}")
+        expect(problems, 'first', run['status'] == FEED_DOWNLOADED, f"status {run['status']}")
+        stored = run['validators'].get(url, {})
+        expect(problems, 'first', stored.get('etag') == run['result']['etag'] and
+               stored.get('digest') == file_digest(current_file), f"validator not stored: {stored}")
+        before = (current_file.read_bytes(), current_file.stat().st_mtime_ns)
+
+        run = feed.run(logger)
+        report('unchanged', run)
+        expect(problems, 'unchanged', run['request'][1] == 304 and
+               run['request'][2].get('If-None-Match') == stored.get('etag'),
+               f"expected 304 for If-None-Match {stored.get('etag')}, got {run['request'][1:3]}")
+        expect(problems, 'unchanged', run['status'] == FEED_UNCHANGED, f"status {run['status']}")
+        expect(problems, 'unchanged', (current_file.read_bytes(), current_file.stat().st_mtime_ns) == before,
+               "current file was rewritten")
+        digest = run['result'].get('digest')
+        expect(problems, 'unchanged', digest == file_digest(current_file),
+               f"digest {digest} does not match the current file")
+        expect(problems, 'unchanged', digest is not None and load_unchanged_feed(digest, 'cities', logger) is not None,
+               "no cached parse for the unchanged feed's digest")
+
+        server.publish(FEED_PATH, republished)
+        run = feed.run(logger)
+        report('republished', run)
+        expect(problems, 'republished', run['request'][1] == 200 and run['request'][2].get('If-None-Match'),
+               f"expected a conditional GET answered with 200, got {run['request'][1:3]}")
+        expect(problems, 'republished', run['status'] == FEED_DOWNLOADED, f"status {run['status']}")
+        expect(problems, 'republished', current_file.read_bytes() != before[0], "current file not replaced")
+        renewed = run['validators'].get(url, {})
+        expect(problems, 'republished', renewed.get('etag') not in (None, stored.get('etag')) and
+               renewed.get('digest') == file_digest(current_file), f"validator not renewed: {renewed}")
+
+        server.publish(FEED_PATH, original, etag=False)
+        run = feed.run(logger)
+        expect(problems, 'last-modified', run['status'] == FEED_DOWNLOADED and run['result']['etag'] is None,
+               f"expected a 200 without ETag, got {run['request'][1]} {run['result']['etag']}")
+        run = feed.run(logger)
+        report('last-modified', run)
+        expect(problems, 'last-modified', run['request'][1] == 304 and
+               list(run['request'][2]) == ['If-Modified-Since'],
+               f"expected 304 for If-Modified-Since alone, got {run['request'][1:3]}")
+        expect(problems, 'last-modified', run['status'] == FEED_UNCHANGED, f"status {run['status']}")
+
+    for problem in problems:
+        print(f"FAIL: {problem}")
+    if not problems:
+        print("OK: 200 stores validators, 304 reuses the file and its cached parse, "
+              "new content replaces both")
+    sys.exit(1 if problems else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Benchmark: tree-based vs streaming cities XML extraction.
+
+Generates synthetic IMS-shaped feeds of increasing size and extracts one
+date from each with both paths, each run in a fresh subprocess so peak RSS
+is not polluted by earlier runs. Reports wall time and peak RSS growth
+over the interpreter + imports baseline.
+
+Usage:
+    python benchmarks/bench_extract.py
+    python benchmarks/bench_extract.py --sizes 15x4 1000x10 5000x10
+"""
+
+import argparse
+import json
+import logging
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from benchmarks.synthetic_feeds import generate_cities_file  # noqa: E402
+
+try:
+    import resource
+    RESOURCE_AVAILABLE = True
+except ImportError:  # Windows
+    RESOURCE_AVAILABLE = False
+
+DEFAULT_SIZES = ['15x4', '1000x10', '5000x10']
+MODES = ['tree', 'stream']
+START_DATE = '2025-01-01'
+TARGET_DATE = '2025-01-02'
+
+
+def peak_rss_mb() -> float:
+    """Peak resident set size of this process in MB (0 if unavailable)."""
+    if not RESOURCE_AVAILABLE:
+        return 0.0
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KB, macOS bytes
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+def run_child(mode: str, xml_path: str) -> None:
+    """Extract one date with the given mode and print a JSON result line."""
+    import extract_forecast
+
+    logger = logging.getLogger('bench')
+    logger.addHandler(logging.NullHandler())
+    logger.propagate = False
+
+    baseline = peak_rss_mb()
+    start = time.perf_counter()
+
+    if mode == 'tree':
+        root = extract_forecast.parse_xml_file(Path(xml_path), logger)
+        cities = extract_forecast.extract_all_cities(root, TARGET_DATE, logger)
+    else:
+        _, cities = extract_forecast.stream_all_cities(Path(xml_path), TARGET_DATE, logger)
+
+    elapsed = time.perf_counter() - start
+    print(json.dumps({
+        'cities': len(cities),
+        'seconds': elapsed,
+        'peak_rss_mb': peak_rss_mb(),
+        'rss_growth_mb': peak_rss_mb() - baseline,
+    }))
+
+
+def measure(mode: str, xml_path: Path) -> dict:
+    """Run one extraction in a fresh interpreter and return its result."""
+    output = subprocess.run(
+        [sys.executable, __file__, '--child', mode, str(xml_path)],
+        cwd=PROJECT_ROOT, capture_output=True, text=True, check=True
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark tree vs streaming XML extraction')
+    parser.add_argument('--sizes', nargs='+', default=DEFAULT_SIZES,
+                        help='Feed sizes as LOCATIONSxDAYS (default: %(default)s)')
+    parser.add_argument('--child', nargs=2, metavar=('MODE', 'XML'), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(*args.child)
+        return
+
+    if not RESOURCE_AVAILABLE:
+        print("Note: 'resource' module unavailable - RSS columns will read 0")
+
+    print(f"{'feed':>10} {'size MB':>8} {'mode':>7} {'cities':>7} {'time s':>8} {'peak MB':>8} {'growth MB':>10}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for size in args.sizes:
+            locations, days = (int(n) for n in size.lower().split('x'))
+            xml_path = generate_cities_file(Path(tmp) / f'cities_{size}.xml', locations, days, START_DATE)
+            file_mb = xml_path.stat().st_size / (1024 * 1024)
+
+            for mode in MODES:
+                result = measure(mode, xml_path)
+                print(f"{size:>10} {file_mb:8.1f} {mode:>7} {result['cities']:7d} "
+                      f"{result['seconds']:8.3f} {result['peak_rss_mb']:8.1f} {result['rss_growth_mb']:10.1f}")
+
+
+if __name__ == '__main__':
+    main()
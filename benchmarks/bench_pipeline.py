@@ -0,0 +1,270 @@
+#!/usr/bin/env python3
+"""
+Benchmark: throughput of the daily pipeline on synthetic feeds.
+
+Generates IMS-shaped cities/country feeds (15 to 10,000 locations, 1 to 14
+days; see synthetic_feeds.py) and times each pipeline step separately over
+repeated runs, fully offline:
+
+    parse   cities + country XML bytes -> ParsedForecast (cache bypassed)
+    extract ParsedForecast -> validated, sorted forecast dictionary
+    render  forecast dictionary -> PNG (base layer preloaded, as in the workflow)
+    email   HTML body + image -> serialized MIME message (no SMTP)
+
+Reports min / p50 / p90 / p95 / p99 / max per step. --save writes the
+results as JSON; --baseline compares the p50s against a saved run and exits
+with status 1 if any step regressed by more than --tolerance.
+
+Usage:
+    python benchmarks/bench_pipeline.py
+    python benchmarks/bench_pipeline.py --sizes 15x1 1000x7 10000x14 --repeat 10
+    python benchmarks/bench_pipeline.py --save benchmarks/results/baseline.json
+    python benchmarks/bench_pipeline.py --baseline benchmarks/results/baseline.json
+"""
+
+import argparse
+import json
+import logging
+import os
+import platform
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, List
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from benchmarks.synthetic_feeds import (  # noqa: E402
+    cities_xml_bytes,
+    country_xml_bytes,
+    parse_feed_size,
+)
+
+DEFAULT_SIZES = ['15x4', '1000x7', '10000x14']
+DEFAULT_REPEAT = 5
+DEFAULT_TOLERANCE = 0.10
+STEPS = ['parse', 'extract', 'render', 'email']
+PERCENTILES = [50, 90, 95, 99]
+START_DATE = '2025-01-01'
+TARGET_DATE = '2025-01-02'
+RESULTS_VERSION = 1
+
+
+def percentile(samples: List[float], pct: float) -> float:
+    """Linearly interpolated percentile of a non-empty sample list."""
+    ordered = sorted(samples)
+    rank = (len(ordered) - 1) * pct / 100
+    low = int(rank)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+
+
+def summarize(samples: List[float]) -> Dict[str, float]:
+    """Return min, percentiles, max and mean of timing samples (seconds)."""
+    summary = {'min': min(samples)}
+    summary.update({f'p{pct}': percentile(samples, pct) for pct in PERCENTILES})
+    summary['max'] = max(samples)
+    summary['mean'] = sum(samples) / len(samples)
+    return {key: round(value, 6) for key, value in summary.items()}
+
+
+def quiet_logger() -> logging.Logger:
+    """Logger that drops everything (the pipeline logs a lot per step)."""
+    logger = logging.getLogger('bench')
+    logger.addHandler(logging.NullHandler())
+    logger.propagate = False
+    return logger
+
+
+# ============================================================================
+# PIPELINE STEPS
+# ============================================================================
+
+def build_steps(locations: int, days: int, workdir: Path, logger) -> Dict[str, Callable[[], object]]:
+    """
+    Set up one feed size and return a zero-argument callable per step.
+
+    Each step runs on the previous step's output from the warm-up run, so
+    the steps are timed independently of each other.
+    """
+    import extract_forecast
+    from generate_forecast_map import generate_forecast_map, load_base_layer
+    from send_email_smtp import EmailSession, build_email_message, create_email_html
+
+    cities_xml = cities_xml_bytes(locations, days, START_DATE)
+    country_xml = country_xml_bytes(days, START_DATE)
+    image_path = workdir / f'render_{locations}x{days}.png'
+    base_layer = load_base_layer(logger)
+    state = {}
+
+    def parse():
+        state['cities'] = extract_forecast.parse_cities_feed(cities_xml, 'cities', logger, use_cache=False)
+        state['country'] = extract_forecast.parse_country_feed(country_xml, logger, use_cache=False)
+
+    def extract():
+        cities = extract_forecast.select_cities_for_date(state['cities'].batch, TARGET_DATE, logger)
+        extract_forecast.validate_city_count(cities, logger)
+        batch = extract_forecast.sort_cities_north_to_south(cities, logger)
+        description = state['country'].descriptions.get(TARGET_DATE)
+        state['forecast'] = extract_forecast.build_forecast_data(TARGET_DATE, batch, description, logger)
+
+    def render():
+        # use_cache=False: time a real render, not a render-cache copy
+        if not generate_forecast_map(state['forecast'], image_path, logger,
+                                     use_cache=False, base_layer=base_layer):
+            raise RuntimeError('render failed')
+
+    session = EmailSession(
+        env_vars={'EMAIL_ADDRESS': 'forecast@example.com'},
+        recipients=[f'recipient{i}@example.com' for i in range(10)],
+        forecast_date='02/01/2025',
+        html_body=create_email_html('02/01/2025'),
+    )
+
+    def email():
+        msg, _ = build_email_message(session, image_path)
+        state['message_bytes'] = len(msg.as_bytes())
+
+    state['feed_bytes'] = len(cities_xml) + len(country_xml)
+    return {'parse': parse, 'extract': extract, 'render': render, 'email': email}, state
+
+
+def bench_size(size: str, repeat: int, workdir: Path, logger) -> Dict:
+    """Time every step of one feed size; returns its result entry."""
+    locations, days = parse_feed_size(size)
+    steps, state = build_steps(locations, days, workdir, logger)
+
+    # Warm-up: fills font/atlas/text caches and gives each step its input
+    for step in STEPS:
+        steps[step]()
+
+    samples: Dict[str, List[float]] = {step: [] for step in STEPS}
+    for _ in range(repeat):
+        for step in STEPS:
+            start = time.perf_counter()
+            steps[step]()
+            samples[step].append(time.perf_counter() - start)
+
+    records = locations * days
+    parse_p50 = percentile(samples['parse'], 50)
+    return {
+        'locations': locations,
+        'days': days,
+        'feed_bytes': state['feed_bytes'],
+        'image_bytes': (workdir / f'render_{locations}x{days}.png').stat().st_size,
+        'message_bytes': state['message_bytes'],
+        'parse_records_per_second': round(records / parse_p50) if parse_p50 > 0 else None,
+        'steps': {step: summarize(samples[step]) for step in STEPS},
+    }
+
+
+# ============================================================================
+# REPORTING
+# ============================================================================
+
+def print_results(results: Dict[str, Dict]) -> None:
+    """Print a percentile table per feed size."""
+    columns = ['min'] + [f'p{pct}' for pct in PERCENTILES] + ['max']
+    print(f"{'feed':>10} {'step':>8} " + ' '.join(f'{c + " ms":>10}' for c in columns))
+    for size, entry in results.items():
+        for step in STEPS:
+            stats = entry['steps'][step]
+            print(f"{size:>10} {step:>8} " + ' '.join(f"{stats[c] * 1000:10.2f}" for c in columns))
+        print(f"{'':>10} {'':>8} feed {entry['feed_bytes'] / 1024:,.0f} KiB, "
+              f"parse {entry['parse_records_per_second'] or 0:,} records/s, "
+              f"image {entry['image_bytes'] / 1024:,.0f} KiB, email {entry['message_bytes'] / 1024:,.0f} KiB")
+
+
+def compare_to_baseline(results: Dict[str, Dict], baseline: Dict, tolerance: float) -> bool:
+    """
+    Print p50 changes against a baseline run.
+
+    Returns:
+        True if no step slowed down by more than tolerance
+    """
+    ok = True
+    print(f"\nAgainst baseline from {baseline.get('created', '?')} "
+          f"(tolerance +{tolerance:.0%} on p50):")
+    print(f"{'feed':>10} {'step':>8} {'base ms':>10} {'now ms':>10} {'change':>8}")
+    for size, entry in results.items():
+        base_entry = baseline.get('results', {}).get(size)
+        if base_entry is None:
+            print(f"{size:>10} {'':>8} not in baseline")
+            continue
+        for step in STEPS:
+            base = base_entry['steps'].get(step, {}).get('p50')
+            now = entry['steps'][step]['p50']
+            if not base:
+                continue
+            change = now / base - 1
+            regressed = change > tolerance
+            ok = ok and not regressed
+            print(f"{size:>10} {step:>8} {base * 1000:10.2f} {now * 1000:10.2f} {change:+8.1%}"
+                  f"{'  REGRESSION' if regressed else ''}")
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark parse/extract/render/email on synthetic feeds')
+    parser.add_argument('--sizes', nargs='+', default=DEFAULT_SIZES,
+                        help='Feed sizes as LOCATIONSxDAYS, 15-10000 x 1-14 (default: %(default)s)')
+    parser.add_argument('--repeat', type=int, default=DEFAULT_REPEAT,
+                        help='Timed runs per step after one warm-up run (default: %(default)s)')
+    parser.add_argument('--save', type=Path, metavar='JSON', help='Write results to a JSON file')
+    parser.add_argument('--baseline', type=Path, metavar='JSON', help='Compare against saved results')
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE,
+                        help='Allowed p50 slowdown vs baseline, as a fraction (default: %(default)s)')
+    args = parser.parse_args()
+
+    for size in args.sizes:
+        try:
+            parse_feed_size(size)
+        except ValueError as e:
+            parser.error(str(e))
+    if args.repeat < 1:
+        parser.error('--repeat must be at least 1')
+
+    baseline = None
+    if args.baseline:
+        try:
+            baseline = json.loads(args.baseline.read_text(encoding='utf-8'))
+        except (OSError, ValueError) as e:
+            parser.error(f'cannot read baseline {args.baseline}: {e}')
+
+    # Keep the user's caches clean: parsed forecasts go to a throwaway directory
+    from forecast_cache import forecast_cache
+    logging.getLogger('ims_forecast').setLevel(logging.WARNING)
+    logger = quiet_logger()
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        forecast_cache.directory = Path(tmp) / 'forecasts'
+        for size in args.sizes:
+            print(f"Running {size} ({args.repeat} runs)...", flush=True)
+            results[size] = bench_size(size, args.repeat, Path(tmp), logger)
+
+    print()
+    print_results(results)
+
+    if args.save:
+        args.save.parent.mkdir(parents=True, exist_ok=True)
+        args.save.write_text(json.dumps({
+            'version': RESULTS_VERSION,
+            'created': datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+            'repeat': args.repeat,
+            'results': results,
+        }, indent=2), encoding='utf-8')
+        print(f"\nResults saved to {args.save}")
+
+    if baseline is not None and not compare_to_baseline(results, baseline, args.tolerance):
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
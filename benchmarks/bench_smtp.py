@@ -0,0 +1,260 @@
+#!/usr/bin/env python3
+"""
+Benchmark: per-recipient SMTP delivery against a local stand-in server.
+
+Sends the real daily email (HTML template + the email image, or a synthetic
+attachment) to N synthetic recipients, one message each, fully offline
+(see smtp_stand_in.py):
+
+    per-message   a new connection + login for every recipient (baseline)
+    persistent    smtp_delivery.fan_out() with one session, reused
+    fan-out       fan_out() over --sessions concurrent sessions
+    faults        fan-out while the server drops connections after DATA,
+                  replies 421 / 451 and caps messages per connection; some
+                  recipients are refused with 550
+    rate limit    fan-out paced by a --rate messages/second token bucket
+    deadline      the rate-limited fan-out with a deadline too short for
+                  every recipient
+    deadline (unthrottled)
+                  the unlimited fan-out with half the time it needed, so
+                  tokens are always available when the deadline passes
+
+--latency and --login-delay model the network round trip and the
+STARTTLS + login cost; rate limits are off except in the last two runs.
+Checks: in the fault run every sent recipient got exactly one copy
+addressed to them, failed ones (every attempt hit a fault) got none,
+refused recipients are reported as refused and Message-IDs are unique; the
+rate-limited run is not faster than the bucket allows; both deadline runs
+stop on time and report the rest as deferred.
+Exits with status 1 if a check fails.
+
+Usage:
+    python benchmarks/bench_smtp.py
+    python benchmarks/bench_smtp.py --recipients 200 --sessions 8 --latency 0.01 --login-delay 0.2
+"""
+
+import argparse
+import logging
+import smtplib
+import sys
+import time
+from email import message_from_bytes
+from pathlib import Path
+from typing import Dict, List
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+import smtp_delivery  # noqa: E402
+from benchmarks.smtp_stand_in import StandInServer  # noqa: E402
+from smtp_delivery import (  # noqa: E402
+    DELIVERY_DEFERRED, DELIVERY_FAILED, DELIVERY_REFUSED, DELIVERY_SENT, PersonalizedMessage,
+    fan_out, summarize_deliveries,
+)
+
+DEFAULT_RECIPIENTS = 100
+DEFAULT_SESSIONS = 4
+DEFAULT_LATENCY = 0.002      # seconds per reply
+DEFAULT_LOGIN_DELAY = 0.05   # seconds per login
+DEFAULT_RATE = 50.0          # messages per second in the rate-limited runs
+RATE_BURST = 5
+UNLIMITED = (1e6, 1000)      # Rate limit that never waits
+SENDER = 'forecast@example.com'
+SYNTHETIC_SIZE = 300  # Edge of the noise image used when no email image exists (~60 KiB)
+
+FAULTS = {'drop_every': 7, 'unavailable_every': 11, 'busy_every': 13, 'max_messages': 20}
+REFUSED = 2  # Recipients refused with 550 in the fault run
+
+
+def build_message() -> PersonalizedMessage:
+    """The daily email, built with the real template and (if present) the email image."""
+    from send_email_smtp import DEFAULT_IMAGE_PATH, EmailSession, build_email_message, create_email_html
+
+    image_path = DEFAULT_IMAGE_PATH
+    if not image_path.exists():
+        # Noise compresses badly, so a small JPEG is close to the email budget
+        import tempfile
+        import numpy as np
+        from PIL import Image
+        noise = np.random.default_rng(0).integers(0, 256, (SYNTHETIC_SIZE, SYNTHETIC_SIZE, 3), dtype=np.uint8)
+        image_path = Path(tempfile.mkdtemp()) / 'synthetic.jpg'
+        Image.fromarray(noise).save(image_path, 'JPEG', quality=75)
+    session = EmailSession(
+        env_vars={'EMAIL_ADDRESS': SENDER},
+        recipients=[],
+        forecast_date='02/01/2025',
+        html_body=create_email_html('02/01/2025'),
+    )
+    msg, _ = build_email_message(session, image_path)
+    return PersonalizedMessage(msg)
+
+
+def make_connect(server: StandInServer):
+    """Connection factory for the stand-in (plain SMTP + AUTH PLAIN, no STARTTLS)."""
+    def connect() -> smtplib.SMTP:
+        smtp = smtplib.SMTP(server.host, server.port, timeout=5)
+        smtp.login('bench', 'password')
+        return smtp
+    return connect
+
+
+def run_per_message(message: PersonalizedMessage, recipients: List[str], server: StandInServer) -> float:
+    """Baseline: connect, log in, send and quit for every recipient."""
+    connect = make_connect(server)
+    start = time.perf_counter()
+    for recipient in recipients:
+        smtp = connect()
+        smtp.sendmail(message.sender, [recipient], message.for_recipient(recipient))
+        smtp.quit()
+    return time.perf_counter() - start
+
+
+def run_fan_out(message: PersonalizedMessage, recipients: List[str], server: StandInServer,
+                name: str, sessions: int, rate_limit=UNLIMITED, deadline: float = 600):
+    """fan_out() to the stand-in; each run gets its own provider name (and token bucket)."""
+    # One session per RECIPIENTS_PER_SESSION recipients, so allow enough for the requested count
+    smtp_delivery.RECIPIENTS_PER_SESSION = max(1, -(-len(recipients) // sessions))
+    start = time.perf_counter()
+    results = fan_out(message, recipients, make_connect(server), provider=f'bench-{name}',
+                      max_sessions=sessions, deadline_seconds=deadline, rate_limit=rate_limit)
+    return time.perf_counter() - start, results
+
+
+def report(label: str, elapsed: float, results, server: StandInServer, baseline: float = 0.0) -> None:
+    """Print one benchmark row."""
+    summary = summarize_deliveries(results)
+    speedup = f"; {baseline / elapsed:.1f}x per-message" if baseline else ''
+    print(f"  {label:<11} : {elapsed:7.2f} s  {summary['sent'] / elapsed:7.1f} msg/s  "
+          f"{summary['sent']} sent, {summary['refused']} refused, {summary['failed']} failed, "
+          f"{summary['deferred']} deferred; {server.counters.get('connections', 0)} connection(s){speedup}")
+
+
+def check_fault_run(results, server: StandInServer, recipients: List[str], refused: List[str]) -> List[str]:
+    """Return a list of problems found in the fault run (empty = OK)."""
+    problems = []
+    by_recipient: Dict[str, List[bytes]] = {}
+    for _, recipient, data in server.messages:
+        by_recipient.setdefault(recipient, []).append(data)
+
+    message_ids = set()
+    for result in results:
+        copies = by_recipient.get(result.recipient, [])
+        if result.recipient in refused:
+            if result.status != DELIVERY_REFUSED:
+                problems.append(f"{result.recipient}: expected refused, got {result.status}")
+            continue
+        if result.status == DELIVERY_FAILED:
+            # Possible when every attempt hit a fault; it must not have arrived
+            if copies or result.attempts != smtp_delivery.MAX_ATTEMPTS:
+                problems.append(f"{result.recipient}: failed after {result.attempts} attempt(s) "
+                                f"with {len(copies)} copies delivered")
+            continue
+        if result.status != DELIVERY_SENT:
+            problems.append(f"{result.recipient}: {result.status} {result.code} {result.detail}")
+        if len(copies) != 1:
+            problems.append(f"{result.recipient}: received {len(copies)} copies")
+            continue
+        parsed = message_from_bytes(copies[0])
+        if parsed['To'] != result.recipient:
+            problems.append(f"{result.recipient}: To: header is {parsed['To']!r}")
+        message_ids.add(parsed['Message-ID'])
+
+    delivered = sum(1 for result in results if result.status == DELIVERY_SENT)
+    if len(message_ids) != delivered:
+        problems.append(f"{len(message_ids)} unique Message-IDs for {delivered} delivered messages")
+    return problems
+
+
+def check_deadline_run(label: str, results, elapsed: float, deadline: float, slack: float) -> List[str]:
+    """Return problems of a run that had too little time for every recipient (empty = OK)."""
+    problems = []
+    summary = summarize_deliveries(results)
+    if not summary[DELIVERY_DEFERRED] or summary[DELIVERY_SENT] + summary[DELIVERY_DEFERRED] != summary['total']:
+        problems.append(f"{label}: expected only sent and deferred recipients, got {summary}")
+    # Messages started before the deadline may finish after it, nothing else
+    if elapsed > deadline + slack:
+        problems.append(f"{label}: took {elapsed:.2f}s for a {deadline:.2f}s deadline")
+    return problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark per-recipient SMTP delivery offline')
+    parser.add_argument('--recipients', type=int, default=DEFAULT_RECIPIENTS,
+                        help='Number of recipients (default: %(default)s)')
+    parser.add_argument('--sessions', type=int, default=DEFAULT_SESSIONS,
+                        help='Concurrent sessions in the fan-out runs (default: %(default)s)')
+    parser.add_argument('--rate', type=float, default=DEFAULT_RATE,
+                        help='Messages per second in the rate-limited runs (default: %(default)s)')
+    parser.add_argument('--latency', type=float, default=DEFAULT_LATENCY,
+                        help='Seconds added to every server reply (default: %(default)s)')
+    parser.add_argument('--login-delay', type=float, default=DEFAULT_LOGIN_DELAY,
+                        help='Seconds added to every login (default: %(default)s)')
+    args = parser.parse_args()
+    if args.recipients <= REFUSED:
+        parser.error(f'--recipients must be more than {REFUSED}')
+    if args.sessions < 1 or args.rate <= 0:
+        parser.error('--sessions and --rate must be positive')
+
+    logging.basicConfig(level=logging.ERROR, format='%(message)s')
+    smtp_delivery.RETRY_DELAY = 0.01  # Backoff is not what is being measured
+
+    message = build_message()
+    recipients = [f"user{i:04d}@example.com" for i in range(args.recipients)]
+    refused = recipients[1:1 + REFUSED]
+    delay = {'latency': args.latency, 'login_delay': args.login_delay}
+    print(f"{len(recipients)} recipients, {len(message.body) / 1024:,.0f} KiB per message, "
+          f"latency {args.latency * 1000:.0f} ms, login {args.login_delay * 1000:.0f} ms")
+    problems = []
+
+    with StandInServer(**delay) as server:
+        baseline = run_per_message(message, recipients, server)
+    print(f"  {'per-message':<11} : {baseline:7.2f} s  {len(recipients) / baseline:7.1f} msg/s  "
+          f"{server.counters.get('connections', 0)} connection(s)")
+
+    with StandInServer(**delay) as server:
+        elapsed, results = run_fan_out(message, recipients, server, 'persistent', 1)
+    report('persistent', elapsed, results, server, baseline)
+
+    with StandInServer(**delay) as server:
+        elapsed, results = run_fan_out(message, recipients, server, 'fan-out', args.sessions)
+    report('fan-out', elapsed, results, server, baseline)
+    fan_out_seconds = elapsed
+
+    with StandInServer(refuse=refused, **FAULTS, **delay) as server:
+        elapsed, results = run_fan_out(message, recipients, server, 'faults', args.sessions)
+    report('faults', elapsed, results, server)
+    problems += check_fault_run(results, server, recipients, refused)
+
+    rate_limit = (args.rate, RATE_BURST)
+    minimum = (len(recipients) - RATE_BURST) / args.rate
+    with StandInServer(**delay) as server:
+        elapsed, results = run_fan_out(message, recipients, server, 'rate', args.sessions, rate_limit)
+    report('rate limit', elapsed, results, server)
+    if elapsed < minimum * 0.95:
+        problems.append(f"rate limit: {elapsed:.2f}s is faster than {args.rate:g}/s allows ({minimum:.2f}s)")
+
+    deadline = minimum / 2
+    with StandInServer(**delay) as server:
+        elapsed, results = run_fan_out(message, recipients, server, 'deadline', args.sessions,
+                                       rate_limit, deadline)
+    report('deadline', elapsed, results, server)
+    problems += check_deadline_run('deadline', results, elapsed, deadline, 1.0)
+
+    deadline = fan_out_seconds / 2
+    message_seconds = fan_out_seconds * args.sessions / len(recipients)
+    with StandInServer(**delay) as server:
+        elapsed, results = run_fan_out(message, recipients, server, 'unthrottled', args.sessions,
+                                       deadline=deadline)
+    report('unthrottled', elapsed, results, server)
+    problems += check_deadline_run('unthrottled deadline', results, elapsed, deadline,
+                                   max(0.25, 3 * message_seconds))
+
+    for problem in problems:
+        print(f"FAIL: {problem}")
+    if not problems:
+        print("OK: one copy per recipient, refusals reported, rate limit and deadline respected")
+    sys.exit(1 if problems else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Benchmark: cold-start import cost of the workflow entry point.
+
+Imports forecast_workflow in fresh interpreters under `python -X importtime`
+and checks two budgets:
+
+    - the median cumulative import time of forecast_workflow stays under
+      --budget-ms (interpreter startup and site-packages are not counted)
+    - none of the heavy pipeline dependencies (PIL, numpy, requests, bidi,
+      pyluach, ElementTree, dotenv, smtplib) is imported at module load;
+      they must stay behind lazy_import / function-level imports
+
+Also reports the wall time of `forecast_workflow.py --help`. Exits with
+status 1 if a budget is exceeded, so it can gate CI.
+
+Usage:
+    python benchmarks/bench_startup.py
+    python benchmarks/bench_startup.py --runs 10 --budget-ms 40
+"""
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+
+ENTRY_MODULE = 'forecast_workflow'
+DEFAULT_RUNS = 7
+DEFAULT_BUDGET_MS = 50.0
+
+# Must not be loaded by `import forecast_workflow`
+HEAVY_MODULES = [
+    'PIL', 'numpy', 'requests', 'bidi', 'pyluach', 'xml.etree.ElementTree',
+    'dotenv', 'smtplib', 'email.mime',
+]
+
+CHILD_SCRIPT = f"""
+import json, sys
+import {ENTRY_MODULE}
+print(json.dumps(sorted(m for m in {HEAVY_MODULES!r} if m in sys.modules)))
+"""
+
+
+def parse_importtime(stderr: str) -> Dict[str, int]:
+    """Return module -> cumulative import time (microseconds) from -X importtime output."""
+    cumulative = {}
+    for line in stderr.splitlines():
+        if not line.startswith('import time:'):
+            continue
+        parts = line[len('import time:'):].split('|')
+        if len(parts) != 3 or not parts[1].strip().isdigit():
+            continue  # Header line
+        cumulative[parts[2].strip()] = int(parts[1])
+    return cumulative
+
+
+def measure_import() -> Dict:
+    """Import the entry module once in a fresh interpreter."""
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', CHILD_SCRIPT],
+        cwd=PROJECT_ROOT, capture_output=True, text=True, check=True
+    )
+    times = parse_importtime(result.stderr)
+    return {
+        'import_ms': times.get(ENTRY_MODULE, 0) / 1000,
+        'heavy_loaded': json.loads(result.stdout.strip().splitlines()[-1]),
+        'top': sorted(times.items(), key=lambda item: item[1], reverse=True)[:8],
+    }
+
+
+def measure_help() -> float:
+    """Wall time of `forecast_workflow.py --help` in milliseconds (includes interpreter start)."""
+    start = time.perf_counter()
+    subprocess.run([sys.executable, f'{ENTRY_MODULE}.py', '--help'],
+                   cwd=PROJECT_ROOT, capture_output=True, check=True)
+    return (time.perf_counter() - start) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Check the import-time budget of forecast_workflow')
+    parser.add_argument('--runs', type=int, default=DEFAULT_RUNS,
+                        help='Fresh interpreters per measurement (default: %(default)s)')
+    parser.add_argument('--budget-ms', type=float, default=DEFAULT_BUDGET_MS,
+                        help='Maximum median import time of forecast_workflow (default: %(default)s)')
+    args = parser.parse_args()
+    if args.runs < 1:
+        parser.error('--runs must be at least 1')
+
+    imports = [measure_import() for _ in range(args.runs)]
+    helps: List[float] = [measure_help() for _ in range(args.runs)]
+
+    import_ms = statistics.median(run['import_ms'] for run in imports)
+    heavy = sorted({module for run in imports for module in run['heavy_loaded']})
+
+    print(f"import {ENTRY_MODULE}: median {import_ms:.1f} ms "
+          f"(min {min(r['import_ms'] for r in imports):.1f}, max {max(r['import_ms'] for r in imports):.1f}; "
+          f"budget {args.budget_ms:.0f} ms)")
+    print(f"{ENTRY_MODULE}.py --help: median {statistics.median(helps):.0f} ms wall (incl. interpreter start)")
+    print("Slowest imports (cumulative, last run):")
+    for module, micros in imports[-1]['top']:
+        print(f"  {micros / 1000:8.1f} ms  {module}")
+
+    ok = True
+    if import_ms > args.budget_ms:
+        print(f"FAIL: import time {import_ms:.1f} ms exceeds budget {args.budget_ms:.0f} ms")
+        ok = False
+    if heavy:
+        print(f"FAIL: heavy modules loaded at import: {', '.join(heavy)}")
+        ok = False
+    if ok:
+        print("OK: startup within budget")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == '__main__':
+    main()
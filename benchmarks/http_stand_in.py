@@ -0,0 +1,137 @@
+"""
+Local HTTP stand-in for the IMS feed server, for offline download tests.
+
+A threaded http.server that serves published feeds with ETag and
+Last-Modified validators and answers conditional GETs the way ims.gov.il
+does: If-None-Match (or, without it, If-Modified-Since) matching the
+current version gets 304 Not Modified with no body.
+
+Every request is recorded, so a test can check which validators were sent
+and how many body bytes went over the wire.
+
+Usage:
+    with FeedServer() as server:
+        server.publish('/isr_cities.xml', xml_bytes)
+        requests.get(server.url('/isr_cities.xml'))
+        server.publish('/isr_cities.xml', new_bytes)   # new ETag
+        server.requests  # [(path, status, request headers, body bytes), ...]
+"""
+
+import hashlib
+import threading
+import time
+from email.utils import formatdate, parsedate_to_datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Tuple
+
+
+class _Handler(BaseHTTPRequestHandler):
+    """Serves the stand-in's published feeds."""
+
+    def do_GET(self) -> None:
+        stand_in = self.server.stand_in
+        feed = stand_in.feeds.get(self.path)
+        conditional = {name: self.headers[name]
+                       for name in ('If-None-Match', 'If-Modified-Since') if self.headers[name]}
+        # Recorded before replying, so the client never sees a reply it can't look up
+        if feed is None:
+            stand_in.record(self.path, 404, conditional, 0)
+            self.send_response(404)
+            self.end_headers()
+            return
+
+        content, etag, last_modified = feed
+        if self.not_modified(etag, last_modified):
+            stand_in.record(self.path, 304, conditional, 0)
+            self.send_response(304)
+            if etag:
+                self.send_header('ETag', etag)
+            self.end_headers()
+            return
+
+        stand_in.record(self.path, 200, conditional, len(content))
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/xml; charset=ISO-8859-8')
+        self.send_header('Content-Length', str(len(content)))
+        if etag:
+            self.send_header('ETag', etag)
+        self.send_header('Last-Modified', last_modified)
+        self.end_headers()
+        self.wfile.write(content)
+
+    def not_modified(self, etag: Optional[str], last_modified: str) -> bool:
+        """Apply If-None-Match, or If-Modified-Since when no entity tag was sent."""
+        if_none_match = self.headers['If-None-Match']
+        if if_none_match:
+            return etag is not None and etag in [tag.strip() for tag in if_none_match.split(',')]
+        if_modified_since = self.headers['If-Modified-Since']
+        if if_modified_since:
+            try:
+                return parsedate_to_datetime(last_modified) <= parsedate_to_datetime(if_modified_since)
+            except (TypeError, ValueError):
+                return False
+        return False
+
+    def log_message(self, format, *args) -> None:
+        pass  # Keep benchmark output readable
+
+
+class FeedServer:
+    """Threaded local HTTP server for feed downloads (see module docstring)."""
+
+    def __init__(self):
+        self.feeds: Dict[str, Tuple[bytes, Optional[str], str]] = {}
+        self.requests: List[Tuple[str, int, Dict[str, str], int]] = []
+        self._lock = threading.Lock()
+        self._server: Optional[ThreadingHTTPServer] = None
+        self._thread: Optional[threading.Thread] = None
+        self.host = '127.0.0.1'
+        self.port = 0
+
+    def publish(self, path: str, content: bytes, etag: bool = True) -> None:
+        """
+        Publish (or republish) a feed; the validators change with the content.
+
+        Args:
+            path: URL path, e.g. '/isr_cities.xml'
+            content: Body bytes
+            etag: If False, serve Last-Modified only
+        """
+        tag = f'"{hashlib.sha256(content).hexdigest()[:16]}"' if etag else None
+        with self._lock:
+            previous = self.feeds.get(path)
+            if previous is not None and previous[0] == content:
+                return  # Same bytes: validators stay the same
+            published = time.time()
+            if previous is not None:
+                # Last-Modified has one-second resolution; keep a change visible
+                published = max(published, parsedate_to_datetime(previous[2]).timestamp() + 1)
+            self.feeds[path] = (content, tag, formatdate(published, usegmt=True))
+
+    def url(self, path: str) -> str:
+        return f"http://{self.host}:{self.port}{path}"
+
+    def record(self, path: str, status: int, headers: Dict[str, str], body_bytes: int) -> None:
+        with self._lock:
+            self.requests.append((path, status, headers, body_bytes))
+
+    def start(self) -> 'FeedServer':
+        self._server = ThreadingHTTPServer((self.host, 0), _Handler)
+        self._server.daemon_threads = True
+        self._server.stand_in = self
+        self.port = self._server.server_address[1]
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def __enter__(self) -> 'FeedServer':
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
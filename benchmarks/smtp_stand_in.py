@@ -0,0 +1,180 @@
+"""
+Local SMTP stand-in server for offline delivery tests and benchmarks.
+
+A small threaded SMTP server (standard library only - aiosmtpd is not a
+project dependency) that speaks enough of the protocol for smtplib:
+EHLO/HELO, AUTH PLAIN, MAIL, RCPT, DATA, RSET, NOOP and QUIT. STARTTLS is
+not offered, so connect with a plain smtplib.SMTP and skip starttls().
+
+Every accepted message is recorded, and faults can be injected to exercise
+reconnect and retry handling:
+
+    latency           seconds added to every reply (network round trip)
+    login_delay       extra seconds for AUTH (TLS handshake + login cost)
+    drop_every        close the connection without replying to every Nth DATA
+    unavailable_every reply 421 and close to every Nth MAIL
+    busy_every        reply 451 (try again) to every Nth MAIL
+    max_messages      reply 421 and close after N messages on one connection
+    refuse            addresses rejected with 550 at RCPT
+
+Usage:
+    with StandInServer(latency=0.005, drop_every=7) as server:
+        smtp = smtplib.SMTP(server.host, server.port)
+        smtp.login('user', 'password')
+        ...
+        server.messages  # [(sender, recipient, data bytes), ...]
+"""
+
+import socketserver
+import threading
+import time
+from typing import Iterable, List, Optional, Tuple
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    """One SMTP conversation."""
+
+    def reply(self, line: str) -> None:
+        if self.server.stand_in.latency:
+            time.sleep(self.server.stand_in.latency)
+        self.wfile.write(line.encode('ascii') + b'\r\n')
+
+    def handle(self) -> None:
+        stand_in = self.server.stand_in
+        stand_in.count('connections')
+        messages_here = 0
+        sender: Optional[str] = None
+        recipients: List[str] = []
+
+        self.reply('220 stand-in ESMTP ready')
+        while True:
+            raw = self.rfile.readline()
+            if not raw:
+                return
+            line = raw.decode('ascii', 'replace').rstrip('\r\n')
+            verb = line[:4].upper()
+
+            if verb in ('EHLO', 'HELO'):
+                self.reply('250-stand-in')
+                self.reply('250-AUTH PLAIN')
+                self.reply('250-SIZE 52428800')
+                self.reply('250 8BITMIME')
+            elif verb == 'AUTH':
+                if stand_in.login_delay:
+                    time.sleep(stand_in.login_delay)
+                stand_in.count('logins')
+                self.reply('235 2.7.0 Authentication successful')
+            elif verb == 'MAIL':
+                n = stand_in.count('mail')
+                if stand_in.max_messages and messages_here >= stand_in.max_messages:
+                    self.reply('421 4.7.0 Too many messages on this connection')
+                    return
+                if stand_in.unavailable_every and n % stand_in.unavailable_every == 0:
+                    self.reply('421 4.3.2 Service not available, closing')
+                    return
+                if stand_in.busy_every and n % stand_in.busy_every == 0:
+                    self.reply('451 4.3.0 Try again later')
+                    continue
+                sender = line.partition(':')[2].strip().split(' ')[0].strip('<>')
+                recipients = []
+                self.reply('250 2.1.0 OK')
+            elif verb == 'RCPT':
+                address = line.partition(':')[2].strip().split(' ')[0].strip('<>')
+                if address in stand_in.refuse:
+                    self.reply('550 5.1.1 No such user')
+                else:
+                    recipients.append(address)
+                    self.reply('250 2.1.5 OK')
+            elif verb == 'DATA':
+                if sender is None or not recipients:
+                    self.reply('503 5.5.1 Bad sequence of commands')
+                    continue
+                self.reply('354 End data with <CR><LF>.<CR><LF>')
+                data = self.read_data()
+                if data is None:
+                    return
+                if stand_in.drop_every and stand_in.count('data') % stand_in.drop_every == 0:
+                    return  # Lost connection after DATA, before the reply
+                for recipient in recipients:
+                    stand_in.record(sender, recipient, data)
+                messages_here += 1
+                sender, recipients = None, []
+                self.reply('250 2.0.0 OK queued')
+            elif verb == 'RSET':
+                sender, recipients = None, []
+                self.reply('250 2.0.0 OK')
+            elif verb == 'NOOP':
+                self.reply('250 2.0.0 OK')
+            elif verb == 'QUIT':
+                self.reply('221 2.0.0 Bye')
+                return
+            else:
+                self.reply('502 5.5.2 Command not implemented')
+
+    def read_data(self) -> Optional[bytes]:
+        """Read a DATA section up to the lone dot, undoing dot-stuffing."""
+        lines = []
+        while True:
+            raw = self.rfile.readline()
+            if not raw:
+                return None
+            if raw in (b'.\r\n', b'.\n'):
+                return b''.join(lines)
+            lines.append(raw[1:] if raw.startswith(b'..') else raw)
+
+
+class _Server(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+class StandInServer:
+    """Threaded local SMTP server with fault injection (see module docstring)."""
+
+    def __init__(self, latency: float = 0.0, login_delay: float = 0.0, drop_every: int = 0,
+                 unavailable_every: int = 0, busy_every: int = 0, max_messages: int = 0,
+                 refuse: Iterable[str] = ()):
+        self.latency = latency
+        self.login_delay = login_delay
+        self.drop_every = drop_every
+        self.unavailable_every = unavailable_every
+        self.busy_every = busy_every
+        self.max_messages = max_messages
+        self.refuse = set(refuse)
+        self.messages: List[Tuple[str, str, bytes]] = []
+        self.counters = {}
+        self._lock = threading.Lock()
+        self._server: Optional[_Server] = None
+        self._thread: Optional[threading.Thread] = None
+        self.host = '127.0.0.1'
+        self.port = 0
+
+    def count(self, name: str) -> int:
+        """Increment a counter and return its new value."""
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + 1
+            return self.counters[name]
+
+    def record(self, sender: str, recipient: str, data: bytes) -> None:
+        with self._lock:
+            self.messages.append((sender, recipient, data))
+
+    def start(self) -> 'StandInServer':
+        self._server = _Server((self.host, 0), _Handler)
+        self._server.stand_in = self
+        self.port = self._server.server_address[1]
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def __enter__(self) -> 'StandInServer':
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
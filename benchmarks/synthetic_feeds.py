@@ -0,0 +1,205 @@
+"""
+IMS Weather Forecast Automation - Synthetic Feed Generator
+
+Writes IMS-shaped cities and country XML (ISO-8859-8, same element layout
+as isr_cities.xml / isr_country.xml) of any size, for offline benchmarks.
+The first 15 locations are the real IMS cities (names, positions), so the
+map renders them; the rest are numbered filler locations. Output is
+deterministic for a given seed.
+
+Usage:
+    python benchmarks/synthetic_feeds.py --locations 10000 --days 14 --out /tmp/feeds
+"""
+
+import argparse
+import io
+import random
+from datetime import date, timedelta
+from pathlib import Path
+from typing import BinaryIO, Optional, Tuple
+
+# Latitude/longitude box roughly covering Israel
+LAT_RANGE = (29.5, 33.3)
+LON_RANGE = (34.3, 35.9)
+
+WEATHER_CODES = ['1250', '1220', '1230', '1310', '1140', '1160', '1270', '1530', '1580']
+HEBREW_DESCRIPTION = 'נאה. ללא שינוי ניכר בטמפרטורות. רוחות מערביות חלשות עד מתונות.'
+
+# Feed sizes the benchmark suite is designed for
+LOCATION_RANGE = (15, 10_000)
+DAY_RANGE = (1, 14)
+
+# The 15 cities of the daily story, as IMS names them (eng, heb, lat, lon)
+IMS_CITIES = [
+    ('Qazrin', 'קצרין', 32.9925, 35.6906),
+    ('Zefat', 'צפת', 32.9646, 35.4960),
+    ('Haifa', 'חיפה', 32.7940, 34.9896),
+    ('Tiberias', 'טבריה', 32.7922, 35.5312),
+    ('Nazareth', 'נצרת', 32.6996, 35.3035),
+    ('Afula', 'עפולה', 32.6091, 35.2892),
+    ('Bet Shean', 'בית שאן', 32.4973, 35.4967),
+    ('Tel Aviv - Yafo', 'תל אביב - יפו', 32.0853, 34.7818),
+    ('Lod', 'לוד', 31.9516, 34.8953),
+    ('Ashdod', 'אשדוד', 31.8044, 34.6553),
+    ('Jerusalem', 'ירושלים', 31.7683, 35.2137),
+    ('En Gedi', 'עין גדי', 31.4614, 35.3880),
+    ('Beer Sheva', 'באר שבע', 31.2518, 34.7913),
+    ('Mizpe Ramon', 'מצפה רמון', 30.6100, 34.8010),
+    ('Elat', 'אילת', 29.5577, 34.9519),
+]
+
+
+def parse_feed_size(size: str) -> Tuple[int, int]:
+    """
+    Parse a LOCATIONSxDAYS feed size within LOCATION_RANGE / DAY_RANGE.
+
+    Raises:
+        ValueError: If the size is malformed or out of range
+    """
+    try:
+        locations, days = (int(n) for n in size.lower().split('x'))
+    except ValueError:
+        raise ValueError(f"feed size must be LOCATIONSxDAYS, got {size!r}") from None
+    if not LOCATION_RANGE[0] <= locations <= LOCATION_RANGE[1]:
+        raise ValueError(f"locations must be {LOCATION_RANGE[0]}-{LOCATION_RANGE[1]}, got {locations}")
+    if not DAY_RANGE[0] <= days <= DAY_RANGE[1]:
+        raise ValueError(f"days must be {DAY_RANGE[0]}-{DAY_RANGE[1]}, got {days}")
+    return locations, days
+
+
+def write_cities_xml(out: BinaryIO, locations: int = 15, days: int = 4,
+                     start_date: Optional[str] = None, seed: int = 0) -> None:
+    """
+    Stream a synthetic cities XML to a binary file object.
+
+    Args:
+        out: Binary file object to write to
+        locations: Number of Location elements
+        days: Number of TimeUnitData (dates) per location
+        start_date: First forecast date, YYYY-MM-DD (default: today)
+        seed: Random seed for temperatures and codes
+    """
+    rng = random.Random(seed)
+    first = date.fromisoformat(start_date) if start_date else date.today()
+    dates = [(first + timedelta(days=k)).isoformat() for k in range(days)]
+
+    def write(text: str) -> None:
+        out.write(text.encode('iso-8859-8'))
+
+    write('<?xml version="1.0" encoding="ISO-8859-8"?>\n<LocationForecasts>\n')
+    write(f'<Identification><IssueDateTime>{first.isoformat()} 04:00</IssueDateTime></Identification>\n')
+
+    for i in range(locations):
+        lat = rng.uniform(*LAT_RANGE)
+        lon = rng.uniform(*LON_RANGE)
+        if i < len(IMS_CITIES):
+            name_eng, name_heb, lat, lon = IMS_CITIES[i]
+        else:
+            name_eng, name_heb = f'City {i + 1}', f'עיר {i + 1}'
+        write(
+            f'<Location><LocationMetaData><LocationId>{i + 1}</LocationId>'
+            f'<LocationNameEng>{name_eng}</LocationNameEng>'
+            f'<LocationNameHeb>{name_heb}</LocationNameHeb>'
+            f'<DisplayLat>{lat:.4f}</DisplayLat><DisplayLon>{lon:.4f}</DisplayLon>'
+            f'<DisplayHeight>{rng.randint(-400, 1000)}</DisplayHeight>'
+            f'</LocationMetaData><LocationData>\n'
+        )
+        for day in dates:
+            min_temp = rng.randint(5, 25)
+            max_temp = min_temp + rng.randint(3, 12)
+            write(
+                f'<TimeUnitData><Date>{day}</Date>'
+                f'<Element><ElementName>Maximum temperature</ElementName><ElementValue>{max_temp}</ElementValue></Element>'
+                f'<Element><ElementName>Minimum temperature</ElementName><ElementValue>{min_temp}</ElementValue></Element>'
+                f'<Element><ElementName>Maximum relative humidity</ElementName><ElementValue>{rng.randint(50, 95)}</ElementValue></Element>'
+                f'<Element><ElementName>Minimum relative humidity</ElementName><ElementValue>{rng.randint(10, 50)}</ElementValue></Element>'
+                f'<Element><ElementName>Wind direction and speed</ElementName><ElementValue>270-315/15-30</ElementValue></Element>'
+                f'<Element><ElementName>Weather code</ElementName><ElementValue>{rng.choice(WEATHER_CODES)}</ElementValue></Element>'
+                f'</TimeUnitData>\n'
+            )
+        write('</LocationData></Location>\n')
+
+    write('</LocationForecasts>\n')
+
+
+def write_country_xml(out: BinaryIO, days: int = 4, start_date: Optional[str] = None) -> None:
+    """
+    Stream a synthetic country XML to a binary file object.
+
+    Args:
+        out: Binary file object to write to
+        days: Number of forecast dates
+        start_date: First forecast date, YYYY-MM-DD (default: today)
+    """
+    first = date.fromisoformat(start_date) if start_date else date.today()
+
+    def write(text: str) -> None:
+        out.write(text.encode('iso-8859-8'))
+
+    write('<?xml version="1.0" encoding="ISO-8859-8"?>\n<CountryForecast>\n')
+    write(f'<Identification><IssueDateTime>{first.isoformat()} 04:00</IssueDateTime></Identification>\n')
+    write('<Location><LocationData>\n')
+    for k in range(days):
+        day = (first + timedelta(days=k)).isoformat()
+        write(
+            f'<TimeUnitData><Date>{day}</Date>'
+            f'<Element><ElementName>Weather in Hebrew</ElementName><ElementValue>{HEBREW_DESCRIPTION}</ElementValue></Element>'
+            f'</TimeUnitData>\n'
+        )
+    write('</LocationData></Location>\n</CountryForecast>\n')
+
+
+def generate_cities_file(path: Path, locations: int = 15, days: int = 4,
+                         start_date: Optional[str] = None, seed: int = 0) -> Path:
+    """Write a synthetic cities XML to path. Returns path."""
+    with open(path, 'wb') as f:
+        write_cities_xml(f, locations, days, start_date, seed)
+    return path
+
+
+def generate_country_file(path: Path, days: int = 4, start_date: Optional[str] = None) -> Path:
+    """Write a synthetic country XML to path. Returns path."""
+    with open(path, 'wb') as f:
+        write_country_xml(f, days, start_date)
+    return path
+
+
+def cities_xml_bytes(locations: int = 15, days: int = 4,
+                     start_date: Optional[str] = None, seed: int = 0) -> bytes:
+    """Return a synthetic cities XML as ISO-8859-8 bytes."""
+    out = io.BytesIO()
+    write_cities_xml(out, locations, days, start_date, seed)
+    return out.getvalue()
+
+
+def country_xml_bytes(days: int = 4, start_date: Optional[str] = None) -> bytes:
+    """Return a synthetic country XML as ISO-8859-8 bytes."""
+    out = io.BytesIO()
+    write_country_xml(out, days, start_date)
+    return out.getvalue()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Write synthetic isr_cities.xml / isr_country.xml')
+    parser.add_argument('--locations', type=int, default=15, help='Locations in the cities feed (default: 15)')
+    parser.add_argument('--days', type=int, default=4, help='Forecast days per feed (default: 4)')
+    parser.add_argument('--start-date', help='First forecast date, YYYY-MM-DD (default: today)')
+    parser.add_argument('--seed', type=int, default=0, help='Random seed (default: 0)')
+    parser.add_argument('--out', type=Path, default=Path('.'), help='Output directory (default: .)')
+    args = parser.parse_args()
+
+    try:
+        parse_feed_size(f'{args.locations}x{args.days}')
+    except ValueError as e:
+        parser.error(str(e))
+
+    args.out.mkdir(parents=True, exist_ok=True)
+    cities = generate_cities_file(args.out / 'isr_cities.xml', args.locations, args.days,
+                                  args.start_date, args.seed)
+    country = generate_country_file(args.out / 'isr_country.xml', args.days, args.start_date)
+    for path in (cities, country):
+        print(f"{path} ({path.stat().st_size:,} bytes)")
+
+
+if __name__ == '__main__':
+    main()
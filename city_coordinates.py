@@ -3,7 +3,7 @@ City positioning for V2 map-based layout.
 Coordinates are manually defined from Figma design.
 """
 
-from typing import TypedDict
+from typing import Optional, TypedDict
 
 
 class CityPosition(TypedDict):
@@ -37,3 +37,27 @@ CITY_POSITIONS: dict[str, CityPosition] = {
 # RTL (Right-to-Left): Icon left, text right - for coastal cities
 # TTB (Top-to-Bottom): Icon top, text below - for inland cities
 # LTR (Left-to-Right): Text left, icon right - for eastern cities
+
+# IMS XML names (LocationNameEng) that differ from the Figma names above
+CITY_NAME_ALIASES: dict[str, str] = {
+    'Qazrin': 'Katzrin',
+    'Tel Aviv - Yafo': 'Tel Aviv',
+    'Tel Aviv-Yafo': 'Tel Aviv',
+    'Bet Shean': 'Beit Shean',
+    'En Gedi': 'Ein Gedi',
+    'Mizpe Ramon': 'Mitzpe Ramon',
+    'Elat': 'Eilat',
+}
+
+
+def get_city_position(name_eng: str) -> Optional[CityPosition]:
+    """
+    Look up the map position for a city by its English name.
+
+    Args:
+        name_eng: City name as it appears in the IMS XML or in CITY_POSITIONS
+
+    Returns:
+        CityPosition, or None if the city has no position on the map
+    """
+    return CITY_POSITIONS.get(CITY_NAME_ALIASES.get(name_eng, name_eng))
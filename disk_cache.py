@@ -0,0 +1,161 @@
+"""
+IMS Weather Forecast Automation - On-Disk Cache
+
+Small size-bounded LRU cache of files in a single directory. Entries are
+addressed by a hex key (see make_cache_key) and evicted least-recently-used
+first once the directory grows past its byte budget. Access time is tracked
+through the file mtime, which is refreshed on every hit.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import tempfile
+from pathlib import Path
+from typing import Any, List, Optional
+
+from instrumentation import count
+
+
+def make_cache_key(*parts: Any) -> str:
+    """
+    Build a stable cache key from JSON-serializable parts.
+
+    Args:
+        *parts: Values that identify the cached content (tuples become lists)
+
+    Returns:
+        SHA-256 hex digest of the canonical JSON encoding of the parts
+    """
+    payload = json.dumps(parts, sort_keys=True, separators=(',', ':'), default=str)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def file_digest(path: Path) -> str:
+    """
+    Return the SHA-256 hex digest of a file's contents.
+
+    Args:
+        path: File to hash
+
+    Returns:
+        Hex digest, or 'missing' if the file does not exist
+    """
+    try:
+        with open(path, 'rb') as f:
+            return hashlib.sha256(f.read()).hexdigest()
+    except FileNotFoundError:
+        return 'missing'
+
+
+class DiskCache:
+    """Size-bounded LRU cache of files in one directory."""
+
+    def __init__(self, directory: Path, max_bytes: int, suffix: str = '.bin'):
+        """
+        Args:
+            directory: Directory holding the cache entries (created on first write)
+            max_bytes: Total size budget; oldest entries are evicted beyond it
+            suffix: File extension for entries
+        """
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self.suffix = suffix
+
+    def path_for(self, key: str) -> Path:
+        """Return the file path an entry with this key is stored at."""
+        return self.directory / f"{key}{self.suffix}"
+
+    def get(self, key: str) -> Optional[Path]:
+        """
+        Look up an entry and mark it as recently used.
+
+        Args:
+            key: Cache key
+
+        Returns:
+            Path to the cached file, or None on a miss
+        """
+        path = self.path_for(key)
+        try:
+            os.utime(path)
+        except OSError:
+            count(f'cache.{self.directory.name}.miss')
+            return None
+        count(f'cache.{self.directory.name}.hit')
+        return path
+
+    def put(self, key: str, data: bytes, logger: Optional[logging.Logger] = None) -> Path:
+        """
+        Store an entry atomically, then enforce the size budget.
+
+        Args:
+            key: Cache key
+            data: File contents
+            logger: Optional logger for eviction messages
+
+        Returns:
+            Path to the stored file
+        """
+        self.directory.mkdir(parents=True, exist_ok=True)
+        path = self.path_for(key)
+
+        # Write to a temp file and rename so readers never see a partial entry
+        fd, tmp_name = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_name, path)
+        except BaseException:
+            Path(tmp_name).unlink(missing_ok=True)
+            raise
+
+        self.evict(keep=path, logger=logger)
+        return path
+
+    def entries(self) -> List[Path]:
+        """Return all entries, least recently used first."""
+        if not self.directory.exists():
+            return []
+        files = [p for p in self.directory.glob(f"*{self.suffix}") if p.is_file()]
+        return sorted(files, key=lambda p: p.stat().st_mtime_ns)
+
+    def evict(self, keep: Optional[Path] = None, logger: Optional[logging.Logger] = None) -> int:
+        """
+        Delete least-recently-used entries until the cache fits its budget.
+
+        Args:
+            keep: Entry that must survive (e.g. the one just written)
+            logger: Optional logger
+
+        Returns:
+            Number of entries deleted
+        """
+        entries = self.entries()
+        total = sum(p.stat().st_size for p in entries)
+        deleted = 0
+
+        for path in entries:
+            if total <= self.max_bytes:
+                break
+            if keep is not None and path == keep:
+                continue
+            size = path.stat().st_size
+            try:
+                path.unlink()
+            except OSError:
+                continue
+            total -= size
+            deleted += 1
+            if logger:
+                logger.info(f"Evicted cache entry: {path.name} ({size:,} bytes)")
+
+        return deleted
+
+    def clear(self) -> int:
+        """Delete every entry. Returns the number of entries deleted."""
+        entries = self.entries()
+        for path in entries:
+            path.unlink(missing_ok=True)
+        return len(entries)
@@ -2,32 +2,43 @@
 IMS Weather Forecast Automation - Download & Convert XML
 
 Downloads the daily weather forecast XML from IMS website,
-converts encoding from ISO-8859-8 to UTF-8, and saves both
-current and archived copies.
+converts encoding from ISO-8859-8 to UTF-8, and saves the current
+file plus a compressed, deduplicated archive copy.
 """
 
 import sys
+import hashlib
+import json
+import os
 import time
+import random
+from concurrent.futures import Future, ThreadPoolExecutor
 from pathlib import Path
-from typing import Optional
+from typing import Callable, Dict, List, Optional
 
 try:
     import requests
+    from requests.adapters import HTTPAdapter
 except ImportError:
     print("ERROR: 'requests' library not installed")
     print("Please install it with: pip install requests")
     sys.exit(1)
 
+from archive_index import cleanup_expired_archives, index_archive_file
+from archive_store import archive_content
+from disk_cache import file_digest
+from instrumentation import count, span
 from utils import (
     setup_logging,
     get_today_date,
     get_archive_path,
     get_country_archive_path,
     ensure_directories,
-    cleanup_old_archives,
     print_separator,
+    ims_xml_to_utf8,
     XML_FILE,
-    COUNTRY_XML_FILE
+    COUNTRY_XML_FILE,
+    CACHE_DIR
 )
 
 
@@ -37,40 +48,182 @@ from utils import (
 
 IMS_CITIES_XML_URL = "https://ims.gov.il/sites/default/files/ims_data/xml_files/isr_cities.xml"
 IMS_COUNTRY_XML_URL = "https://ims.gov.il/sites/default/files/ims_data/xml_files/isr_country.xml"
-DOWNLOAD_TIMEOUT = 30  # seconds
+DOWNLOAD_TIMEOUT = 30  # seconds (per request)
+DOWNLOAD_DEADLINE = 90  # seconds (whole download stage, all feeds and retries)
 MAX_RETRIES = 3
-RETRY_DELAY = 2  # seconds
+RETRY_DELAY = 2  # seconds (base delay for exponential backoff)
+RETRY_DELAY_MAX = 16  # seconds (backoff cap)
+
+# All IMS feeds fetched by the download stage, by name
+IMS_FEEDS = {
+    'cities': {
+        'url': IMS_CITIES_XML_URL,
+        'current_file': XML_FILE,
+        'archive_path': get_archive_path,
+    },
+    'country': {
+        'url': IMS_COUNTRY_XML_URL,
+        'current_file': COUNTRY_XML_FILE,
+        'archive_path': get_country_archive_path,
+    },
+}
+
+# Per-feed download outcome
+FEED_DOWNLOADED = 'downloaded'  # New content fetched and saved
+FEED_UNCHANGED = 'unchanged'    # 304 Not Modified - existing file reused
+FEED_FAILED = 'failed'
+
+# ETag / Last-Modified validators per URL, for conditional GETs
+VALIDATORS_FILE = CACHE_DIR / "http_validators.json"
 
 
 # ============================================================================
 # DOWNLOAD FUNCTIONS
 # ============================================================================
 
-def download_xml_from_ims(url: str, logger, timeout: int = DOWNLOAD_TIMEOUT) -> Optional[bytes]:
+def create_session(pool_size: int = len(IMS_FEEDS)) -> requests.Session:
     """
-    Download XML file from IMS website with retry logic.
+    Create a pooled keep-alive HTTP session for ims.gov.il.
+
+    Args:
+        pool_size: Max concurrent connections per host
+
+    Returns:
+        requests.Session with a sized connection pool
+    """
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max(1, pool_size))
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+
+def get_retry_delay(attempt: int) -> float:
+    """
+    Exponential backoff with full jitter.
+
+    Args:
+        attempt: Attempt number that just failed (1-based)
+
+    Returns:
+        Seconds to wait before the next attempt
+    """
+    cap = min(RETRY_DELAY_MAX, RETRY_DELAY * (2 ** (attempt - 1)))
+    return random.uniform(0, cap)
+
+
+def load_validators(path: Path = VALIDATORS_FILE) -> Dict[str, Dict]:
+    """
+    Load stored HTTP validators.
+
+    Returns:
+        URL to {'etag', 'last_modified', 'digest'} (empty if none stored)
+    """
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_validators(validators: Dict[str, Dict], path: Path = VALIDATORS_FILE) -> None:
+    """Store HTTP validators atomically."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix('.tmp')
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(validators, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, path)
+
+
+def get_conditional_headers(validator: Optional[Dict]) -> Dict[str, str]:
+    """Build If-None-Match / If-Modified-Since headers from a stored validator."""
+    headers = {}
+    if validator:
+        if validator.get('etag'):
+            headers['If-None-Match'] = validator['etag']
+        if validator.get('last_modified'):
+            headers['If-Modified-Since'] = validator['last_modified']
+    return headers
+
+
+def fetch_xml(url: str, logger, timeout: int = DOWNLOAD_TIMEOUT,
+              session: Optional[requests.Session] = None,
+              deadline: Optional[float] = None,
+              validator: Optional[Dict] = None) -> Dict:
+    """
+    Download XML from IMS with retry logic and optional conditional GET.
+
+    Retries use exponential backoff with jitter and stop early once the
+    deadline passes.
 
     Args:
         url: URL to download from
         logger: Logger instance
         timeout: Request timeout in seconds
+        session: Pooled session to reuse (default: a one-off request)
+        deadline: time.monotonic() value after which no attempt is started
+        validator: Stored {'etag', 'last_modified', 'digest'} for this URL;
+            when given, the request is conditional and a 304 yields FEED_UNCHANGED;
+            a 304 to an unconditional request or an empty body is retried
 
     Returns:
-        Raw XML content as bytes, or None if failed
+        Dictionary with 'status' (FEED_DOWNLOADED / FEED_UNCHANGED / FEED_FAILED),
+        'content' (bytes or None), 'etag' and 'last_modified'; unchanged
+        feeds also carry the stored 'digest' of the current file
     """
     logger.info(f"Downloading XML from: {url}")
+    http = session if session is not None else requests
+    headers = get_conditional_headers(validator)
+    if headers:
+        logger.info(f"Conditional GET ({', '.join(headers)})")
 
     for attempt in range(1, MAX_RETRIES + 1):
+        attempt_timeout = timeout
+        if deadline is not None:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                logger.error(f"Download deadline reached before attempt {attempt}/{MAX_RETRIES}")
+                break
+            attempt_timeout = min(timeout, remaining)
+
         try:
-            response = requests.get(url, timeout=timeout)
+            response = http.get(url, timeout=attempt_timeout, headers=headers)
+            count('download.requests')
+
+            if response.status_code == 304 and headers:
+                logger.info(f"Not modified since last download: {url}")
+                count('download.not_modified')
+                return {
+                    'status': FEED_UNCHANGED,
+                    'content': None,
+                    'etag': validator.get('etag'),
+                    'last_modified': validator.get('last_modified'),
+                    'digest': validator.get('digest'),
+                }
+
+            if response.status_code == 304:
+                # Nothing was sent to be "not modified" against, so there is no
+                # stored copy to fall back on; retry like any other bad response
+                raise requests.exceptions.HTTPError(
+                    "304 Not Modified for a request without validators", response=response)
+
             response.raise_for_status()  # Raise exception for bad status codes
 
-            logger.info(f"Download successful (attempt {attempt}/{MAX_RETRIES})")
+            if not response.content:
+                raise requests.exceptions.RequestException("Empty response body")
+
+            logger.info(f"Download successful (attempt {attempt}/{MAX_RETRIES}): {url}")
             logger.info(f"Response size: {len(response.content)} bytes")
-            return response.content
+            count('download.bytes_in', len(response.content))
+            return {
+                'status': FEED_DOWNLOADED,
+                'content': response.content,
+                'etag': response.headers.get('ETag'),
+                'last_modified': response.headers.get('Last-Modified'),
+            }
 
         except requests.exceptions.Timeout:
-            logger.error(f"Attempt {attempt}/{MAX_RETRIES}: Request timed out after {timeout} seconds")
+            logger.error(f"Attempt {attempt}/{MAX_RETRIES}: Request timed out after {attempt_timeout:.0f} seconds")
 
         except requests.exceptions.ConnectionError:
             logger.error(f"Attempt {attempt}/{MAX_RETRIES}: Connection error - check internet connection")
@@ -83,11 +236,66 @@ def download_xml_from_ims(url: str, logger, timeout: int = DOWNLOAD_TIMEOUT) ->
 
         # Wait before retrying (unless it was the last attempt)
         if attempt < MAX_RETRIES:
-            logger.info(f"Retrying in {RETRY_DELAY} seconds...")
-            time.sleep(RETRY_DELAY)
+            delay = get_retry_delay(attempt)
+            if deadline is not None:
+                delay = min(delay, max(0.0, deadline - time.monotonic()))
+            logger.info(f"Retrying in {delay:.1f} seconds...")
+            time.sleep(delay)
+
+    logger.error(f"Failed to download XML after {MAX_RETRIES} attempts: {url}")
+    return {'status': FEED_FAILED, 'content': None, 'etag': None, 'last_modified': None}
+
 
-    logger.error(f"Failed to download XML after {MAX_RETRIES} attempts")
-    return None
+def download_xml_from_ims(url: str, logger, timeout: int = DOWNLOAD_TIMEOUT,
+                          session: Optional[requests.Session] = None,
+                          deadline: Optional[float] = None) -> Optional[bytes]:
+    """
+    Download XML file from IMS website with retry logic.
+
+    Args:
+        url: URL to download from
+        logger: Logger instance
+        timeout: Request timeout in seconds
+        session: Pooled session to reuse (default: a one-off request)
+        deadline: time.monotonic() value after which no attempt is started
+
+    Returns:
+        Raw XML content as bytes, or None if failed
+    """
+    return fetch_xml(url, logger, timeout, session, deadline)['content']
+
+
+def download_all_feeds(logger, feeds: Dict[str, str],
+                       validators: Optional[Dict[str, Optional[Dict]]] = None,
+                       deadline_seconds: float = DOWNLOAD_DEADLINE) -> Dict[str, Dict]:
+    """
+    Download all IMS feeds concurrently over one pooled session.
+
+    Each feed retries independently; the whole stage shares one deadline,
+    so it costs roughly one round-trip plus retries instead of the sum.
+
+    Args:
+        logger: Logger instance
+        feeds: Feed name to URL
+        validators: Feed name to stored validator (conditional GET), or None
+        deadline_seconds: Overall time budget for all feeds
+
+    Returns:
+        Feed name to fetch_xml() result
+    """
+    validators = validators or {}
+    deadline = time.monotonic() + deadline_seconds
+    logger.info(f"Downloading {len(feeds)} feed(s) concurrently (deadline {deadline_seconds:.0f}s)")
+
+    def fetch(name: str, url: str) -> Dict:
+        with span(f'download.{name}'):
+            return fetch_xml(url, logger, session=session, deadline=deadline,
+                             validator=validators.get(name))
+
+    with create_session(len(feeds)) as session:
+        with ThreadPoolExecutor(max_workers=len(feeds), thread_name_prefix='download') as pool:
+            futures = {name: pool.submit(fetch, name, url) for name, url in feeds.items()}
+            return {name: future.result() for name, future in futures.items()}
 
 
 def convert_encoding(raw_content: bytes, logger) -> Optional[str]:
@@ -102,16 +310,11 @@ def convert_encoding(raw_content: bytes, logger) -> Optional[str]:
         XML content as UTF-8 string, or None if failed
     """
     try:
-        # Decode from ISO-8859-8
-        xml_text = raw_content.decode('iso-8859-8')
-        logger.info("Successfully decoded from ISO-8859-8 encoding")
-
-        # Update XML declaration to UTF-8
-        if '<?xml' in xml_text:
-            # Replace encoding declaration
-            xml_text = xml_text.replace('encoding="ISO-8859-8"', 'encoding="UTF-8"')
-            xml_text = xml_text.replace('encoding="iso-8859-8"', 'encoding="UTF-8"')
-            logger.info("Updated XML encoding declaration to UTF-8")
+        # Decode from ISO-8859-8 and update the XML declaration to UTF-8
+        with span('decode'):
+            xml_text = ims_xml_to_utf8(raw_content)
+        count('decode.bytes_in', len(raw_content))
+        logger.info("Successfully decoded from ISO-8859-8 encoding (declaration set to UTF-8)")
 
         return xml_text
 
@@ -123,12 +326,37 @@ def convert_encoding(raw_content: bytes, logger) -> Optional[str]:
         return None
 
 
-def save_xml_file(content: str, file_path: Path, logger, dry_run: bool = False) -> bool:
+def convert_feed(name: str, result: Dict, logger) -> Optional[bytes]:
     """
-    Save XML content to file in UTF-8 encoding.
+    Convert a downloaded feed to UTF-8 once and hash it.
+
+    Stores the UTF-8 bytes and their SHA-256 on the result ('xml',
+    'digest'), so the saved files, the validator store and the
+    parsed-forecast cache key all come from this one conversion. Later
+    calls return the stored bytes.
 
     Args:
-        content: XML content as string
+        name: Feed name (for logging)
+        result: fetch_xml() result of a downloaded feed, updated in place
+        logger: Logger instance
+
+    Returns:
+        UTF-8 XML bytes, or None if the conversion failed
+    """
+    if 'xml' not in result:
+        logger.info(f"\n[{name.upper()} 2/4] Converting encoding (ISO-8859-8 → UTF-8)...")
+        xml_text = convert_encoding(result['content'], logger)
+        result['xml'] = xml_text.encode('utf-8') if xml_text is not None else None
+        result['digest'] = hashlib.sha256(result['xml']).hexdigest() if result['xml'] is not None else None
+    return result['xml']
+
+
+def save_xml_file(content: bytes, file_path: Path, logger, dry_run: bool = False) -> bool:
+    """
+    Save UTF-8 XML bytes to file.
+
+    Args:
+        content: UTF-8 XML bytes
         file_path: Path where to save the file
         logger: Logger instance
         dry_run: If True, don't actually save the file
@@ -144,9 +372,8 @@ def save_xml_file(content: str, file_path: Path, logger, dry_run: bool = False)
         # Ensure parent directory exists
         file_path.parent.mkdir(exist_ok=True)
 
-        # Write file in UTF-8 encoding
-        with open(file_path, 'w', encoding='utf-8') as f:
-            f.write(content)
+        # Bytes as converted, so the file hashes to the feed's digest
+        file_path.write_bytes(content)
 
         file_size = file_path.stat().st_size
         logger.info(f"Saved XML to: {file_path} ({file_size} bytes)")
@@ -160,115 +387,321 @@ def save_xml_file(content: str, file_path: Path, logger, dry_run: bool = False)
         return False
 
 
+def save_archive_copy(content: bytes, entry_path: Path, logger, dry_run: bool = False) -> bool:
+    """
+    Archive UTF-8 XML bytes under a per-day entry and index it.
+
+    The XML is stored once per distinct content as a compressed blob
+    (archive_store.py); the entry only points at it.
+
+    Args:
+        content: UTF-8 XML bytes
+        entry_path: Archive entry for today (isr_*_YYYY-MM-DD.ref)
+        logger: Logger instance
+        dry_run: If True, don't actually save anything
+
+    Returns:
+        True if successful, False otherwise
+    """
+    if dry_run:
+        logger.info(f"[DRY RUN] Would archive XML as: {entry_path}")
+        return True
+
+    try:
+        archive_content(content, entry_path, logger)
+    except OSError as e:
+        logger.error(f"Failed to archive XML as {entry_path}: {e}")
+        return False
+
+    index_archive_file(entry_path, logger, content=content)
+    return True
+
+
 # ============================================================================
 # MAIN DOWNLOAD WORKFLOW
 # ============================================================================
 
-def download_and_convert(logger, dry_run: bool = False) -> bool:
+# ============================================================================
+# BACKGROUND PERSISTENCE
+# ============================================================================
+
+# Single writer thread: file writes happen in submission order, off the
+# critical path of the workflow
+_writer: Optional[ThreadPoolExecutor] = None
+_pending_writes: List[Future] = []
+
+
+def submit_background_write(task: Callable, *args) -> Future:
     """
-    Complete workflow: download, convert, and save XML files.
-    Downloads both cities and country XML files.
+    Run a persistence task on the background writer thread.
+
+    Args:
+        task: Callable to run
+        *args: Arguments for task
+
+    Returns:
+        Future for the task's result
+    """
+    global _writer
+    if _writer is None:
+        _writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix='persist')
+    future = _writer.submit(task, *args)
+    _pending_writes.append(future)
+    return future
+
+
+def wait_for_background_writes(logger, timeout: Optional[float] = None) -> bool:
+    """
+    Block until every submitted persistence task has finished.
 
     Args:
         logger: Logger instance
-        dry_run: If True, don't actually save files
+        timeout: Maximum seconds to wait per task (default: no limit)
 
     Returns:
-        True if successful, False otherwise
+        True if all tasks completed without raising, False otherwise
     """
-    print_separator(logger)
-    logger.info("IMS WEATHER FORECAST DOWNLOAD")
-    print_separator(logger)
+    success = True
+    while _pending_writes:
+        future = _pending_writes.pop(0)
+        try:
+            future.result(timeout=timeout)
+        except Exception as e:
+            logger.error(f"Background write failed: {e}")
+            success = False
+    return success
 
-    # Ensure directories exist
-    ensure_directories()
-    logger.info("Project directories verified")
 
-    today = get_today_date()
-    success_count = 0
+def get_stored_validator(url: str, current_file: Path, validators: Dict[str, Dict]) -> Optional[Dict]:
+    """
+    Return the stored validator for a URL if the current file still matches it.
 
-    # ========================================================================
-    # CITIES XML
-    # ========================================================================
-    logger.info("\n[CITIES 1/4] Downloading cities XML from IMS website...")
-    raw_cities_xml = download_xml_from_ims(IMS_CITIES_XML_URL, logger)
+    A conditional GET is only safe when the file on disk is exactly the one
+    the validator was recorded for; otherwise download unconditionally.
+    """
+    validator = validators.get(url)
+    if not validator or not current_file.exists():
+        return None
+    if validator.get('digest') != file_digest(current_file):
+        return None
+    return validator
 
-    if raw_cities_xml is None:
-        logger.error("Cities XML download failed")
-    else:
-        logger.info("\n[CITIES 2/4] Converting encoding (ISO-8859-8 → UTF-8)...")
-        utf8_cities_xml = convert_encoding(raw_cities_xml, logger)
 
-        if utf8_cities_xml is None:
-            logger.error("Cities XML encoding conversion failed")
-        else:
-            logger.info("\n[CITIES 3/4] Saving current cities XML file...")
-            if not save_xml_file(utf8_cities_xml, XML_FILE, logger, dry_run):
-                logger.error("Failed to save current cities XML file")
+def process_feed(name: str, feed: Dict, result: Dict, today: str,
+                 validators: Dict[str, Dict], logger, dry_run: bool = False) -> str:
+    """
+    Convert and save one downloaded feed (current file + archive copy).
+
+    Args:
+        name: Feed name (for logging)
+        feed: IMS_FEEDS entry
+        result: fetch_xml() result for the feed
+        today: Archive date (YYYY-MM-DD)
+        validators: Validator store, updated in place on success
+        logger: Logger instance
+        dry_run: If True, don't actually save files
+
+    Returns:
+        Final feed status (FEED_DOWNLOADED / FEED_UNCHANGED / FEED_FAILED)
+    """
+    label = name.upper()
+    current_file = feed['current_file']
+    archive_path = feed['archive_path'](today)
+
+    if result['status'] == FEED_FAILED:
+        logger.error(f"{name.capitalize()} XML download failed")
+        return FEED_FAILED
+
+    if result['status'] == FEED_UNCHANGED:
+        logger.info(f"\n[{label}] IMS has not republished - reusing {current_file.name}")
+        if not archive_path.exists():
+            # Same content as an earlier day: only a new entry, the blob is shared
+            try:
+                content = current_file.read_bytes()
+            except OSError as e:
+                logger.warning(f"Could not read {current_file.name} for archiving: {e}")
             else:
-                logger.info("\n[CITIES 4/4] Saving cities XML to archive...")
-                archive_path = get_archive_path(today)
-                if save_xml_file(utf8_cities_xml, archive_path, logger, dry_run):
-                    success_count += 1
-                else:
-                    logger.warning("Failed to save cities archive copy")
+                save_archive_copy(content, archive_path, logger, dry_run)
+        return FEED_UNCHANGED
+
+    utf8_xml = convert_feed(name, result, logger)
+    if utf8_xml is None:
+        logger.error(f"{name.capitalize()} XML encoding conversion failed")
+        return FEED_FAILED
+
+    logger.info(f"\n[{label} 3/4] Saving current {name} XML file...")
+    if not save_xml_file(utf8_xml, current_file, logger, dry_run):
+        logger.error(f"Failed to save current {name} XML file")
+        return FEED_FAILED
+
+    # Remember validators only for content actually written to disk
+    if not dry_run and (result['etag'] or result['last_modified']):
+        validators[feed['url']] = {
+            'etag': result['etag'],
+            'last_modified': result['last_modified'],
+            'digest': result['digest'],
+        }
+
+    logger.info(f"\n[{label} 4/4] Saving {name} XML to archive...")
+    if not save_archive_copy(utf8_xml, archive_path, logger, dry_run):
+        logger.warning(f"Failed to save {name} archive copy")
+        return FEED_FAILED
+
+    return FEED_DOWNLOADED
+
+
+def persist_feeds(feeds: Dict[str, Dict], results: Dict[str, Dict], today: str,
+                  validators: Dict[str, Dict], validators_file: Path,
+                  logger, dry_run: bool = False) -> Dict[str, str]:
+    """
+    Convert and save every fetched feed, store validators and clean up archives.
 
-    # ========================================================================
-    # COUNTRY XML
-    # ========================================================================
-    logger.info("\n[COUNTRY 1/4] Downloading country XML from IMS website...")
-    raw_country_xml = download_xml_from_ims(IMS_COUNTRY_XML_URL, logger)
+    Args:
+        feeds: Feed definitions
+        results: Feed name to fetch_xml() result
+        today: Archive date (YYYY-MM-DD)
+        validators: Validator store, updated and saved here
+        validators_file: Where validators are stored
+        logger: Logger instance
+        dry_run: If True, don't actually save files
 
-    if raw_country_xml is None:
-        logger.error("Country XML download failed")
-    else:
-        logger.info("\n[COUNTRY 2/4] Converting encoding (ISO-8859-8 → UTF-8)...")
-        utf8_country_xml = convert_encoding(raw_country_xml, logger)
+    Returns:
+        Feed name to final status (FEED_DOWNLOADED / FEED_UNCHANGED / FEED_FAILED)
+    """
+    statuses = {}
+    for name, feed in feeds.items():
+        statuses[name] = process_feed(name, feed, results[name], today, validators, logger, dry_run)
 
-        if utf8_country_xml is None:
-            logger.error("Country XML encoding conversion failed")
-        else:
-            logger.info("\n[COUNTRY 3/4] Saving current country XML file...")
-            if not save_xml_file(utf8_country_xml, COUNTRY_XML_FILE, logger, dry_run):
-                logger.error("Failed to save current country XML file")
-            else:
-                logger.info("\n[COUNTRY 4/4] Saving country XML to archive...")
-                country_archive_path = get_country_archive_path(today)
-                if save_xml_file(utf8_country_xml, country_archive_path, logger, dry_run):
-                    success_count += 1
-                else:
-                    logger.warning("Failed to save country archive copy")
+    if not dry_run:
+        try:
+            save_validators(validators, validators_file)
+        except OSError as e:
+            logger.warning(f"Could not save HTTP validators: {e}")
 
     # ========================================================================
     # CLEANUP
     # ========================================================================
     logger.info("\n[CLEANUP] Cleaning up old archive files...")
-    deleted_count = cleanup_old_archives(logger, dry_run)
+    deleted_count = cleanup_expired_archives(logger, dry_run)
 
     # Success summary
+    success_count = sum(1 for status in statuses.values() if status != FEED_FAILED)
     print_separator(logger)
-    if success_count == 2:
+    if success_count == len(feeds):
         if dry_run:
             logger.info("[DRY RUN] Download and conversion simulation complete!")
         else:
             logger.info("Download and conversion complete!")
-        logger.info(f"Current cities XML: {XML_FILE}")
-        logger.info(f"Current country XML: {COUNTRY_XML_FILE}")
-        logger.info(f"Cities archive: {get_archive_path(today)}")
-        logger.info(f"Country archive: {get_country_archive_path(today)}")
-    elif success_count == 1:
-        logger.warning("Partial success: Only 1 of 2 XML files downloaded")
+        for name, feed in feeds.items():
+            logger.info(f"Current {name} XML: {feed['current_file']} ({statuses[name]})")
+            logger.info(f"{name.capitalize()} archive: {feed['archive_path'](today)}")
+    elif success_count > 0:
+        logger.warning(f"Partial success: Only {success_count} of {len(feeds)} XML files downloaded")
     else:
         logger.error("Failed to download any XML files")
-        print_separator(logger)
-        return False
 
     if deleted_count > 0:
         logger.info(f"Cleaned up {deleted_count} old archive file(s)")
 
     print_separator(logger)
 
-    return success_count > 0
+    return statuses
+
+
+def download_feeds(logger, dry_run: bool = False,
+                   feeds: Optional[Dict[str, Dict]] = None,
+                   validators_file: Path = VALIDATORS_FILE,
+                   background: bool = False) -> Dict[str, Dict]:
+    """
+    Complete workflow: download, convert, and save XML files.
+    Downloads both cities and country XML files.
+
+    Feeds whose validators (ETag / Last-Modified) still match are requested
+    conditionally; on 304 the existing current file is reused untouched.
+
+    Each downloaded feed is converted to UTF-8 and hashed once, up front.
+    With background=True the function then returns; current/archive file
+    writes and cleanup run on the background writer thread (see
+    wait_for_background_writes). Callers parse the returned bytes directly
+    instead of re-reading the files.
+
+    Args:
+        logger: Logger instance
+        dry_run: If True, don't actually save files
+        feeds: Feed definitions (default: IMS_FEEDS)
+        validators_file: Where ETag / Last-Modified validators are stored
+        background: If True, persist files asynchronously
+
+    Returns:
+        Feed name to {'status', 'content', 'digest'}: status is
+        FEED_DOWNLOADED / FEED_UNCHANGED / FEED_FAILED, content the UTF-8
+        XML bytes of downloaded feeds (None otherwise or if conversion
+        failed), digest the SHA-256 of that content, or of the reused
+        current file for unchanged feeds
+    """
+    if feeds is None:
+        feeds = IMS_FEEDS
+
+    print_separator(logger)
+    logger.info("IMS WEATHER FORECAST DOWNLOAD")
+    print_separator(logger)
+
+    # Ensure directories exist
+    ensure_directories()
+    logger.info("Project directories verified")
+
+    today = get_today_date()
+
+    # ========================================================================
+    # DOWNLOAD (all feeds concurrently, conditional where possible)
+    # ========================================================================
+    logger.info("\n[DOWNLOAD] Downloading cities and country XML from IMS website...")
+    validators = load_validators(validators_file)
+    results = download_all_feeds(
+        logger,
+        {name: feed['url'] for name, feed in feeds.items()},
+        validators={name: get_stored_validator(feed['url'], feed['current_file'], validators)
+                    for name, feed in feeds.items()}
+    )
+
+    # ========================================================================
+    # CONVERT + SAVE
+    # ========================================================================
+    # Converted here, not in the background, so the caller parses the UTF-8
+    # bytes and keys the parsed-forecast cache with their digest
+    for name, result in results.items():
+        if result['status'] == FEED_DOWNLOADED:
+            convert_feed(name, result, logger)
+
+    persist_args = (feeds, results, today, validators, validators_file, logger, dry_run)
+    if background:
+        logger.info("\n[SAVE] Saving current and archive XML files in the background")
+        submit_background_write(persist_feeds, *persist_args)
+        statuses = {name: result['status'] for name, result in results.items()}
+    else:
+        statuses = persist_feeds(*persist_args)
+
+    return {
+        name: {'status': statuses[name], 'content': results[name].get('xml'),
+               'digest': results[name].get('digest')}
+        for name in feeds
+    }
+
+
+def download_and_convert(logger, dry_run: bool = False) -> bool:
+    """
+    Complete workflow: download, convert, and save XML files.
+    Downloads both cities and country XML files.
+
+    Args:
+        logger: Logger instance
+        dry_run: If True, don't actually save files
+
+    Returns:
+        True if at least one feed is available (downloaded or unchanged), False otherwise
+    """
+    feed_results = download_feeds(logger, dry_run=dry_run)
+    return any(result['status'] != FEED_FAILED for result in feed_results.values())
 
 
 # ============================================================================
@@ -5,12 +5,19 @@ Production-ready extraction script that parses XML, extracts weather data
 for all 15 cities, filters by date, sorts north to south, and validates.
 """
 
+import io
 import sys
+import weakref
 import xml.etree.ElementTree as ET
 from pathlib import Path
-from typing import List, Dict, Optional
-import glob
+from typing import Callable, Iterator, List, Dict, Optional, Sequence, Tuple, Union
 
+from archive_store import blob_content_size, is_blob, open_blob, read_blob
+from instrumentation import count, span
+from forecast_cache import (
+    ParsedForecast, digest_cache_key, forecast_cache_key, load_parsed_forecast, store_parsed_forecast,
+)
+from forecast_records import CityForecast, ForecastBatch
 from utils import (
     setup_logging,
     get_today_date,
@@ -22,11 +29,26 @@ from utils import (
     format_hebrew_date,
     print_separator,
     XML_FILE,
-    COUNTRY_XML_FILE,
-    ARCHIVE_DIR
+    COUNTRY_XML_FILE
 )
 
 
+# ============================================================================
+# CONFIGURATION
+# ============================================================================
+
+# Cities XML at or above this size is extracted with the streaming parser
+# (flat memory) instead of a full tree + ForecastTable. The daily IMS feed
+# is far below it.
+STREAMING_THRESHOLD_BYTES = 4 * 1024 * 1024
+
+# A file path (plain XML or compressed archive blob) or raw XML bytes
+XmlSource = Union[Path, str, bytes]
+
+# Bump whenever extraction output changes - invalidates the parsed-forecast cache
+EXTRACTOR_VERSION = 1
+
+
 # ============================================================================
 # EXTRACTION FUNCTIONS
 # ============================================================================
@@ -59,6 +81,35 @@ def parse_xml_file(xml_path: Path, logger) -> Optional[ET.Element]:
         return None
 
 
+def parse_xml_bytes(content: bytes, source: str, logger) -> Optional[ET.Element]:
+    """
+    Parse XML straight from downloaded bytes and return root element.
+
+    The parser honours the document's encoding declaration, so the UTF-8
+    bytes the download step hands over and raw ISO-8859-8 feeds both parse
+    without another conversion.
+
+    Args:
+        content: XML bytes
+        source: Name used in log messages (e.g. feed name)
+        logger: Logger instance
+
+    Returns:
+        XML root element, or None if failed
+    """
+    try:
+        root = ET.fromstring(content)
+        logger.info(f"Successfully parsed downloaded XML: {source}")
+        return root
+
+    except ET.ParseError as e:
+        logger.error(f"XML parsing error ({source}): {e}")
+        return None
+    except Exception as e:
+        logger.error(f"Unexpected error parsing XML ({source}): {e}")
+        return None
+
+
 def get_issue_datetime(root: ET.Element, logger) -> Optional[str]:
     """
     Extract forecast issue date/time from XML.
@@ -82,94 +133,71 @@ def get_issue_datetime(root: ET.Element, logger) -> Optional[str]:
         return None
 
 
-def extract_city_forecast(location: ET.Element, target_date: str, logger) -> Optional[Dict]:
+# ============================================================================
+# FORECAST TABLE
+# ============================================================================
+
+def read_element_values(time_unit: ET.Element) -> Dict[str, str]:
     """
-    Extract forecast data for one city/location.
+    Read every Element of a TimeUnitData node.
+
+    Args:
+        time_unit: XML TimeUnitData element
+
+    Returns:
+        Dictionary of ElementName -> ElementValue
+    """
+    values = {}
+    for element in time_unit.iterfind('Element'):
+        # ElementName / ElementValue are the element's only children
+        elem_name = elem_value = None
+        for child in element:
+            if child.tag == 'ElementName':
+                elem_name = child.text
+            elif child.tag == 'ElementValue':
+                elem_value = child.text
+        if elem_name is not None:
+            values[elem_name] = elem_value
+    return values
+
+
+def read_location(location: ET.Element, logger) -> Optional[Tuple[Dict, Dict[str, ET.Element]]]:
+    """
+    Read one Location element: metadata plus its TimeUnitData nodes by date.
 
     Args:
         location: XML Location element
-        target_date: Target date in YYYY-MM-DD format
         logger: Logger instance
 
     Returns:
-        City data dictionary, or None if extraction failed
+        Tuple of (metadata, {date: TimeUnitData element}), or None if the
+        location is malformed
     """
     try:
-        # Extract metadata
         metadata = location.find('LocationMetaData')
         if metadata is None:
             logger.error("LocationMetaData not found")
             return None
 
-        city_name_eng = metadata.find('LocationNameEng').text
-        city_name_heb = metadata.find('LocationNameHeb').text
-        latitude = float(metadata.find('DisplayLat').text)
-        longitude = float(metadata.find('DisplayLon').text)
+        city_meta = {
+            'name_eng': metadata.find('LocationNameEng').text,
+            'name_heb': metadata.find('LocationNameHeb').text,
+            'latitude': float(metadata.find('DisplayLat').text),
+            'longitude': float(metadata.find('DisplayLon').text),
+        }
 
-        # Find the forecast for target date
         location_data = location.find('LocationData')
         if location_data is None:
-            logger.error(f"LocationData not found for {city_name_eng}")
+            logger.error(f"LocationData not found for {city_meta['name_eng']}")
             return None
 
-        target_forecast = None
-        for time_unit in location_data.findall('TimeUnitData'):
-            date_elem = time_unit.find('Date')
-            if date_elem is not None and date_elem.text == target_date:
-                target_forecast = time_unit
-                break
-
-        # If no forecast found for this date, return None
-        if target_forecast is None:
-            logger.warning(f"No forecast found for {city_name_eng} on {target_date}")
-            return None
-
-        # Extract weather elements
-        max_temp = None
-        min_temp = None
-        weather_code = None
-        max_humidity = None
-        min_humidity = None
-        wind = None
-
-        for element in target_forecast.findall('Element'):
-            elem_name_node = element.find('ElementName')
-            elem_value_node = element.find('ElementValue')
-
-            if elem_name_node is None or elem_value_node is None:
-                continue
-
-            elem_name = elem_name_node.text
-            elem_value = elem_value_node.text
-
-            if elem_name == "Maximum temperature":
-                max_temp = elem_value
-            elif elem_name == "Minimum temperature":
-                min_temp = elem_value
-            elif elem_name == "Weather code":
-                weather_code = elem_value
-            elif elem_name == "Maximum relative humidity":
-                max_humidity = elem_value
-            elif elem_name == "Minimum relative humidity":
-                min_humidity = elem_value
-            elif elem_name == "Wind direction and speed":
-                wind = elem_value
-
-        # Build city data dictionary
-        city_info = {
-            'name_eng': city_name_eng,
-            'name_heb': city_name_heb,
-            'latitude': latitude,
-            'longitude': longitude,
-            'max_temp': max_temp,
-            'min_temp': min_temp,
-            'weather_code': weather_code,
-            'max_humidity': max_humidity,
-            'min_humidity': min_humidity,
-            'wind': wind
-        }
+        by_date = {}
+        for time_unit in location_data.iterfind('TimeUnitData'):
+            date = time_unit.findtext('Date')
+            if date and date not in by_date:
+                by_date[date] = time_unit
 
-        return city_info
+        return city_meta, by_date
 
     except AttributeError as e:
         logger.error(f"Missing required XML element: {e}")
@@ -182,6 +210,144 @@ def extract_city_forecast(location: ET.Element, target_date: str, logger) -> Opt
         return None
 
 
+def build_city_info(city_meta: Dict, values: Dict[str, str], date: Optional[str] = None) -> CityForecast:
+    """Combine location metadata and one day's element values into a CityForecast."""
+    return CityForecast.from_values(city_meta, values, date)
+
+
+class ForecastTable:
+    """
+    Every city forecast in a cities XML, indexed by (date, city).
+
+    Built in one pass over the document; date listings, per-date extraction
+    and date fallback are all answered from the index. Element values of a
+    (date, city) cell are decoded on first access and kept.
+    """
+
+    def __init__(self):
+        self.cities: Dict[str, Dict] = {}                          # name_eng -> metadata, document order
+        self.cells: Dict[Tuple[str, str], ET.Element] = {}         # (date, name_eng) -> TimeUnitData
+        self.dates: List[str] = []                                 # sorted chronologically
+        self._values: Dict[Tuple[str, str], Dict[str, str]] = {}
+
+    def add_location(self, city_meta: Dict, by_date: Dict[str, ET.Element]) -> None:
+        """Index one location's metadata and per-date TimeUnitData nodes."""
+        name = city_meta['name_eng']
+        self.cities.setdefault(name, city_meta)
+        for date, time_unit in by_date.items():
+            self.cells.setdefault((date, name), time_unit)
+
+    def values(self, date: str, name_eng: str) -> Optional[Dict[str, str]]:
+        """Return every element value (ElementName -> ElementValue) for (date, city), or None."""
+        key = (date, name_eng)
+        values = self._values.get(key)
+        if values is None:
+            time_unit = self.cells.get(key)
+            if time_unit is None:
+                return None
+            values = read_element_values(time_unit)
+            self._values[key] = values
+        return values
+
+    def get(self, date: str, name_eng: str) -> Optional[CityForecast]:
+        """Return the forecast for (date, city), or None."""
+        values = self.values(date, name_eng)
+        if values is None:
+            return None
+        return build_city_info(self.cities[name_eng], values, date)
+
+    def cities_for_date(self, date: str) -> List[CityForecast]:
+        """Return forecasts for every city with data on date, in document order."""
+        return [
+            build_city_info(city_meta, self.values(date, name), date)
+            for name, city_meta in self.cities.items()
+            if (date, name) in self.cells
+        ]
+
+    def to_batch(self) -> ForecastBatch:
+        """Return every (date, city) forecast as one ForecastBatch, ordered by date then document order."""
+        return ForecastBatch.from_records(
+            build_city_info(self.cities[name], self.values(date, name), date)
+            for date in self.dates
+            for name in self.cities
+            if (date, name) in self.cells
+        )
+
+
+def build_forecast_table(root: ET.Element, logger) -> ForecastTable:
+    """
+    Index a cities XML into a ForecastTable in a single pass.
+
+    Args:
+        root: XML root element
+        logger: Logger instance
+
+    Returns:
+        ForecastTable
+    """
+    table = ForecastTable()
+    dates = set()
+    locations = root.findall('.//Location')
+
+    for location in locations:
+        parsed = read_location(location, logger)
+        if parsed is None:
+            continue
+        city_meta, by_date = parsed
+        table.add_location(city_meta, by_date)
+        dates.update(by_date)
+
+    table.dates = sorted(dates)
+    logger.info(f"Indexed {len(locations)} locations x {len(table.dates)} dates ({len(table.cells)} forecasts)")
+    return table
+
+
+# One table per parsed document, shared by get_available_dates and extract_all_cities
+_forecast_tables: "weakref.WeakKeyDictionary[ET.Element, ForecastTable]" = weakref.WeakKeyDictionary()
+
+
+def get_forecast_table(root: ET.Element, logger) -> ForecastTable:
+    """
+    Return the ForecastTable for a parsed document, building it on first use.
+
+    Args:
+        root: XML root element
+        logger: Logger instance
+
+    Returns:
+        ForecastTable
+    """
+    table = _forecast_tables.get(root)
+    if table is None:
+        table = build_forecast_table(root, logger)
+        _forecast_tables[root] = table
+    return table
+
+
+def extract_city_forecast(location: ET.Element, target_date: str, logger) -> Optional[CityForecast]:
+    """
+    Extract forecast data for one city/location.
+
+    Args:
+        location: XML Location element
+        target_date: Target date in YYYY-MM-DD format
+        logger: Logger instance
+
+    Returns:
+        CityForecast, or None if extraction failed
+    """
+    parsed = read_location(location, logger)
+    if parsed is None:
+        return None
+
+    city_meta, by_date = parsed
+    if target_date not in by_date:
+        logger.warning(f"No forecast found for {city_meta['name_eng']} on {target_date}")
+        return None
+
+    return build_city_info(city_meta, read_element_values(by_date[target_date]), target_date)
+
+
 def get_available_dates(root: ET.Element, logger) -> List[str]:
     """
     Get all available forecast dates from the XML.
@@ -193,16 +359,8 @@ def get_available_dates(root: ET.Element, logger) -> List[str]:
     Returns:
         List of dates in YYYY-MM-DD format, sorted chronologically
     """
-    dates = set()
-
     try:
-        # Find all Date elements across all locations
-        for date_elem in root.findall('.//TimeUnitData/Date'):
-            if date_elem.text:
-                dates.add(date_elem.text)
-
-        # Sort dates chronologically
-        sorted_dates = sorted(list(dates))
+        sorted_dates = list(get_forecast_table(root, logger).dates)
 
         if sorted_dates:
             logger.info(f"Available forecast dates in XML: {', '.join(sorted_dates)}")
@@ -216,7 +374,71 @@ def get_available_dates(root: ET.Element, logger) -> List[str]:
         return []
 
 
-def extract_all_cities(root: ET.Element, target_date: str, logger) -> List[Dict]:
+def extract_cities_for_date(table: ForecastTable, date: str, logger) -> List[CityForecast]:
+    """
+    Return the validated city data for one date from the table.
+
+    Args:
+        table: ForecastTable
+        date: Date in YYYY-MM-DD format
+        logger: Logger instance
+
+    Returns:
+        List of CityForecast records (invalid cities skipped)
+    """
+    cities_data = []
+    for city_data in table.cities_for_date(date):
+        if validate_city_data(city_data, logger):
+            cities_data.append(city_data)
+        else:
+            logger.warning(f"Skipping city with invalid data: {city_data.get('name_eng', 'Unknown')}")
+    return cities_data
+
+
+def fall_back_to_available_dates(target_date: str, available_dates: Sequence[str],
+                                 cities_for_date: Callable[[str], List[CityForecast]],
+                                 logger) -> List[CityForecast]:
+    """
+    Smart date detection: try the other available dates when target_date has no data.
+
+    Handles the case where the XML already holds IMS's next forecast. Shared
+    by the table, streaming and batch extractors.
+
+    Args:
+        target_date: Date that yielded no valid city (skipped here)
+        available_dates: Forecast dates in the XML, in the order to try
+        cities_for_date: Returns the validated cities for a date
+        logger: Logger instance
+
+    Returns:
+        Cities of the first available date with data, or an empty list
+    """
+    logger.warning(f"No data found for target date: {target_date}")
+    logger.info("Attempting smart date detection...")
+
+    if not available_dates:
+        logger.error("No available dates found in XML")
+        return []
+
+    logger.info(f"Available forecast dates in XML: {', '.join(available_dates)}")
+    for fallback_date in available_dates:
+        if fallback_date == target_date:
+            continue
+
+        logger.info(f"Trying fallback date: {fallback_date}")
+        cities_data = cities_for_date(fallback_date)
+
+        if len(cities_data) > 0:
+            logger.info(f"✓ Successfully extracted {len(cities_data)} cities using date: {fallback_date}")
+            logger.info(f"Note: IMS published new forecast - using {fallback_date} instead of {target_date}")
+            return cities_data
+        logger.warning(f"No valid data found for {fallback_date}, trying next date...")
+
+    logger.error("No valid data found in any available date")
+    return []
+
+
+def extract_all_cities(root: ET.Element, target_date: str, logger) -> List[CityForecast]:
     """
     Extract forecast data for all cities in the XML.
 
@@ -231,135 +453,623 @@ def extract_all_cities(root: ET.Element, target_date: str, logger) -> List[Dict]
     Returns:
         List of city data dictionaries
     """
+    table = get_forecast_table(root, logger)
+    logger.info(f"Found {len(table.cities)} city locations in XML")
+
+    if target_date in table.dates:
+        # Report cities that have no forecast for an otherwise covered date
+        for name in table.cities:
+            if (target_date, name) not in table.cells:
+                logger.warning(f"No forecast found for {name} on {target_date}")
+
+    cities_data = extract_cities_for_date(table, target_date, logger)
+    logger.info(f"Successfully extracted {len(cities_data)} cities")
+
+    if len(cities_data) == 0:
+        cities_data = fall_back_to_available_dates(
+            target_date, table.dates, lambda date: extract_cities_for_date(table, date, logger), logger)
+
+    return cities_data
+
+
+# ============================================================================
+# STREAMING EXTRACTION
+# ============================================================================
+
+def get_source_size(source: XmlSource) -> int:
+    """Return the (uncompressed) XML size of a file path or raw XML bytes (0 if unknown)."""
+    if isinstance(source, bytes):
+        return len(source)
+    if is_blob(source):
+        return blob_content_size(source)
+    try:
+        return Path(source).stat().st_size
+    except OSError:
+        return 0
+
+
+def iterparse_source(source: XmlSource, events=('start', 'end')):
+    """Run ET.iterparse over a file path, compressed archive blob or raw XML bytes."""
+    if isinstance(source, bytes):
+        source = io.BytesIO(source)
+    elif is_blob(source):
+        # Decompressed chunk by chunk as the parser consumes it
+        with open_blob(source) as stream:
+            yield from ET.iterparse(stream, events=events)
+        return
+    yield from ET.iterparse(source, events=events)
+
+
+def iter_time_units(source: XmlSource) -> Iterator[Tuple[Optional[Dict], Optional[str], ET.Element]]:
+    """
+    Stream TimeUnitData nodes from an IMS XML, discarding each after use.
+
+    Finished Location elements are detached from their parent, so memory
+    stays proportional to one location regardless of document size.
+
+    Args:
+        source: File path or raw XML bytes
+
+    Yields:
+        (city_meta, issue_datetime, element) for every completed
+        TimeUnitData; city_meta is the enclosing location's metadata (None
+        for the country XML) and element is valid only until the next item
+
+    Raises:
+        ET.ParseError: If the document is malformed
+    """
+    stack = []
+    city_meta = None
+    issue_datetime = None
+
+    for event, elem in iterparse_source(source):
+        if event == 'start':
+            stack.append(elem)
+            if elem.tag == 'Location':
+                city_meta = None
+            continue
+
+        stack.pop()
+        tag = elem.tag
+
+        if tag == 'IssueDateTime':
+            issue_datetime = elem.text
+        elif tag == 'LocationMetaData':
+            try:
+                city_meta = {
+                    'name_eng': elem.findtext('LocationNameEng'),
+                    'name_heb': elem.findtext('LocationNameHeb'),
+                    'latitude': float(elem.findtext('DisplayLat')),
+                    'longitude': float(elem.findtext('DisplayLon')),
+                }
+            except (TypeError, ValueError):
+                city_meta = {'name_eng': elem.findtext('LocationNameEng'), 'invalid': True}
+        elif tag == 'TimeUnitData':
+            yield city_meta, issue_datetime, elem
+            elem.clear()
+        elif tag == 'Location':
+            elem.clear()
+            if stack:
+                stack[-1].remove(elem)
+
+
+def iter_city_forecasts(source: XmlSource, logger) -> Iterator[Tuple[str, CityForecast]]:
+    """
+    Stream one record per (location, date) from a cities XML.
+
+    Args:
+        source: File path or raw XML bytes
+        logger: Logger instance
+
+    Yields:
+        (date, CityForecast)
+
+    Raises:
+        ET.ParseError: If the document is malformed
+    """
+    reported = set()
+    for city_meta, _, time_unit in iter_time_units(source):
+        date = time_unit.findtext('Date')
+        if not date:
+            continue
+        if city_meta is None or city_meta.get('invalid'):
+            name = city_meta.get('name_eng') if city_meta else None
+            if name not in reported:
+                logger.error(f"Missing or invalid LocationMetaData for {name or 'unknown location'}")
+                reported.add(name)
+            continue
+        yield date, build_city_info(city_meta, read_element_values(time_unit), date)
+
+
+def stream_forecast_dates(source: XmlSource, logger) -> List[str]:
+    """
+    Get all available forecast dates from an XML without building a tree.
+
+    Args:
+        source: File path or raw XML bytes
+        logger: Logger instance
+
+    Returns:
+        List of dates in YYYY-MM-DD format, sorted chronologically (empty on error)
+    """
+    dates = set()
+    try:
+        for _, _, time_unit in iter_time_units(source):
+            date = time_unit.findtext('Date')
+            if date:
+                dates.add(date)
+    except (ET.ParseError, OSError) as e:
+        logger.error(f"Error reading forecast dates: {e}")
+        return []
+
+    sorted_dates = sorted(dates)
+    if sorted_dates:
+        logger.info(f"Available forecast dates in XML: {', '.join(sorted_dates)}")
+    else:
+        logger.warning("No forecast dates found in XML")
+    return sorted_dates
+
+
+def stream_cities_for_date(source: XmlSource, date: str, logger) -> Tuple[Optional[str], List[CityForecast], List[str]]:
+    """
+    Collect the validated cities for one date in a single streaming pass.
+
+    Args:
+        source: File path or raw XML bytes
+        date: Date in YYYY-MM-DD format
+        logger: Logger instance
+
+    Returns:
+        Tuple of (issue_datetime, CityForecast list, sorted dates seen)
+
+    Raises:
+        ET.ParseError: If the document is malformed
+    """
     cities_data = []
+    seen_cities = set()
+    dates = set()
+    issue_datetime = None
+
+    for city_meta, issue, time_unit in iter_time_units(source):
+        issue_datetime = issue_datetime or issue
+        unit_date = time_unit.findtext('Date')
+        if not unit_date:
+            continue
+        dates.add(unit_date)
+        if unit_date != date or city_meta is None or city_meta.get('invalid'):
+            continue
+        if city_meta['name_eng'] in seen_cities:
+            continue
+        seen_cities.add(city_meta['name_eng'])
+
+        city_data = build_city_info(city_meta, read_element_values(time_unit), date)
+        if validate_city_data(city_data, logger):
+            cities_data.append(city_data)
+        else:
+            logger.warning(f"Skipping city with invalid data: {city_data.get('name_eng', 'Unknown')}")
 
-    # Find all Location elements
-    locations = root.findall('.//Location')
-    logger.info(f"Found {len(locations)} city locations in XML")
+    return issue_datetime, cities_data, sorted(dates)
 
-    # Extract data from each location
-    for location in locations:
-        city_data = extract_city_forecast(location, target_date, logger)
-        if city_data is not None:
-            # Validate city data
+
+def stream_all_cities(source: XmlSource, target_date: str, logger) -> Tuple[Optional[str], List[CityForecast]]:
+    """
+    Streaming counterpart of extract_all_cities, with the same date fallback.
+
+    Memory is bounded by the cities of one date; a fallback costs one more
+    streaming pass per tried date.
+
+    Args:
+        source: File path or raw XML bytes
+        target_date: Target date in YYYY-MM-DD format
+        logger: Logger instance
+
+    Returns:
+        Tuple of (issue_datetime, CityForecast list)
+
+    Raises:
+        ET.ParseError: If the document is malformed
+    """
+    issue_datetime, cities_data, available_dates = stream_cities_for_date(source, target_date, logger)
+    logger.info(f"Successfully extracted {len(cities_data)} cities (streaming)")
+
+    if len(cities_data) == 0:
+        cities_data = fall_back_to_available_dates(
+            target_date, available_dates,
+            lambda date: stream_cities_for_date(source, date, logger)[1], logger)
+
+    return issue_datetime, cities_data
+
+
+def stream_weather_description(source: XmlSource, target_date: str, logger) -> Optional[str]:
+    """
+    Find the textual weather description for a date, stopping as soon as it is found.
+
+    Args:
+        source: Country XML file path or raw bytes
+        target_date: Target date in YYYY-MM-DD format
+        logger: Logger instance
+
+    Returns:
+        Weather description string in Hebrew, or None if not found
+    """
+    try:
+        for _, _, time_unit in iter_time_units(source):
+            if time_unit.findtext('Date') != target_date:
+                continue
+            description = read_element_values(time_unit).get('Weather in Hebrew')
+            if description:
+                logger.info(f"Found weather description for {target_date}")
+                return description.strip()
+
+    except ET.ParseError as e:
+        logger.error(f"XML parsing error (country): {e}")
+        return None
+    except FileNotFoundError:
+        logger.error(f"XML file not found: {source}")
+        return None
+    except Exception as e:
+        logger.error(f"Error extracting weather description: {e}")
+        return None
+
+    logger.warning(f"No weather description found for {target_date} in country XML")
+    return None
+
+
+# ============================================================================
+# PARSED FORECAST CACHE
+# ============================================================================
+
+def read_source_bytes(source: XmlSource, logger) -> Optional[bytes]:
+    """Return the raw (uncompressed) bytes of a file path or bytes source (None if unreadable)."""
+    if isinstance(source, bytes):
+        return source
+    try:
+        if is_blob(source):
+            content = read_blob(source)
+        else:
+            content = Path(source).read_bytes()
+        count('extract.bytes_read', len(content))
+        return content
+    except FileNotFoundError:
+        logger.error(f"XML file not found: {source}")
+        return None
+    except (OSError, EOFError) as e:
+        logger.error(f"Could not read XML file {source}: {e}")
+        return None
+
+
+def feed_cache_key(content: bytes, kind: str, digest: Optional[str] = None) -> str:
+    """Parsed-forecast cache key of XML bytes, from their digest if it is already known."""
+    if digest is not None:
+        return digest_cache_key(digest, kind, EXTRACTOR_VERSION)
+    return forecast_cache_key(content, kind, EXTRACTOR_VERSION)
+
+
+def parse_cities_feed(content: bytes, name: str, logger, use_cache: bool = True,
+                      digest: Optional[str] = None) -> Optional[ParsedForecast]:
+    """
+    Extract every (date, city) forecast of a cities XML, via the parsed-forecast cache.
+
+    Args:
+        content: Cities XML bytes
+        name: Name used in log messages
+        logger: Logger instance
+        use_cache: If False, always parse (the result is still stored)
+        digest: SHA-256 of content if already known (saves hashing it again)
+
+    Returns:
+        ParsedForecast with issue_datetime and a ForecastBatch of all dates,
+        or None if the XML could not be parsed
+    """
+    key = feed_cache_key(content, 'cities', digest)
+    if use_cache:
+        parsed = load_parsed_forecast(key, logger)
+        if parsed is not None and parsed.batch is not None:
+            return parsed
+
+    with span('parse.cities', bytes=len(content)):
+        root = parse_xml_bytes(content, name, logger)
+        if root is None:
+            return None
+
+        parsed = ParsedForecast(
+            issue_datetime=get_issue_datetime(root, logger),
+            batch=get_forecast_table(root, logger).to_batch()
+        )
+    store_parsed_forecast(key, parsed, logger)
+    return parsed
+
+
+def parse_country_feed(content: bytes, logger, use_cache: bool = True,
+                       digest: Optional[str] = None) -> Optional[ParsedForecast]:
+    """
+    Extract every date's weather description of a country XML, via the parsed-forecast cache.
+
+    Args:
+        content: Country XML bytes
+        logger: Logger instance
+        use_cache: If False, always parse (the result is still stored)
+        digest: SHA-256 of content if already known (saves hashing it again)
+
+    Returns:
+        ParsedForecast with descriptions by date, or None if the XML could not be parsed
+    """
+    key = feed_cache_key(content, 'country', digest)
+    if use_cache:
+        parsed = load_parsed_forecast(key, logger)
+        if parsed is not None:
+            return parsed
+
+    descriptions = {}
+    issue_datetime = None
+    try:
+        with span('parse.country', bytes=len(content)):
+            for _, issue, time_unit in iter_time_units(content):
+                issue_datetime = issue_datetime or issue
+                date = time_unit.findtext('Date')
+                description = read_element_values(time_unit).get('Weather in Hebrew')
+                if date and description and date not in descriptions:
+                    descriptions[date] = description.strip()
+    except ET.ParseError as e:
+        logger.error(f"XML parsing error (country): {e}")
+        return None
+
+    parsed = ParsedForecast(issue_datetime=issue_datetime, descriptions=descriptions)
+    store_parsed_forecast(key, parsed, logger)
+    return parsed
+
+
+def select_cities_for_date(batch: ForecastBatch, target_date: str, logger) -> List[CityForecast]:
+    """
+    Pick the validated cities for a date from an all-dates batch, with date fallback.
+
+    Same behaviour as extract_all_cities: if target_date has no valid city,
+    the available dates are tried in order.
+
+    Args:
+        batch: ForecastBatch covering every date of a feed
+        target_date: Target date in YYYY-MM-DD format
+        logger: Logger instance
+
+    Returns:
+        List of CityForecast records
+    """
+    def valid_cities(date: str) -> List[CityForecast]:
+        cities_data = []
+        for city_data in batch.for_date(date):
             if validate_city_data(city_data, logger):
                 cities_data.append(city_data)
             else:
                 logger.warning(f"Skipping city with invalid data: {city_data.get('name_eng', 'Unknown')}")
+        return cities_data
 
+    cities_data = valid_cities(target_date)
     logger.info(f"Successfully extracted {len(cities_data)} cities")
 
-    # Smart date detection: If no cities found, try subsequent available dates
     if len(cities_data) == 0:
-        logger.warning(f"No data found for target date: {target_date}")
-        logger.info("Attempting smart date detection...")
-
-        available_dates = get_available_dates(root, logger)
-
-        if available_dates:
-            # Try each available date until we find one with data
-            for fallback_date in available_dates:
-                # Skip the target date if we already tried it
-                if fallback_date == target_date:
-                    continue
-
-                logger.info(f"Trying fallback date: {fallback_date}")
-
-                # Re-extract with fallback date
-                for location in locations:
-                    city_data = extract_city_forecast(location, fallback_date, logger)
-                    if city_data is not None:
-                        if validate_city_data(city_data, logger):
-                            cities_data.append(city_data)
-
-                # If we got cities, we're done
-                if len(cities_data) > 0:
-                    logger.info(f"✓ Successfully extracted {len(cities_data)} cities using date: {fallback_date}")
-                    logger.info(f"Note: IMS published new forecast - using {fallback_date} instead of {target_date}")
-                    break
-                else:
-                    logger.warning(f"No valid data found for {fallback_date}, trying next date...")
-
-            if len(cities_data) == 0:
-                logger.error("No valid data found in any available date")
-        else:
-            logger.error("No available dates found in XML")
+        cities_data = fall_back_to_available_dates(
+            target_date, sorted(set(batch.dates)), valid_cities, logger)
 
     return cities_data
 
 
-def sort_cities_north_to_south(cities_data: List[Dict], logger) -> List[Dict]:
+def get_forecast_dates(source: XmlSource, logger, use_cache: bool = True) -> List[str]:
+    """
+    Get all available forecast dates of a cities XML.
+
+    Small files go through the parsed-forecast cache; large ones are streamed.
+
+    Args:
+        source: File path or raw XML bytes
+        logger: Logger instance
+        use_cache: If False, bypass cache lookups
+
+    Returns:
+        List of dates in YYYY-MM-DD format, sorted chronologically
+    """
+    if get_source_size(source) >= STREAMING_THRESHOLD_BYTES:
+        return stream_forecast_dates(source, logger)
+
+    content = read_source_bytes(source, logger)
+    if content is None:
+        return []
+    parsed = parse_cities_feed(content, 'cities', logger, use_cache)
+    if parsed is None:
+        return []
+
+    sorted_dates = sorted(set(parsed.batch.dates))
+    if sorted_dates:
+        logger.info(f"Available forecast dates in XML: {', '.join(sorted_dates)}")
+    else:
+        logger.warning("No forecast dates found in XML")
+    return sorted_dates
+
+
+def extract_cities_from(source: XmlSource, name: str, target_date: str, logger,
+                        use_cache: bool = True,
+                        digest: Optional[str] = None) -> Optional[Tuple[Optional[str], List[CityForecast]]]:
+    """
+    Extract the cities for a date from one XML source.
+
+    Large sources (>= STREAMING_THRESHOLD_BYTES) are streamed; smaller ones
+    are extracted for all dates once (parsed-forecast cache) and the date
+    is picked from the resulting batch.
+
+    Args:
+        source: File path or raw XML bytes
+        name: Name used in log messages
+        target_date: Target date in YYYY-MM-DD format
+        logger: Logger instance
+        use_cache: If False, bypass cache lookups
+        digest: SHA-256 of the source bytes if already known
+
+    Returns:
+        Tuple of (issue_datetime, CityForecast list), or None if the source
+        could not be parsed
+    """
+    if get_source_size(source) >= STREAMING_THRESHOLD_BYTES:
+        logger.info(f"Streaming large XML: {name}")
+        try:
+            with span('parse.cities', streaming=True):
+                return stream_all_cities(source, target_date, logger)
+        except ET.ParseError as e:
+            logger.error(f"XML parsing error ({name}): {e}")
+            return None
+        except FileNotFoundError:
+            logger.error(f"XML file not found: {source}")
+            return None
+        except Exception as e:
+            logger.error(f"Unexpected error parsing XML ({name}): {e}")
+            return None
+
+    content = read_source_bytes(source, logger)
+    if content is None:
+        return None
+
+    parsed = parse_cities_feed(content, name, logger, use_cache, digest)
+    if parsed is None:
+        return None
+
+    logger.info(f"\nExtracting forecast data for {target_date}...")
+    with span('extract.cities'):
+        return parsed.issue_datetime, select_cities_for_date(parsed.batch, target_date, logger)
+
+
+def load_unchanged_feed(digest: str, kind: str, logger) -> Optional[ParsedForecast]:
+    """
+    Look up the parse of a feed whose SHA-256 is already known, without reading it.
+
+    Used for feeds IMS has not republished: the digest of the current file
+    is stored with its HTTP validators.
+
+    Args:
+        digest: SHA-256 hex digest of the XML file
+        kind: Feed kind ('cities' or 'country')
+        logger: Logger instance
+
+    Returns:
+        ParsedForecast, or None on a cache miss (parse the file instead)
+    """
+    parsed = load_parsed_forecast(digest_cache_key(digest, kind, EXTRACTOR_VERSION), logger)
+    if parsed is None or (kind == 'cities' and parsed.batch is None):
+        return None
+    count('extract.unchanged_feed_hits')
+    return parsed
+
+
+def select_description(parsed: ParsedForecast, target_date: str, logger) -> Optional[str]:
+    """Pick the weather description for a date from a parsed country feed."""
+    description = parsed.descriptions.get(target_date)
+    if description:
+        logger.info(f"Found weather description for {target_date}")
+    else:
+        logger.warning(f"No weather description found for {target_date} in country XML")
+    return description
+
+
+def extract_description_from(source: XmlSource, target_date: str, logger,
+                             use_cache: bool = True, digest: Optional[str] = None) -> Optional[str]:
+    """
+    Get the weather description for a date from a country XML, via the parsed-forecast cache.
+
+    Args:
+        source: Country XML file path or raw bytes
+        target_date: Target date in YYYY-MM-DD format
+        logger: Logger instance
+        use_cache: If False, bypass cache lookups
+        digest: SHA-256 of the source bytes if already known
+
+    Returns:
+        Weather description string in Hebrew, or None if not found
+    """
+    content = read_source_bytes(source, logger)
+    if content is None:
+        return None
+
+    parsed = parse_country_feed(content, logger, use_cache, digest)
+    if parsed is None:
+        return None
+    return select_description(parsed, target_date, logger)
+
+
+def sort_cities_north_to_south(cities_data: List[CityForecast], logger) -> ForecastBatch:
     """
     Sort cities by latitude (north to south = highest to lowest).
 
     Args:
-        cities_data: List of city data dictionaries
+        cities_data: CityForecast records (or a ForecastBatch)
         logger: Logger instance
 
     Returns:
-        Sorted list of city data dictionaries
+        ForecastBatch sorted north to south
     """
+    batch = cities_data if isinstance(cities_data, ForecastBatch) else ForecastBatch.from_records(cities_data)
     try:
-        sorted_cities = sorted(cities_data, key=lambda city: city['latitude'], reverse=True)
+        sorted_cities = batch.sorted_north_to_south()
         logger.info("Cities sorted north to south by latitude")
         return sorted_cities
     except Exception as e:
         logger.error(f"Error sorting cities: {e}")
-        return cities_data
+        return batch
 
 
-def extract_weather_description(country_xml_path: Path, target_date: str, logger) -> Optional[str]:
+def find_weather_description(root: ET.Element, target_date: str, logger) -> Optional[str]:
     """
-    Extract textual weather description from country XML.
+    Find the textual weather description for a date in a parsed country XML.
 
     Args:
-        country_xml_path: Path to country XML file
+        root: Country XML root element
         target_date: Target date in YYYY-MM-DD format
         logger: Logger instance
 
     Returns:
         Weather description string in Hebrew, or None if not found
     """
-    try:
-        # Parse the country XML
-        root = parse_xml_file(country_xml_path, logger)
-        if root is None:
-            return None
+    # Country XML structure: Location/LocationData/TimeUnitData with Date and PredictedConditions
+    location_data = root.find('.//LocationData')
+    if location_data is None:
+        logger.warning("LocationData not found in country XML")
+        return None
 
-        # Find the forecast for target date
-        # Country XML structure: Location/LocationData/TimeUnitData with Date and PredictedConditions
-        location_data = root.find('.//LocationData')
-        if location_data is None:
-            logger.warning("LocationData not found in country XML")
-            return None
+    # Search for the target date
+    for time_unit in location_data.findall('TimeUnitData'):
+        date_elem = time_unit.find('Date')
+        if date_elem is not None and date_elem.text == target_date:
+            # Found the right date, extract the description in Hebrew
+            # Look for Element with ElementName = "Weather in Hebrew"
+            for element in time_unit.findall('Element'):
+                elem_name = element.find('ElementName')
+                elem_value = element.find('ElementValue')
 
-        # Search for the target date
-        for time_unit in location_data.findall('TimeUnitData'):
-            date_elem = time_unit.find('Date')
-            if date_elem is not None and date_elem.text == target_date:
-                # Found the right date, extract the description in Hebrew
-                # Look for Element with ElementName = "Weather in Hebrew"
-                for element in time_unit.findall('Element'):
-                    elem_name = element.find('ElementName')
-                    elem_value = element.find('ElementValue')
-
-                    if (elem_name is not None and elem_name.text == 'Weather in Hebrew' and
-                        elem_value is not None and elem_value.text):
-                        description = elem_value.text.strip()
-                        logger.info(f"Found weather description for {target_date}")
-                        return description
+                if (elem_name is not None and elem_name.text == 'Weather in Hebrew' and
+                    elem_value is not None and elem_value.text):
+                    description = elem_value.text.strip()
+                    logger.info(f"Found weather description for {target_date}")
+                    return description
 
-        logger.warning(f"No weather description found for {target_date} in country XML")
-        return None
+    logger.warning(f"No weather description found for {target_date} in country XML")
+    return None
 
-    except Exception as e:
-        logger.error(f"Error extracting weather description: {e}")
-        return None
+
+def extract_weather_description(country_xml_path: Path, target_date: str, logger) -> Optional[str]:
+    """
+    Extract textual weather description from country XML.
+
+    Args:
+        country_xml_path: Path to country XML file
+        target_date: Target date in YYYY-MM-DD format
+        logger: Logger instance
+
+    Returns:
+        Weather description string in Hebrew, or None if not found
+    """
+    logger.info(f"Reading weather description from: {Path(country_xml_path).name}")
+    return extract_description_from(country_xml_path, target_date, logger)
 
 
 def find_latest_archive(logger) -> Optional[Path]:
     """
-    Find the most recent XML file in the archive directory.
+    Find the most recent cities XML file in the archive (via the archive index).
 
     Args:
         logger: Logger instance
@@ -367,17 +1077,18 @@ def find_latest_archive(logger) -> Optional[Path]:
     Returns:
         Path to latest archive file, or None if not found
     """
+    # Imported here: archive_index builds on this module's parsers
+    from archive_index import latest_archive
+
     try:
-        archive_files = glob.glob(str(ARCHIVE_DIR / 'isr_cities_*.xml'))
+        latest_file = latest_archive('cities', logger)
 
-        if not archive_files:
+        if latest_file is None:
             logger.warning("No archive files found")
             return None
 
-        # Sort by filename (date is in filename)
-        latest_file = max(archive_files)
-        logger.info(f"Found latest archive: {Path(latest_file).name}")
-        return Path(latest_file)
+        logger.info(f"Found latest archive: {latest_file.name}")
+        return latest_file
 
     except Exception as e:
         logger.error(f"Error finding latest archive: {e}")
@@ -386,7 +1097,7 @@ def find_latest_archive(logger) -> Optional[Path]:
 
 def find_latest_country_archive(logger) -> Optional[Path]:
     """
-    Find the most recent country XML file in the archive directory.
+    Find the most recent country XML file in the archive (via the archive index).
 
     Args:
         logger: Logger instance
@@ -394,17 +1105,17 @@ def find_latest_country_archive(logger) -> Optional[Path]:
     Returns:
         Path to latest country archive file, or None if not found
     """
+    from archive_index import latest_archive
+
     try:
-        archive_files = glob.glob(str(ARCHIVE_DIR / 'isr_country_*.xml'))
+        latest_file = latest_archive('country', logger)
 
-        if not archive_files:
+        if latest_file is None:
             logger.warning("No country archive files found")
             return None
 
-        # Sort by filename (date is in filename)
-        latest_file = max(archive_files)
-        logger.info(f"Found latest country archive: {Path(latest_file).name}")
-        return Path(latest_file)
+        logger.info(f"Found latest country archive: {latest_file.name}")
+        return latest_file
 
     except Exception as e:
         logger.error(f"Error finding latest country archive: {e}")
@@ -415,66 +1126,64 @@ def find_latest_country_archive(logger) -> Optional[Path]:
 # MAIN EXTRACTION WORKFLOW
 # ============================================================================
 
-def extract_forecast(target_date: Optional[str] = None,
-                    use_archive_fallback: bool = True,
-                    logger=None) -> Optional[Dict]:
+def extract_city_forecasts(target_date: str,
+                           use_archive_fallback: bool = True,
+                           logger=None,
+                           cities_xml: Optional[bytes] = None,
+                           use_cache: bool = True,
+                           cities_digest: Optional[str] = None) -> Optional[ForecastBatch]:
     """
-    Complete extraction workflow: parse XML, extract data, sort, validate.
+    Extract, validate and sort the city forecasts for a date.
+
+    Tries the downloaded bytes, then XML_FILE, then the latest archive.
 
     Args:
-        target_date: Date to extract (default: today)
+        target_date: Date to extract (YYYY-MM-DD)
         use_archive_fallback: If True, try archive if main file fails
         logger: Logger instance
+        cities_xml: Freshly downloaded cities XML bytes (UTF-8)
+        use_cache: If False, bypass the parsed-forecast cache
+        cities_digest: SHA-256 of cities_xml, computed when it was converted;
+            without cities_xml, SHA-256 of XML_FILE when IMS has not
+            republished it, whose cached parse is used without reading the file
 
     Returns:
-        Dictionary containing:
-            - 'cities': List of city data dictionaries
-            - 'description': Weather description string (Hebrew)
-            - 'date': Target date used (YYYY-MM-DD)
-            - 'hebrew_date': Formatted date with Hebrew calendar
-        Returns None if failed
+        ForecastBatch sorted north to south, or None if failed
     """
-    if logger is None:
-        logger = setup_logging()
-
-    print_separator(logger)
-    logger.info("IMS WEATHER FORECAST EXTRACTION")
-    print_separator(logger)
-
-    # Use today's date if not specified
-    if target_date is None:
-        target_date = get_today_date()
-        logger.info(f"Using today's date: {target_date}")
-    else:
-        logger.info(f"Using specified date: {target_date}")
-
-    # Try to parse the main XML file
-    logger.info(f"\nAttempting to parse: {XML_FILE.name}")
-    root = parse_xml_file(XML_FILE, logger)
+    # Use the downloaded bytes if handed over, otherwise parse the main XML file
+    result = None
+    if cities_xml is not None:
+        logger.info("\nParsing downloaded cities XML in memory")
+        result = extract_cities_from(cities_xml, 'cities', target_date, logger, use_cache, cities_digest)
+
+    if result is None and cities_xml is None and cities_digest is not None and use_cache:
+        parsed = load_unchanged_feed(cities_digest, 'cities', logger)
+        if parsed is not None:
+            logger.info(f"\n{XML_FILE.name} unchanged since last download - using its cached parse")
+            result = parsed.issue_datetime, select_cities_for_date(parsed.batch, target_date, logger)
+
+    if result is None:
+        logger.info(f"\nAttempting to parse: {XML_FILE.name}")
+        result = extract_cities_from(XML_FILE, XML_FILE.name, target_date, logger, use_cache)
 
     # Fallback to latest archive if main file fails
-    if root is None and use_archive_fallback:
+    if result is None and use_archive_fallback:
         logger.warning("Main XML file failed, trying archive fallback...")
         archive_path = find_latest_archive(logger)
 
         if archive_path is not None:
             logger.info(f"Attempting to parse archive: {archive_path.name}")
-            root = parse_xml_file(archive_path, logger)
+            result = extract_cities_from(archive_path, archive_path.name, target_date, logger, use_cache)
 
     # If we still don't have valid XML, abort
-    if root is None:
+    if result is None:
         logger.error("Failed to parse XML file (no fallback available)")
         return None
 
-    # Get issue date/time
-    issue_datetime = get_issue_datetime(root, logger)
+    issue_datetime, cities_data = result
     if issue_datetime:
         logger.info(f"Forecast issued: {issue_datetime}")
 
-    # Extract all cities
-    logger.info(f"\nExtracting forecast data for {target_date}...")
-    cities_data = extract_all_cities(root, target_date, logger)
-
     if not cities_data:
         logger.error("No cities extracted - check target date and XML content")
         return None
@@ -484,26 +1193,77 @@ def extract_forecast(target_date: Optional[str] = None,
 
     # Sort cities
     logger.info("\nSorting cities north to south...")
-    cities_data = sort_cities_north_to_south(cities_data, logger)
+    return sort_cities_north_to_south(cities_data, logger)
+
+
+def extract_forecast_description(target_date: str,
+                                 use_archive_fallback: bool = True,
+                                 logger=None,
+                                 country_xml: Optional[bytes] = None,
+                                 use_cache: bool = True,
+                                 country_digest: Optional[str] = None) -> Optional[str]:
+    """
+    Extract the weather description for a date from the country XML.
+
+    Independent of the cities extraction, so the two can run concurrently.
 
-    # Extract weather description from country XML
+    Args:
+        target_date: Date to extract (YYYY-MM-DD)
+        use_archive_fallback: If True, try archive if the country file is missing
+        logger: Logger instance
+        country_xml: Freshly downloaded country XML bytes (UTF-8)
+        use_cache: If False, bypass the parsed-forecast cache
+        country_digest: SHA-256 of country_xml, computed when it was
+            converted; without country_xml, SHA-256 of COUNTRY_XML_FILE when
+            IMS has not republished it, whose cached parse is used without
+            reading the file
+
+    Returns:
+        Weather description string in Hebrew, or None if not found
+    """
     logger.info("\nExtracting weather description from country XML...")
     country_xml_path = COUNTRY_XML_FILE
     weather_description = None
-
-    if country_xml_path.exists():
-        weather_description = extract_weather_description(country_xml_path, target_date, logger)
+    unchanged = None
+    if country_xml is None and country_digest is not None and use_cache:
+        unchanged = load_unchanged_feed(country_digest, 'country', logger)
+
+    if country_xml is not None:
+        weather_description = extract_description_from(country_xml, target_date, logger, use_cache,
+                                                       country_digest)
+    elif unchanged is not None:
+        logger.info(f"{country_xml_path.name} unchanged since last download - using its cached parse")
+        weather_description = select_description(unchanged, target_date, logger)
+    elif country_xml_path.exists():
+        weather_description = extract_description_from(country_xml_path, target_date, logger, use_cache)
     elif use_archive_fallback:
         logger.warning("Country XML file not found, trying archive fallback...")
         archive_country_path = find_latest_country_archive(logger)
         if archive_country_path:
-            weather_description = extract_weather_description(archive_country_path, target_date, logger)
+            weather_description = extract_description_from(archive_country_path, target_date, logger, use_cache)
 
     if weather_description:
         logger.info(f"Weather description: {weather_description[:50]}..." if len(weather_description) > 50 else f"Weather description: {weather_description}")
     else:
         logger.warning("No weather description found (will continue without it)")
 
+    return weather_description
+
+
+def build_forecast_data(target_date: str, cities_data: ForecastBatch,
+                        weather_description: Optional[str], logger) -> Dict:
+    """
+    Assemble the forecast dictionary and log the extraction summary.
+
+    Args:
+        target_date: Target date (YYYY-MM-DD)
+        cities_data: Output of extract_city_forecasts()
+        weather_description: Output of extract_forecast_description()
+        logger: Logger instance
+
+    Returns:
+        Dictionary with 'cities', 'description', 'date', 'hebrew_date'
+    """
     # Format Hebrew date
     hebrew_date = format_hebrew_date(target_date)
     logger.info(f"Hebrew date: {hebrew_date}")
@@ -515,6 +1275,11 @@ def extract_forecast(target_date: Optional[str] = None,
     logger.info(f"Target date: {target_date}")
     logger.info(f"Hebrew date: {hebrew_date}")
     logger.info(f"Cities extracted: {len(cities_data)}")
+    temperature_range = cities_data.temperature_range()
+    if temperature_range:
+        extremes = cities_data.extremes()
+        logger.info(f"Temperature range: {format_temperature_range(*temperature_range)} "
+                    f"(coldest: {extremes['coldest']}, hottest: {extremes['hottest']})")
     logger.info(f"Weather description: {'Found' if weather_description else 'Not found'}")
     logger.info(f"Sorted: North to South")
     logger.info("Note: If smart date detection was used, actual date may differ from target")
@@ -539,6 +1304,58 @@ def extract_forecast(target_date: Optional[str] = None,
     }
 
 
+def extract_forecast(target_date: Optional[str] = None,
+                    use_archive_fallback: bool = True,
+                    logger=None,
+                    cities_xml: Optional[bytes] = None,
+                    country_xml: Optional[bytes] = None,
+                    use_cache: bool = True) -> Optional[Dict]:
+    """
+    Complete extraction workflow: parse XML, extract data, sort, validate.
+
+    Args:
+        target_date: Date to extract (default: today)
+        use_archive_fallback: If True, try archive if main file fails
+        logger: Logger instance
+        cities_xml: Freshly downloaded cities XML bytes; parsed in memory
+            instead of reading XML_FILE
+        country_xml: Freshly downloaded country XML bytes; parsed in memory
+            instead of reading COUNTRY_XML_FILE
+        use_cache: If False, re-parse even when the parsed-forecast cache
+            holds the same XML bytes
+
+    Returns:
+        Dictionary containing:
+            - 'cities': ForecastBatch of CityForecast records, north to south
+            - 'description': Weather description string (Hebrew)
+            - 'date': Target date used (YYYY-MM-DD)
+            - 'hebrew_date': Formatted date with Hebrew calendar
+        Returns None if failed
+    """
+    if logger is None:
+        logger = setup_logging()
+
+    print_separator(logger)
+    logger.info("IMS WEATHER FORECAST EXTRACTION")
+    print_separator(logger)
+
+    # Use today's date if not specified
+    if target_date is None:
+        target_date = get_today_date()
+        logger.info(f"Using today's date: {target_date}")
+    else:
+        logger.info(f"Using specified date: {target_date}")
+
+    cities_data = extract_city_forecasts(target_date, use_archive_fallback, logger, cities_xml, use_cache)
+    if cities_data is None:
+        return None
+
+    weather_description = extract_forecast_description(target_date, use_archive_fallback, logger,
+                                                       country_xml, use_cache)
+
+    return build_forecast_data(target_date, cities_data, weather_description, logger)
+
+
 # ============================================================================
 # COMMAND-LINE INTERFACE
 # ============================================================================
@@ -546,6 +1363,7 @@ def extract_forecast(target_date: Optional[str] = None,
 def main():
     """Main entry point for the script."""
     import argparse
+    from profiling import add_profile_arguments, profiling_from_args
 
     parser = argparse.ArgumentParser(
         description='Extract weather forecast data from IMS XML'
@@ -560,11 +1378,17 @@ def main():
         action='store_true',
         help="Don't use archive fallback if main XML fails"
     )
+    parser.add_argument(
+        '--no-cache',
+        action='store_true',
+        help="Re-parse XML even if the parsed-forecast cache has it"
+    )
     parser.add_argument(
         '--verbose',
         action='store_true',
         help='Enable verbose logging'
     )
+    add_profile_arguments(parser)
 
     args = parser.parse_args()
 
@@ -574,11 +1398,13 @@ def main():
     logger = setup_logging(log_level)
 
     # Run extraction
-    forecast_data = extract_forecast(
-        target_date=args.date,
-        use_archive_fallback=not args.no_fallback,
-        logger=logger
-    )
+    with profiling_from_args(args, logger), span('extract'):
+        forecast_data = extract_forecast(
+            target_date=args.date,
+            use_archive_fallback=not args.no_fallback,
+            logger=logger,
+            use_cache=not args.no_cache
+        )
 
     # Exit with appropriate code
     sys.exit(0 if forecast_data is not None else 1)
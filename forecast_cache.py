@@ -0,0 +1,222 @@
+"""
+IMS Weather Forecast Automation - Parsed Forecast Cache
+
+Content-addressed cache of fully extracted XML feeds. An entry is keyed by
+the SHA-256 of the XML in its UTF-8 form (as the current files and the
+archive hold it) plus the feed kind and the extractor version, so the same
+feed - fresh download, current file or archive copy - is parsed once and
+afterwards costs a single cache-file read. Downloads are converted to UTF-8
+(and hashed) once by download_forecast, which hands the digest over with
+the bytes. Bumping
+EXTRACTOR_VERSION in extract_forecast.py invalidates every entry.
+
+Entry format (little-endian):
+    MAGIC | uint32 header length | JSON header (strings, issue time,
+    descriptions) | float64 lat/lon columns | int16 numeric columns
+"""
+
+import hashlib
+import json
+import logging
+import struct
+from typing import Dict, Optional
+
+import numpy as np
+
+from disk_cache import DiskCache, make_cache_key
+from forecast_records import ForecastBatch
+from utils import CACHE_DIR
+
+
+# ============================================================================
+# CONFIGURATION
+# ============================================================================
+
+FORECAST_CACHE_DIR = CACHE_DIR / "forecasts"
+FORECAST_CACHE_MAX_BYTES = 64 * 1024 * 1024  # Thousands of daily feeds
+
+FORECAST_CACHE_MAGIC = b'IMSF\x01'
+
+forecast_cache = DiskCache(FORECAST_CACHE_DIR, FORECAST_CACHE_MAX_BYTES, suffix='.fc')
+
+# ForecastBatch columns by storage type
+STRING_COLUMNS = ('names_eng', 'names_heb', 'dates', 'winds')
+FLOAT_COLUMNS = ('latitude', 'longitude')
+INT_COLUMNS = ('max_temp', 'min_temp', 'weather_code', 'max_humidity', 'min_humidity')
+
+
+class ParsedForecast:
+    """Everything extracted from one XML feed."""
+
+    __slots__ = ('issue_datetime', 'batch', 'descriptions')
+
+    def __init__(self, issue_datetime: Optional[str] = None,
+                 batch: Optional[ForecastBatch] = None,
+                 descriptions: Optional[Dict[str, str]] = None):
+        """
+        Args:
+            issue_datetime: IssueDateTime of the feed
+            batch: All (date, city) forecasts of a cities feed
+            descriptions: Date -> Hebrew weather description of a country feed
+        """
+        self.issue_datetime = issue_datetime
+        self.batch = batch
+        self.descriptions = descriptions or {}
+
+
+# ============================================================================
+# SERIALIZATION
+# ============================================================================
+
+def encode_parsed_forecast(parsed: ParsedForecast) -> bytes:
+    """
+    Serialize a ParsedForecast to the compact cache format.
+
+    Args:
+        parsed: ParsedForecast to encode
+
+    Returns:
+        Encoded bytes
+    """
+    batch = parsed.batch
+    header = {
+        'issue_datetime': parsed.issue_datetime,
+        'descriptions': parsed.descriptions,
+        'rows': len(batch) if batch is not None else None,
+    }
+    if batch is not None:
+        header['strings'] = {name: list(getattr(batch, name)) for name in STRING_COLUMNS}
+
+    header_bytes = json.dumps(header, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+    parts = [FORECAST_CACHE_MAGIC, struct.pack('<I', len(header_bytes)), header_bytes]
+
+    if batch is not None:
+        for name in FLOAT_COLUMNS:
+            parts.append(np.ascontiguousarray(getattr(batch, name), dtype='<f8').tobytes())
+        for name in INT_COLUMNS:
+            parts.append(np.ascontiguousarray(getattr(batch, name), dtype='<i2').tobytes())
+
+    return b''.join(parts)
+
+
+def decode_parsed_forecast(data: bytes) -> ParsedForecast:
+    """
+    Deserialize the compact cache format.
+
+    Args:
+        data: Bytes produced by encode_parsed_forecast
+
+    Returns:
+        ParsedForecast
+
+    Raises:
+        ValueError: If the data is not a valid entry
+    """
+    if not data.startswith(FORECAST_CACHE_MAGIC):
+        raise ValueError("not a parsed-forecast cache entry")
+
+    offset = len(FORECAST_CACHE_MAGIC)
+    (header_length,) = struct.unpack_from('<I', data, offset)
+    offset += 4
+    header = json.loads(data[offset:offset + header_length].decode('utf-8'))
+    offset += header_length
+
+    batch = None
+    rows = header.get('rows')
+    if rows is not None:
+        columns = {}
+        for name in FLOAT_COLUMNS:
+            columns[name] = np.frombuffer(data, dtype='<f8', count=rows, offset=offset).astype(np.float64)
+            offset += rows * 8
+        for name in INT_COLUMNS:
+            columns[name] = np.frombuffer(data, dtype='<i2', count=rows, offset=offset).astype(np.int16)
+            offset += rows * 2
+        if offset != len(data):
+            raise ValueError("truncated or oversized parsed-forecast cache entry")
+        columns.update(header['strings'])
+        batch = ForecastBatch(**columns)
+
+    return ParsedForecast(header.get('issue_datetime'), batch, header.get('descriptions'))
+
+
+# ============================================================================
+# CACHE FUNCTIONS
+# ============================================================================
+
+def forecast_cache_key(content: bytes, kind: str, extractor_version: int) -> str:
+    """
+    Build the cache key for a feed's XML bytes.
+
+    Args:
+        content: UTF-8 XML bytes
+        kind: Feed kind ('cities' or 'country')
+        extractor_version: Extractor version; entries of other versions never match
+
+    Returns:
+        Hex cache key
+    """
+    return digest_cache_key(hashlib.sha256(content).hexdigest(), kind, extractor_version)
+
+
+def digest_cache_key(digest: str, kind: str, extractor_version: int) -> str:
+    """
+    Build the cache key from an already known SHA-256 of the XML bytes.
+
+    Lets a caller that knows the digest of the XML (a fresh download,
+    hashed when it was converted, or a feed IMS has not republished, whose
+    digest is stored with its HTTP validators) look up the parse without
+    hashing or reading it again.
+
+    Args:
+        digest: SHA-256 hex digest of the XML bytes
+        kind: Feed kind ('cities' or 'country')
+        extractor_version: Extractor version; entries of other versions never match
+
+    Returns:
+        Hex cache key
+    """
+    return make_cache_key('parsed-forecast', kind, extractor_version, digest)
+
+
+def load_parsed_forecast(key: str, logger: Optional[logging.Logger] = None) -> Optional[ParsedForecast]:
+    """
+    Read a parsed forecast from the cache.
+
+    Args:
+        key: Cache key from forecast_cache_key()
+        logger: Optional logger
+
+    Returns:
+        ParsedForecast, or None on a miss or unreadable entry
+    """
+    path = forecast_cache.get(key)
+    if path is None:
+        return None
+
+    try:
+        parsed = decode_parsed_forecast(path.read_bytes())
+    except (OSError, ValueError, KeyError, TypeError) as e:
+        if logger:
+            logger.warning(f"Ignoring unreadable parsed-forecast cache entry {key[:12]}: {e}")
+        return None
+
+    if logger:
+        logger.info(f"Parsed-forecast cache hit: {key[:12]}")
+    return parsed
+
+
+def store_parsed_forecast(key: str, parsed: ParsedForecast,
+                          logger: Optional[logging.Logger] = None) -> None:
+    """
+    Store a parsed forecast in the cache (best effort).
+
+    Args:
+        key: Cache key from forecast_cache_key()
+        parsed: ParsedForecast to store
+        logger: Optional logger
+    """
+    try:
+        forecast_cache.put(key, encode_parsed_forecast(parsed), logger=logger)
+    except OSError as e:
+        if logger:
+            logger.warning(f"Could not store parsed forecast in cache: {e}")
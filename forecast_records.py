@@ -0,0 +1,331 @@
+"""
+IMS Weather Forecast Automation - Forecast Records
+
+Compact, typed containers for extracted city forecasts:
+
+- CityForecast: one city on one date, with __slots__ and parsed numeric
+  fields (int temperatures / humidity / weather code, float lat/lon).
+  Supports dict-style access (city['min_temp'], city.get('wind')) so code
+  written against the old per-city dicts keeps working.
+- ForecastBatch: many cities (and dates) stored column-wise in NumPy arrays,
+  with vectorized min/max and sorting. Behaves as a sequence of
+  CityForecast, so it can be passed wherever a list of cities was expected.
+
+Produced by extract_forecast and consumed by the image generators.
+"""
+
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+
+# ============================================================================
+# FIELD PARSING
+# ============================================================================
+
+def parse_int(value) -> Optional[int]:
+    """
+    Parse an IMS numeric field to int.
+
+    Args:
+        value: String (e.g. "25", "-3", "25.0"), number or None
+
+    Returns:
+        Integer value, or None if missing or not numeric
+    """
+    if value is None:
+        return None
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        pass
+    try:
+        return int(round(float(value)))
+    except (TypeError, ValueError):
+        return None
+
+
+def parse_float(value) -> Optional[float]:
+    """Parse an IMS numeric field to float (None if missing or not numeric)."""
+    if value is None:
+        return None
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+# ============================================================================
+# CITY FORECAST
+# ============================================================================
+
+class CityForecast:
+    """Forecast for one city on one date."""
+
+    __slots__ = ('name_eng', 'name_heb', 'latitude', 'longitude',
+                 'max_temp', 'min_temp', 'weather_code',
+                 'max_humidity', 'min_humidity', 'wind', 'date')
+
+    # Field order of the legacy city dictionary
+    FIELDS = ('name_eng', 'name_heb', 'latitude', 'longitude',
+              'max_temp', 'min_temp', 'weather_code',
+              'max_humidity', 'min_humidity', 'wind')
+
+    def __init__(self, name_eng: str, name_heb: str,
+                 latitude: Optional[float], longitude: Optional[float],
+                 max_temp: Optional[int] = None, min_temp: Optional[int] = None,
+                 weather_code: Optional[int] = None,
+                 max_humidity: Optional[int] = None, min_humidity: Optional[int] = None,
+                 wind: Optional[str] = None, date: Optional[str] = None):
+        """
+        Args:
+            name_eng: English city name (IMS LocationNameEng)
+            name_heb: Hebrew city name
+            latitude: Display latitude
+            longitude: Display longitude
+            max_temp: Maximum temperature (°C)
+            min_temp: Minimum temperature (°C)
+            weather_code: IMS weather code
+            max_humidity: Maximum relative humidity (%)
+            min_humidity: Minimum relative humidity (%)
+            wind: Wind direction and speed, as published
+            date: Forecast date (YYYY-MM-DD)
+        """
+        self.name_eng = name_eng
+        self.name_heb = name_heb
+        self.latitude = latitude
+        self.longitude = longitude
+        self.max_temp = max_temp
+        self.min_temp = min_temp
+        self.weather_code = weather_code
+        self.max_humidity = max_humidity
+        self.min_humidity = min_humidity
+        self.wind = wind
+        self.date = date
+
+    @classmethod
+    def from_values(cls, city_meta: Dict, values: Dict[str, Optional[str]],
+                    date: Optional[str] = None) -> 'CityForecast':
+        """
+        Build a record from location metadata and raw IMS element values.
+
+        Args:
+            city_meta: {'name_eng', 'name_heb', 'latitude', 'longitude'}
+            values: ElementName -> ElementValue for one date
+            date: Forecast date (YYYY-MM-DD)
+
+        Returns:
+            CityForecast with numeric fields parsed once
+        """
+        return cls(
+            city_meta['name_eng'],
+            city_meta['name_heb'],
+            parse_float(city_meta.get('latitude')),
+            parse_float(city_meta.get('longitude')),
+            max_temp=parse_int(values.get("Maximum temperature")),
+            min_temp=parse_int(values.get("Minimum temperature")),
+            weather_code=parse_int(values.get("Weather code")),
+            max_humidity=parse_int(values.get("Maximum relative humidity")),
+            min_humidity=parse_int(values.get("Minimum relative humidity")),
+            wind=values.get("Wind direction and speed"),
+            date=date,
+        )
+
+    # Dict-style access for code written against the legacy city dictionaries
+
+    def __getitem__(self, key: str):
+        if key not in self.__slots__:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __contains__(self, key) -> bool:
+        return key in self.FIELDS
+
+    def get(self, key: str, default=None):
+        """Dict-style get."""
+        if key not in self.__slots__:
+            return default
+        return getattr(self, key)
+
+    def keys(self) -> Tuple[str, ...]:
+        """Legacy dictionary keys."""
+        return self.FIELDS
+
+    def to_dict(self) -> Dict:
+        """Return the legacy city dictionary (numeric fields stay parsed)."""
+        return {field: getattr(self, field) for field in self.FIELDS}
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, CityForecast):
+            return NotImplemented
+        return all(getattr(self, f) == getattr(other, f) for f in self.__slots__)
+
+    def __repr__(self) -> str:
+        return (f"CityForecast({self.name_eng!r}, {self.date or '-'}, "
+                f"{self.min_temp}-{self.max_temp}°C, code={self.weather_code})")
+
+
+# ============================================================================
+# FORECAST BATCH
+# ============================================================================
+
+# Stand-in for missing integer fields in the int16 columns
+MISSING = np.iinfo(np.int16).min
+
+
+def _int_column(values: Iterable[Optional[int]]) -> np.ndarray:
+    return np.fromiter((MISSING if v is None else v for v in values), dtype=np.int16)
+
+
+def _float_column(values: Iterable[Optional[float]]) -> np.ndarray:
+    return np.fromiter((np.nan if v is None else v for v in values), dtype=np.float64)
+
+
+class ForecastBatch:
+    """
+    Column-wise store of many CityForecast records (any mix of cities and dates).
+
+    Numeric fields live in NumPy arrays (int16 temperatures / humidity /
+    codes, float64 coordinates); names, wind and dates in tuples. Indexing
+    or iterating yields CityForecast records, built on demand.
+    """
+
+    __slots__ = ('names_eng', 'names_heb', 'dates', 'winds',
+                 'latitude', 'longitude', 'max_temp', 'min_temp',
+                 'weather_code', 'max_humidity', 'min_humidity')
+
+    def __init__(self, names_eng, names_heb, dates, winds,
+                 latitude, longitude, max_temp, min_temp,
+                 weather_code, max_humidity, min_humidity):
+        self.names_eng = tuple(names_eng)
+        self.names_heb = tuple(names_heb)
+        self.dates = tuple(dates)
+        self.winds = tuple(winds)
+        self.latitude = latitude
+        self.longitude = longitude
+        self.max_temp = max_temp
+        self.min_temp = min_temp
+        self.weather_code = weather_code
+        self.max_humidity = max_humidity
+        self.min_humidity = min_humidity
+
+    @classmethod
+    def from_records(cls, records: Iterable[CityForecast]) -> 'ForecastBatch':
+        """
+        Pack CityForecast records into columns.
+
+        Args:
+            records: CityForecast records
+
+        Returns:
+            ForecastBatch
+        """
+        records = list(records)
+        return cls(
+            [r.name_eng for r in records],
+            [r.name_heb for r in records],
+            [r.date for r in records],
+            [r.wind for r in records],
+            _float_column(r.latitude for r in records),
+            _float_column(r.longitude for r in records),
+            _int_column(r.max_temp for r in records),
+            _int_column(r.min_temp for r in records),
+            _int_column(r.weather_code for r in records),
+            _int_column(r.max_humidity for r in records),
+            _int_column(r.min_humidity for r in records),
+        )
+
+    # Sequence protocol
+
+    def __len__(self) -> int:
+        return len(self.names_eng)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return self.take(np.arange(len(self))[index])
+        return self.record(index)
+
+    def __iter__(self) -> Iterator[CityForecast]:
+        for i in range(len(self)):
+            yield self.record(i)
+
+    def record(self, i: int) -> CityForecast:
+        """Materialize row i as a CityForecast."""
+        def as_int(column):
+            value = int(column[i])
+            return None if value == MISSING else value
+
+        def as_float(column):
+            value = float(column[i])
+            return None if np.isnan(value) else value
+
+        return CityForecast(
+            self.names_eng[i], self.names_heb[i],
+            as_float(self.latitude), as_float(self.longitude),
+            max_temp=as_int(self.max_temp), min_temp=as_int(self.min_temp),
+            weather_code=as_int(self.weather_code),
+            max_humidity=as_int(self.max_humidity), min_humidity=as_int(self.min_humidity),
+            wind=self.winds[i], date=self.dates[i],
+        )
+
+    def to_records(self) -> List[CityForecast]:
+        """Materialize every row."""
+        return list(self)
+
+    # Vectorized operations
+
+    def take(self, indices) -> 'ForecastBatch':
+        """Return a new batch with the rows at indices (in that order)."""
+        indices = np.asarray(indices, dtype=np.intp)
+        pick = lambda seq: [seq[i] for i in indices]  # noqa: E731
+        return ForecastBatch(
+            pick(self.names_eng), pick(self.names_heb), pick(self.dates), pick(self.winds),
+            self.latitude[indices], self.longitude[indices],
+            self.max_temp[indices], self.min_temp[indices],
+            self.weather_code[indices],
+            self.max_humidity[indices], self.min_humidity[indices],
+        )
+
+    def for_date(self, date: str) -> 'ForecastBatch':
+        """Return the rows for one forecast date."""
+        mask = np.fromiter((d == date for d in self.dates), dtype=bool, count=len(self))
+        return self.take(np.flatnonzero(mask))
+
+    def sorted_north_to_south(self) -> 'ForecastBatch':
+        """Return the batch sorted by latitude, highest first (stable)."""
+        order = np.argsort(-self.latitude, kind='stable')
+        return self.take(order)
+
+    def temperature_range(self) -> Optional[Tuple[int, int]]:
+        """
+        Return (lowest minimum, highest maximum) temperature across the batch.
+
+        Returns:
+            Tuple of ints, or None if no temperatures are present
+        """
+        lows = self.min_temp[self.min_temp != MISSING]
+        highs = self.max_temp[self.max_temp != MISSING]
+        if lows.size == 0 or highs.size == 0:
+            return None
+        return int(lows.min()), int(highs.max())
+
+    def extremes(self) -> Dict[str, Optional[str]]:
+        """
+        Return the coldest and hottest city by name.
+
+        Returns:
+            {'coldest': name_eng, 'hottest': name_eng} (None if no data)
+        """
+        lows = np.where(self.min_temp == MISSING, np.iinfo(np.int16).max, self.min_temp)
+        highs = self.max_temp  # MISSING is the int16 minimum, never the max
+        if len(self) == 0:
+            return {'coldest': None, 'hottest': None}
+        coldest = int(np.argmin(lows))
+        hottest = int(np.argmax(highs))
+        return {
+            'coldest': self.names_eng[coldest] if lows[coldest] != np.iinfo(np.int16).max else None,
+            'hottest': self.names_eng[hottest] if highs[hottest] != MISSING else None,
+        }
+
+    def __repr__(self) -> str:
+        return f"ForecastBatch({len(self)} forecasts, {len(set(self.dates))} date(s))"
@@ -4,24 +4,35 @@ IMS Weather Forecast Automation - Main Workflow
 Main orchestration script that coordinates the complete daily workflow:
 1. Download XML from IMS website
 2. Extract forecast data
-3. Generate Instagram story image (Phase 2 - future)
-4. Send email to social media manager (Phase 4 - future)
+3. Generate Instagram story image (V2 map layout)
+4. Send email to social media manager
 
 This script is designed to run automatically every morning at 6:00 AM.
+With --from/--to it instead re-renders a range of dates from the archive
+(see backfill.py).
 """
 
 import sys
 from pathlib import Path
 from datetime import datetime, timedelta
-from typing import Optional, List, Dict
+from typing import TYPE_CHECKING, Optional, Dict, List
 import random
-import xml.etree.ElementTree as ET
-import glob
 
-from utils import setup_logging, get_today_date, print_separator, XML_FILE, ARCHIVE_DIR
-from download_forecast import download_and_convert
-from extract_forecast import extract_forecast, get_available_dates, parse_xml_file
-from generate_forecast_image import generate_all_cities_image
+from utils import setup_logging, get_today_date, print_separator, XML_FILE
+from lazy_import import lazy_import
+
+# The pipeline modules pull in requests, numpy, PIL, ElementTree and more;
+# they load on first use so --help and backfill-only runs start fast
+archive_index = lazy_import('archive_index')
+backfill = lazy_import('backfill')
+download_forecast = lazy_import('download_forecast')
+extract_forecast = lazy_import('extract_forecast')
+generate_forecast_map = lazy_import('generate_forecast_map')
+instrumentation = lazy_import('instrumentation')
+output_profiles = lazy_import('output_profiles')
+stage_graph = lazy_import('stage_graph')
+if TYPE_CHECKING:
+    from forecast_records import ForecastBatch
 # Note: send_email_smtp is imported conditionally in step_send_email() to avoid
 # requiring email dependencies in dry-run mode
 
@@ -44,7 +55,7 @@ CURRENT_PHASE = 4
 
 def get_next_dry_run_filename(output_dir: Path) -> Path:
     """
-    Get the next sequential filename for dry-run images (test_000.jpg, test_001.jpg, etc.).
+    Get the next sequential filename for dry-run images (test_000.png, test_001.png, etc.).
 
     Args:
         output_dir: Directory to save dry-run images
@@ -57,7 +68,7 @@ def get_next_dry_run_filename(output_dir: Path) -> Path:
     dry_run_dir.mkdir(parents=True, exist_ok=True)
 
     # Find highest existing test number
-    existing_files = list(dry_run_dir.glob("test_*.jpg"))
+    existing_files = list(dry_run_dir.glob("test_*.png"))
     if not existing_files:
         next_number = 0
     else:
@@ -65,7 +76,7 @@ def get_next_dry_run_filename(output_dir: Path) -> Path:
         numbers = []
         for file in existing_files:
             try:
-                # Extract number from "test_XXX.jpg"
+                # Extract number from "test_XXX.png"
                 num_str = file.stem.split('_')[1]
                 numbers.append(int(num_str))
             except (IndexError, ValueError):
@@ -74,7 +85,7 @@ def get_next_dry_run_filename(output_dir: Path) -> Path:
         next_number = max(numbers) + 1 if numbers else 0
 
     # Format with 3 digits (000, 001, 002, etc.)
-    filename = dry_run_dir / f"test_{next_number:03d}.jpg"
+    filename = dry_run_dir / f"test_{next_number:03d}.png"
     return filename
 
 
@@ -93,39 +104,18 @@ def get_random_date_from_xml(logger) -> Optional[str]:
 
     if xml_path.exists():
         logger.info(f"Reading dates from main XML: {xml_path.name}")
-        root = parse_xml_file(xml_path, logger)
-        if root is not None:
-            available_dates = get_available_dates(root, logger)
-            if available_dates:
-                selected_date = random.choice(available_dates)
-                logger.info(f"Randomly selected date: {selected_date}")
-                return selected_date
+        available_dates = extract_forecast.get_forecast_dates(xml_path, logger)
+        if available_dates:
+            selected_date = random.choice(available_dates)
+            logger.info(f"Randomly selected date: {selected_date}")
+            return selected_date
 
     # Fallback to archive if main file not available
-    logger.info("Main XML not found, checking archive...")
-    archive_dir = Path(__file__).parent / ARCHIVE_DIR
-
-    if not archive_dir.exists():
-        logger.warning("Archive directory does not exist")
-        return None
-
-    # Get all archive files
-    archive_files = sorted(glob.glob(str(archive_dir / "isr_cities_*.xml")), reverse=True)
-
-    if not archive_files:
-        logger.warning("No archive XML files found")
-        return None
-
-    # Try each archive file until we find dates
-    for archive_path in archive_files:
-        logger.info(f"Reading dates from archive: {Path(archive_path).name}")
-        root = parse_xml_file(Path(archive_path), logger)
-        if root is not None:
-            available_dates = get_available_dates(root, logger)
-            if available_dates:
-                selected_date = random.choice(available_dates)
-                logger.info(f"Randomly selected date: {selected_date}")
-                return selected_date
+    logger.info("Main XML not found, checking archive index...")
+    selected_date = archive_index.random_archive_date(logger)
+    if selected_date:
+        logger.info(f"Randomly selected date: {selected_date}")
+        return selected_date
 
     logger.warning("No dates found in any XML files")
     return None
@@ -165,75 +155,147 @@ def resolve_gradient_test_date(gradient_test: str, logger) -> Optional[str]:
 # WORKFLOW STEPS
 # ============================================================================
 
-def step_download(logger, dry_run: bool = False) -> bool:
+def step_download(logger, dry_run: bool = False) -> Dict[str, Dict]:
     """
-    Step 1: Download and convert XML from IMS.
+    Step 1: Download XML from IMS.
+
+    Current and archive files are written in the background; the downloaded
+    bytes are returned so extraction doesn't wait for them.
 
     Args:
         logger: Logger instance
         dry_run: If True, simulate without saving
 
     Returns:
-        True if successful, False otherwise
+        Feed name to {'status', 'content', 'digest'}. Status is 'downloaded',
+        'unchanged' or 'failed'; the extraction steps key the parsed-forecast
+        cache with the digest (see feed_digest)
     """
     logger.info("\n" + "=" * 60)
     logger.info("STEP 1: DOWNLOAD XML")
     logger.info("=" * 60)
 
-    success = download_and_convert(logger, dry_run=dry_run)
+    feed_results = download_forecast.download_feeds(logger, dry_run=dry_run, background=True)
 
-    if success:
-        logger.info("Download step completed successfully")
-    else:
+    if all(result['status'] == download_forecast.FEED_FAILED for result in feed_results.values()):
         logger.error("Download step failed")
+    else:
+        logger.info("Download step completed successfully")
+        unchanged = [name for name, result in feed_results.items() if result['status'] == download_forecast.FEED_UNCHANGED]
+        if unchanged:
+            logger.info(f"Unchanged since last run: {', '.join(unchanged)}")
+
+    return feed_results
+
 
-    return success
+def feed_digest(feed_results: Optional[Dict[str, Dict]], name: str) -> Optional[str]:
+    """
+    SHA-256 of a feed's UTF-8 XML as computed by the download, else None.
+
+    For a downloaded feed it is the digest of the bytes handed over, for
+    one IMS has not republished the digest of its current XML file.
+    """
+    feed = (feed_results or {}).get(name)
+    if not feed or feed['status'] == download_forecast.FEED_FAILED:
+        return None
+    return feed.get('digest')
 
 
-def step_extract(logger, target_date: Optional[str] = None) -> Optional[List[Dict]]:
+def step_extract_cities(logger, target_date: str,
+                        feed_results: Optional[Dict[str, Dict]] = None) -> Optional["ForecastBatch"]:
     """
-    Step 2: Extract forecast data from XML.
+    Step 2a: Extract city forecasts from the cities XML.
 
     Args:
         logger: Logger instance
-        target_date: Target date (default: today)
+        target_date: Target date (YYYY-MM-DD)
+        feed_results: Output of step_download(); a downloaded feed is parsed
+            from memory, an unchanged one taken from the parsed-forecast
+            cache, otherwise the XML file on disk is parsed
 
     Returns:
-        List of city data dictionaries, or None if failed
+        ForecastBatch sorted north to south, or None if failed
     """
     logger.info("\n" + "=" * 60)
-    logger.info("STEP 2: EXTRACT FORECAST DATA")
+    logger.info("STEP 2a: EXTRACT CITY FORECASTS")
     logger.info("=" * 60)
 
-    cities_data = extract_forecast(
-        target_date=target_date,
+    cities_data = extract_forecast.extract_city_forecasts(
+        target_date,
         use_archive_fallback=True,
-        logger=logger
+        logger=logger,
+        cities_xml=(feed_results or {}).get('cities', {}).get('content'),
+        cities_digest=feed_digest(feed_results, 'cities')
     )
 
-    if cities_data:
-        logger.info("Extraction step completed successfully")
+    if cities_data is not None:
+        logger.info(f"City extraction completed successfully ({len(cities_data)} cities)")
     else:
-        logger.error("Extraction step failed")
+        logger.error("City extraction failed")
 
     return cities_data
 
 
-def step_generate_image(cities_data: List[Dict], forecast_date: str, logger, dry_run: bool = False) -> tuple[bool, Optional[Path]]:
+def step_extract_description(logger, target_date: str,
+                             feed_results: Optional[Dict[str, Dict]] = None) -> Optional[str]:
+    """
+    Step 2b: Extract the weather description from the country XML.
+
+    Runs alongside step 2a; a missing description doesn't fail the workflow.
+
+    Args:
+        logger: Logger instance
+        target_date: Target date (YYYY-MM-DD)
+        feed_results: Output of step_download()
+
+    Returns:
+        Hebrew weather description, or None if not found
+    """
+    logger.info("\n" + "=" * 60)
+    logger.info("STEP 2b: EXTRACT WEATHER DESCRIPTION")
+    logger.info("=" * 60)
+
+    return extract_forecast.extract_forecast_description(
+        target_date,
+        use_archive_fallback=True,
+        logger=logger,
+        country_xml=(feed_results or {}).get('country', {}).get('content'),
+        country_digest=feed_digest(feed_results, 'country')
+    )
+
+
+def step_load_base_layer(logger):
+    """
+    Load (or build) the static image base layer before the data is ready.
+
+    Returns:
+        Base layer image, or None if it failed (the image step then loads it itself)
+    """
+    try:
+        return generate_forecast_map.load_base_layer(logger)
+    except Exception as e:
+        logger.warning(f"Could not preload base layer: {e}")
+        return None
+
+
+def step_generate_image(forecast_data: Dict, logger, dry_run: bool = False,
+                        base_layer=None, profiles: Optional[List[str]] = None) -> tuple[bool, Optional[Path]]:
     """
-    Step 3: Generate Instagram story image (Phase 3 - All 15 Cities).
+    Step 3: Generate Instagram story image (V2 map layout, all 15 cities).
 
     Args:
-        cities_data: List of city data dictionaries
-        forecast_date: Forecast date in YYYY-MM-DD format
+        forecast_data: Forecast dictionary (see extract_forecast.build_forecast_data)
         logger: Logger instance
         dry_run: If True, save to dry-run subfolder with sequential naming
+        base_layer: Preloaded base layer (step_load_base_layer), if available
+        profiles: Output profiles to write (default: all, see output_profiles.py)
 
     Returns:
-        Tuple of (success: bool, output_path: Path or None)
+        Tuple of (success: bool, output_path: Path or None) - the path of the
+        primary (story) image; other profiles are written next to it
     """
     logger.info("\n" + "=" * 60)
-    logger.info("STEP 3: GENERATE IMAGE (Phase 3 - All 15 Cities)")
+    logger.info("STEP 3: GENERATE IMAGE (V2 Map - All 15 Cities)")
     logger.info("=" * 60)
 
     try:
@@ -248,12 +310,15 @@ def step_generate_image(cities_data: List[Dict], forecast_date: str, logger, dry
             logger.info(f"Output path: {output_path}")
         else:
             # Production mode: save to standard location
-            output_path = output_dir / "daily_forecast.jpg"
-            logger.info(f"Generating forecast image for {len(cities_data)} cities")
+            output_path = output_dir / "daily_forecast.png"
+            logger.info(f"Generating forecast image for {len(forecast_data['cities'])} cities")
             logger.info(f"Output path: {output_path}")
 
         # Generate image
-        success = generate_all_cities_image(cities_data, forecast_date, output_path)
+        if profiles is None:
+            profiles = list(generate_forecast_map.OUTPUT_PROFILES)
+        success = generate_forecast_map.generate_forecast_map(forecast_data, output_path, logger,
+                                                              base_layer=base_layer, profiles=profiles)
 
         if success:
             logger.info("Image generation completed successfully!")
@@ -271,7 +336,36 @@ def step_generate_image(cities_data: List[Dict], forecast_date: str, logger, dry
         return False, None
 
 
-def step_send_email(image_path: str, forecast_date: str, logger, dry_run: bool = False) -> bool:
+def step_prepare_email(logger):
+    """
+    Step 4a: Validate email settings, read recipients and log in to SMTP.
+
+    Runs while the forecast is still being downloaded and rendered.
+
+    Args:
+        logger: Logger instance
+
+    Returns:
+        send_email_smtp.EmailSession
+
+    Raises:
+        stage_graph.StageFailed: If the email can't be prepared (details are logged)
+    """
+    logger.info("\n" + "=" * 60)
+    logger.info("STEP 4a: PREPARE EMAIL (settings, recipients, SMTP login)")
+    logger.info("=" * 60)
+
+    # Imported here so dry runs never need the email dependencies
+    from send_email_smtp import prepare_email
+
+    session = prepare_email()
+    if session is None:
+        raise stage_graph.StageFailed("email preparation failed - check environment variables and configuration")
+    return session
+
+
+def step_send_email(image_path: str, forecast_date: str, logger, dry_run: bool = False,
+                    session=None) -> bool:
     """
     Step 4: Send email to social media manager (Phase 4).
 
@@ -283,6 +377,8 @@ def step_send_email(image_path: str, forecast_date: str, logger, dry_run: bool =
         forecast_date: Forecast date in YYYY-MM-DD format (for logging only - email calculates internally)
         logger: Logger instance (for workflow logging - email has its own logger)
         dry_run: If True, skip email sending entirely (no import needed)
+        session: EmailSession from step_prepare_email(); sends over its
+            already logged-in connection
 
     Returns:
         True if successful, False otherwise
@@ -300,14 +396,16 @@ def step_send_email(image_path: str, forecast_date: str, logger, dry_run: bool =
     try:
         # Import send_email only when actually needed (not in dry-run)
         # This avoids requiring email dependencies when just testing gradients
-        from send_email_smtp import send_email
+        from send_email_smtp import deliver_email, send_email
 
-        # Note: send_email() uses its own logger and calculates forecast_date internally
-        # We only pass image_path and dry_run flag
-        success = send_email(
-            image_path=image_path,
-            dry_run=False  # Already handled above
-        )
+        # Note: the email module uses its own logger and calculates forecast_date internally
+        if session is not None:
+            success = deliver_email(session, image_path=image_path)
+        else:
+            success = send_email(
+                image_path=image_path,
+                dry_run=False  # Already handled above
+            )
 
         if success:
             logger.info("✓ Email delivery completed successfully!")
@@ -329,14 +427,20 @@ def step_send_email(image_path: str, forecast_date: str, logger, dry_run: bool =
 # MAIN WORKFLOW
 # ============================================================================
 
-def run_workflow(dry_run: bool = False, target_date: Optional[str] = None, gradient_test: Optional[str] = None) -> bool:
+def run_workflow(dry_run: bool = False, target_date: Optional[str] = None, gradient_test: Optional[str] = None,
+                 trace_memory: bool = False, profiles: Optional[List[str]] = None) -> bool:
     """
     Execute the complete daily forecast workflow.
 
+    Writes run_report.json (per-stage and per-span timings, memory and
+    counters) next to the output image.
+
     Args:
         dry_run: If True, simulate without making changes
         target_date: Target date for extraction (default: today)
         gradient_test: Gradient test mode ('today', 'tomorrow', or 'random') - overrides target_date
+        trace_memory: If True, record tracemalloc peaks per span in the run report
+        profiles: Output profiles to render (default: all, see output_profiles.py)
 
     Returns:
         True if successful, False if any step failed
@@ -370,61 +474,98 @@ def run_workflow(dry_run: bool = False, target_date: Optional[str] = None, gradi
     if dry_run:
         logger.info("DRY RUN MODE: Images will be generated, email will be skipped")
 
-    # Track overall success
-    workflow_success = True
+    report = instrumentation.start_run_report(trace_memory=trace_memory)
 
     # ========================================================================
-    # STEP 1: DOWNLOAD XML
+    # STAGE GRAPH
     # ========================================================================
+    # download ──┬─▶ cities ──────┐
+    #            └─▶ description ─┼─▶ image ─▶ email
+    # base_layer ─────────────────┘             ▲
+    # email_session ────────────────────────────┘  (production only)
+
+    send_emails = CURRENT_PHASE >= 4 and not dry_run
+    graph = stage_graph.StageGraph(logger)
 
     # Note: Always download XML even in dry-run mode (extraction needs the file)
     # Dry-run only affects image generation and email sending
-    if not step_download(logger, dry_run=False):
-        logger.error("Workflow aborted: Download failed")
-        logger.info("Note: Extraction will attempt to use existing/archived XML")
-        # Don't abort yet - extraction might work with existing data
-
-    # ========================================================================
-    # STEP 2: EXTRACT FORECAST DATA
-    # ========================================================================
-
-    cities_data = step_extract(logger, target_date=target_date)
-
-    if cities_data is None:
-        logger.error("Workflow failed: Extraction failed")
-        workflow_success = False
-    else:
-        logger.info(f"Successfully extracted data for {len(cities_data)} cities")
-
-        # ====================================================================
-        # STEP 3: GENERATE IMAGE (Phase 3 - All 15 Cities)
-        # ====================================================================
-
-        generated_image_path = None
-        if CURRENT_PHASE >= 2:
-            image_success, generated_image_path = step_generate_image(cities_data, target_date, logger, dry_run=dry_run)
+    graph.add('download', lambda: step_download(logger, dry_run=False))
+
+    if CURRENT_PHASE >= 2:
+        graph.add('base_layer', lambda: step_load_base_layer(logger))
+
+    if send_emails:
+        graph.add('email_session', lambda: step_prepare_email(logger))
+
+    def extract_cities(download):
+        if all(result['status'] == download_forecast.FEED_FAILED for result in download.values()):
+            logger.error("Download failed - extraction will attempt to use existing/archived XML")
+        cities_data = step_extract_cities(logger, target_date, download)
+        if cities_data is None:
+            raise stage_graph.StageFailed("extraction failed")
+        return cities_data
+
+    graph.add('cities', extract_cities, deps=['download'])
+    graph.add('description', lambda download: step_extract_description(logger, target_date, download),
+              deps=['download'])
+
+    if CURRENT_PHASE >= 2:
+        def generate_image(cities, description, base_layer):
+            forecast_data = extract_forecast.build_forecast_data(target_date, cities, description, logger)
+            image_success, image_path = step_generate_image(forecast_data, logger, dry_run=dry_run,
+                                                            base_layer=base_layer, profiles=profiles)
             if not image_success:
                 logger.error("Image generation failed")
-                workflow_success = False
-        else:
-            logger.info("\nSkipping image generation (Phase 2/3 - not yet implemented)")
+            return image_path
 
-        # ====================================================================
-        # STEP 4: SEND EMAIL (Phase 4)
-        # ====================================================================
+        graph.add('image', generate_image, deps=['cities', 'description', 'base_layer'])
+    else:
+        logger.info("\nSkipping image generation (Phase 2/3 - not yet implemented)")
 
-        if CURRENT_PHASE >= 4:
+    if CURRENT_PHASE >= 4:
+        def send_forecast_email(image, email_session=None):
             # Use generated image path if available, otherwise fall back to default
-            if generated_image_path:
-                email_image_path = generated_image_path
-            else:
-                email_image_path = Path(__file__).parent / "output" / "daily_forecast.jpg"
-
-            if not step_send_email(str(email_image_path), target_date, logger, dry_run=dry_run):
-                logger.error("Email delivery failed")
-                workflow_success = False
-        else:
-            logger.info("\nSkipping email delivery (Phase 4 - not yet implemented)")
+            email_image_path = image or Path(__file__).parent / "output" / "daily_forecast.png"
+            # Attach the size-budgeted encode of the same render if it was written
+            if image and (profiles is None or 'email' in profiles):
+                email_image_path = output_profiles.profile_output_path(Path(image), 'email')
+            if not step_send_email(str(email_image_path), target_date, logger, dry_run=dry_run,
+                                   session=email_session):
+                delivery = email_session.delivery if email_session is not None else None
+                if delivery:
+                    raise stage_graph.StageFailed(
+                        f"email not delivered to every recipient: {delivery['sent']} of {delivery['total']} sent, "
+                        f"{delivery['refused']} refused, {delivery['failed']} failed, "
+                        f"{delivery['deferred']} deferred")
+                raise stage_graph.StageFailed("email delivery failed")
+            return True
+
+        email_deps = ['image'] + (['email_session'] if send_emails else [])
+        graph.add('email', send_forecast_email, deps=email_deps)
+    else:
+        logger.info("\nSkipping email delivery (Phase 4 - not yet implemented)")
+
+    workflow_success = graph.run()
+
+    if graph.stages['cities'].status != stage_graph.STAGE_OK:
+        logger.error("Workflow failed: Extraction failed")
+    if 'image' in graph.stages and graph.result('image') is None:
+        workflow_success = False
+    email_stage = graph.stages.get('email')
+    if email_stage is not None and email_stage.status == stage_graph.STAGE_FAILED:
+        logger.error("Email delivery failed")
+    elif email_stage is not None and email_stage.status == stage_graph.STAGE_SKIPPED:
+        logger.warning(f"Email delivery skipped: {email_stage.error}")
+
+    # Close the SMTP session if the email stage never used it
+    session = graph.result('email_session')
+    if session is not None and session.server is not None:
+        from send_email_smtp import close_email_session
+        close_email_session(session)
+
+    # Current/archive XML files were written in the background
+    if not download_forecast.wait_for_background_writes(logger):
+        logger.warning("Some XML files could not be saved - next run will download them again")
 
     # ========================================================================
     # WORKFLOW SUMMARY
@@ -441,6 +582,7 @@ def run_workflow(dry_run: bool = False, target_date: Optional[str] = None, gradi
     logger.info(f"End time:   {end_time.strftime('%Y-%m-%d %H:%M:%S')}")
     logger.info(f"Duration:   {duration:.1f} seconds")
     logger.info(f"Target date: {target_date}")
+    graph.log_summary()
 
     if workflow_success:
         logger.info("Status:     SUCCESS")
@@ -452,11 +594,46 @@ def run_workflow(dry_run: bool = False, target_date: Optional[str] = None, gradi
     if dry_run:
         logger.info("\n[DRY RUN] Images generated to output/dry-run/ folder, email skipped")
 
+    # Machine-readable timings for regression tracking, next to the image
+    instrumentation.stop_run_report()
+    image_path = graph.result('image')
+    report_dir = Path(image_path).parent if image_path else Path(__file__).parent / "output"
+    instrumentation.write_run_report(report, report_dir / instrumentation.RUN_REPORT_FILENAME, logger, extra={
+        'target_date': target_date,
+        'dry_run': dry_run,
+        'phase': CURRENT_PHASE,
+        'success': workflow_success,
+        'image': str(image_path) if image_path else None,
+        # True only if every output profile came from the render cache
+        'image_reused': report.counters.get('render.reused', 0) > 0 and not report.counters.get('render.encoded'),
+        'stage_graph': graph.summary(),
+    })
+
     print_separator(logger, "=", 60)
 
     return workflow_success
 
 
+def run_backfill_workflow(from_date: str, to_date: Optional[str] = None,
+                          workers: Optional[int] = None) -> bool:
+    """
+    Re-render every date in a range from the archive (no download, no email).
+
+    Args:
+        from_date: First date (YYYY-MM-DD)
+        to_date: Last date (YYYY-MM-DD), inclusive (default: today)
+        workers: Worker processes (default: one per CPU core)
+
+    Returns:
+        True if every planned date rendered, False otherwise
+    """
+    logger = setup_logging()
+    manifest = backfill.run_backfill(from_date, to_date or get_today_date(), logger, workers=workers)
+    if manifest is None:
+        return False
+    return manifest['rendered'] > 0 and manifest['failed'] == 0
+
+
 # ============================================================================
 # COMMAND-LINE INTERFACE
 # ============================================================================
@@ -464,6 +641,7 @@ def run_workflow(dry_run: bool = False, target_date: Optional[str] = None, gradi
 def main():
     """Main entry point for the script."""
     import argparse
+    from profiling import add_profile_arguments, profiling_from_args
 
     parser = argparse.ArgumentParser(
         description='IMS Weather Forecast Automation - Main Workflow',
@@ -488,6 +666,12 @@ Examples:
   # Test gradients with random date from available data
   python forecast_workflow.py --gradient-test random
 
+  # Re-render a month of stories from the archive on all cores
+  python forecast_workflow.py --from 2025-11-01 --to 2025-11-30
+
+  # Profile the image and cities stages (output/profiles/<timestamp>/)
+  python forecast_workflow.py --dry-run --profile image,cities --profile-alloc
+
   # Verbose output
   python forecast_workflow.py --verbose
 
@@ -512,24 +696,74 @@ every morning at 6:00 AM.
         choices=['today', 'tomorrow', 'random'],
         help='Gradient test mode: "today", "tomorrow", or "random" (picks random date from available data). Overrides --date.'
     )
+    parser.add_argument(
+        '--from',
+        dest='from_date',
+        type=str,
+        metavar='DATE',
+        help='Backfill mode: re-render every date from DATE (YYYY-MM-DD) using archived XML'
+    )
+    parser.add_argument(
+        '--to',
+        dest='to_date',
+        type=str,
+        metavar='DATE',
+        help='Backfill mode: last date to render, inclusive (default: today)'
+    )
+    parser.add_argument(
+        '--workers',
+        type=int,
+        help='Backfill mode: worker processes (default: one per CPU core)'
+    )
+    parser.add_argument(
+        '--trace-memory',
+        action='store_true',
+        help='Record per-span tracemalloc peaks in run_report.json (slower)'
+    )
+    parser.add_argument(
+        '--outputs',
+        type=str,
+        default='all',
+        metavar='PROFILES',
+        help=f'Output profiles to write: comma-separated names from output_profiles.py '
+             f'({", ".join(output_profiles.OUTPUT_PROFILES)}) or "all" '
+             f'(default: all; {output_profiles.PRIMARY_PROFILE} is always written)'
+    )
     parser.add_argument(
         '--verbose',
         action='store_true',
         help='Enable verbose logging'
     )
+    add_profile_arguments(parser)
 
     args = parser.parse_args()
 
+    if args.to_date and not args.from_date:
+        parser.error('--to requires --from')
+
+    from output_profiles import parse_profile_list
+    try:
+        profiles = parse_profile_list(args.outputs)
+    except ValueError as e:
+        parser.error(str(e))
+
+    if args.from_date:
+        success = run_backfill_workflow(args.from_date, args.to_date, args.workers)
+        sys.exit(0 if success else 1)
+
     # Note: Verbose flag is handled by individual modules
     if args.verbose:
         print("Note: Verbose logging should be configured in utils.py setup_logging()")
 
     # Run workflow
-    success = run_workflow(
-        dry_run=args.dry_run,
-        target_date=args.date,
-        gradient_test=args.gradient_test
-    )
+    with profiling_from_args(args, setup_logging()):
+        success = run_workflow(
+            dry_run=args.dry_run,
+            target_date=args.date,
+            gradient_test=args.gradient_test,
+            trace_memory=args.trace_memory,
+            profiles=profiles
+        )
 
     # Exit with appropriate code
     sys.exit(0 if success else 1)
@@ -13,29 +13,40 @@ Version: 2.0
 """
 
 import argparse
+import math
 from pathlib import Path
-from typing import Dict, List, Tuple
-from PIL import Image, ImageFont
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+import numpy as np
+from PIL import Image, __version__ as PILLOW_VERSION
 
 from utils import (
     setup_logging,
     OUTPUT_DIR,
+    CACHE_DIR,
     ISRAEL_MAP_PNG,
     IMS_LOGO_PNG,
     MOT_LOGO_PNG,
     NOTO_SANS_HEBREW_FONT,
+    OPEN_SANS_FONT,
+    SYSTEM_FALLBACK_FONT,
     WEATHER_ICONS_V2_DIR,
     ensure_directories
 )
 from city_coordinates import CITY_POSITIONS
-from weather_icon_mapping import get_weather_icon_path
-
-# Try to import bidi for RTL text rendering
-try:
-    from bidi.algorithm import get_display
-    BIDI_AVAILABLE = True
-except ImportError:
-    BIDI_AVAILABLE = False
+from disk_cache import DiskCache, make_cache_key, file_digest
+from gradient_cache import get_gradient, map_rgba_buffer
+from weather_icon_mapping import WEATHER_CODE_TO_ICON_V2, get_weather_icon_path
+from forecast_records import CityForecast
+from icon_atlas import DEFAULT_ICON_FILENAME, get_atlas_filenames
+from instrumentation import count, span
+from output_profiles import (
+    OUTPUT_PROFILES,
+    PRIMARY_PROFILE,
+    encode_profiles,
+    parse_profile_list,
+    profile_output_path
+)
+from text_cache import FontKey, has_raqm, missing_glyphs, resolve_font_file
 
 
 # ============================================================================
@@ -74,41 +85,44 @@ MAP_HEIGHT = 1495  # Target height from Figma
 LOGOS_X = 633
 LOGOS_Y = 1709
 
+# Static base layer (gradient + map + logos) cache
+# Bump BASE_LAYER_VERSION whenever the static render stages change how they draw
+BASE_LAYER_VERSION = 1
+BASE_LAYER_CACHE_DIR = CACHE_DIR / "base_layers"
+BASE_LAYER_CACHE_MAX_BYTES = 128 * 1024 * 1024
+BASE_LAYER_ASSETS = [ISRAEL_MAP_PNG, IMS_LOGO_PNG, MOT_LOGO_PNG]
+
+base_layer_cache = DiskCache(BASE_LAYER_CACHE_DIR, BASE_LAYER_CACHE_MAX_BYTES, suffix='.rgba')
+
+# Finished image cache: one entry per output profile, keyed by the render
+# fingerprint (see get_render_fingerprint) and the profile settings.
+# Bump RENDER_VERSION whenever the dynamic stages (header, cities, description,
+# encoding) change how they draw
+RENDER_VERSION = 4
+RENDER_CACHE_DIR = CACHE_DIR / "renders"
+RENDER_CACHE_MAX_BYTES = 256 * 1024 * 1024  # Roughly a year of daily images
+RENDER_CITY_FIELDS = ('name_eng', 'name_heb', 'max_temp', 'min_temp', 'weather_code')
+
+render_cache = DiskCache(RENDER_CACHE_DIR, RENDER_CACHE_MAX_BYTES, suffix='.img')
+
 
 # ============================================================================
 # PHASE 1: CANVAS & GRADIENT BACKGROUND
 # ============================================================================
 
-def create_css_linear_gradient(width: int, height: int,
-                                angle: float,
-                                color_stops: List[Tuple[Tuple[int, int, int], float]]) -> Image.Image:
+def get_gradient_geometry(width: int, height: int, angle: float) -> Tuple[float, float, float, float, float]:
     """
-    Create a CSS-style linear gradient with arbitrary angle and color stops.
-
-    Supports CSS-like syntax:
-    - angle: degrees (0 = top, 90 = right, 180 = bottom, 270 = left)
-    - color_stops: [(color_rgb, position_percent), ...] where position can be negative or >100%
-
-    Example:
-        create_css_linear_gradient(1080, 1920, 346, [
-            ((220, 255, 87), -62.6),   # #DCFF57 at -62.6%
-            ((34, 178, 255), 112.14)    # #22B2FF at 112.14%
-        ])
+    Compute the CSS gradient line for a canvas.
 
     Args:
         width: Canvas width in pixels
         height: Canvas height in pixels
         angle: Gradient angle in degrees (CSS convention: 0deg = to top)
-        color_stops: List of (RGB_tuple, position_percent) tuples
 
     Returns:
-        PIL Image with gradient background
+        Tuple of (dx, dy, cx, cy, max_dist) - direction vector, canvas center
+        and half-length of the gradient line
     """
-    import math
-
-    # Sort color stops by position
-    sorted_stops = sorted(color_stops, key=lambda x: x[1])
-
     # Convert CSS angle to radians
     # CSS: 0deg = to top (↑), 90deg = to right (→)
     # We need to convert to standard math angles and adjust
@@ -131,10 +145,87 @@ def create_css_linear_gradient(width: int, height: int,
         for x, y in corners
     )
 
+    return dx, dy, cx, cy, max_dist
+
+
+def create_css_linear_gradient(width: int, height: int,
+                                angle: float,
+                                color_stops: List[Tuple[Tuple[int, int, int], float]]) -> Image.Image:
+    """
+    Create a CSS-style linear gradient with arbitrary angle and color stops.
+
+    Supports CSS-like syntax:
+    - angle: degrees (0 = top, 90 = right, 180 = bottom, 270 = left)
+    - color_stops: [(color_rgb, position_percent), ...] where position can be negative or >100%
+
+    The whole pixel grid is projected onto the gradient line as NumPy arrays
+    and all color stops are interpolated in one batched pass. Output is
+    pixel-identical to create_css_linear_gradient_reference().
+
+    Example:
+        create_css_linear_gradient(1080, 1920, 346, [
+            ((220, 255, 87), -62.6),   # #DCFF57 at -62.6%
+            ((34, 178, 255), 112.14)    # #22B2FF at 112.14%
+        ])
+
+    Args:
+        width: Canvas width in pixels
+        height: Canvas height in pixels
+        angle: Gradient angle in degrees (CSS convention: 0deg = to top)
+        color_stops: List of (RGB_tuple, position_percent) tuples
+
+    Returns:
+        PIL Image with gradient background
+    """
+    # Sort color stops by position
+    sorted_stops = sorted(color_stops, key=lambda x: x[1])
+
+    dx, dy, cx, cy, max_dist = get_gradient_geometry(width, height, angle)
+
     # Gradient line goes from -max_dist to +max_dist through center
     # Position 0% corresponds to -max_dist, 100% corresponds to +max_dist
     gradient_length = 2 * max_dist
 
+    # Project every pixel onto the gradient line (same operation order as the
+    # per-pixel reference so float results match bit for bit)
+    xs = np.arange(width, dtype=np.float64) - cx
+    ys = np.arange(height, dtype=np.float64) - cy
+    projection = xs[np.newaxis, :] * dx + ys[:, np.newaxis] * dy
+
+    # Convert to percentage (-max_dist = 0%, +max_dist = 100%)
+    if gradient_length > 0:
+        positions = ((projection + max_dist) / gradient_length) * 100
+    else:
+        positions = np.full((height, width), 50.0)  # Fallback
+
+    pixels = interpolate_color_stops_batch(sorted_stops, positions)
+    return Image.fromarray(pixels, 'RGB')
+
+
+def create_css_linear_gradient_reference(width: int, height: int,
+                                          angle: float,
+                                          color_stops: List[Tuple[Tuple[int, int, int], float]]) -> Image.Image:
+    """
+    Per-pixel reference implementation of create_css_linear_gradient().
+
+    Kept as the source of truth for the Figma look; used by
+    verify_gradient_parity() to check the vectorized engine.
+
+    Args:
+        width: Canvas width in pixels
+        height: Canvas height in pixels
+        angle: Gradient angle in degrees (CSS convention: 0deg = to top)
+        color_stops: List of (RGB_tuple, position_percent) tuples
+
+    Returns:
+        PIL Image with gradient background
+    """
+    # Sort color stops by position
+    sorted_stops = sorted(color_stops, key=lambda x: x[1])
+
+    dx, dy, cx, cy, max_dist = get_gradient_geometry(width, height, angle)
+    gradient_length = 2 * max_dist
+
     # Create image and calculate color for each pixel
     gradient = Image.new('RGB', (width, height))
     pixels = gradient.load()
@@ -200,12 +291,84 @@ def interpolate_color_stops(sorted_stops: List[Tuple[Tuple[int, int, int], float
     return sorted_stops[-1][0]
 
 
-def initialize_canvas(logger) -> Image.Image:
+def interpolate_color_stops_batch(sorted_stops: List[Tuple[Tuple[int, int, int], float]],
+                                  positions: np.ndarray) -> np.ndarray:
+    """
+    Vectorized interpolate_color_stops() for an array of positions.
+
+    Args:
+        sorted_stops: List of (RGB_tuple, position_percent) sorted by position
+        positions: Array of position percentages (any shape)
+
+    Returns:
+        uint8 array of shape positions.shape + (3,) with RGB colors
+    """
+    stop_colors = np.array([color for color, _ in sorted_stops], dtype=np.float64)
+    stop_positions = np.array([pos for _, pos in sorted_stops], dtype=np.float64)
+
+    # Segment i spans stops i and i+1; pick the first segment whose end is at
+    # or beyond the position (matches the linear scan in the scalar version)
+    segment = np.searchsorted(stop_positions[1:], positions, side='left')
+    segment = np.clip(segment, 0, max(len(sorted_stops) - 2, 0))
+    next_segment = np.minimum(segment + 1, len(sorted_stops) - 1)
+
+    start_pos = stop_positions[segment]
+    end_pos = stop_positions[next_segment]
+    span = end_pos - start_pos
+    with np.errstate(divide='ignore', invalid='ignore'):
+        factor = np.where(span == 0, 0.0, (positions - start_pos) / span)
+
+    start_color = stop_colors[segment]
+    end_color = stop_colors[next_segment]
+    factor = factor[..., np.newaxis]
+    colors = (start_color * (1 - factor) + end_color * factor).astype(np.uint8)
+
+    # Before first stop / after last stop - clamp to the end colors
+    colors[positions <= stop_positions[0]] = sorted_stops[0][0]
+    colors[positions >= stop_positions[-1]] = sorted_stops[-1][0]
+
+    return colors
+
+
+def verify_gradient_parity(width: int, height: int, angle: float,
+                           color_stops: List[Tuple[Tuple[int, int, int], float]],
+                           logger) -> bool:
+    """
+    Check that the vectorized gradient matches the per-pixel reference.
+
+    Args:
+        width: Canvas width in pixels
+        height: Canvas height in pixels
+        angle: Gradient angle in degrees
+        color_stops: List of (RGB_tuple, position_percent) tuples
+        logger: Logger instance
+
+    Returns:
+        True if every pixel is identical, False otherwise
+    """
+    fast = np.asarray(create_css_linear_gradient(width, height, angle, color_stops))
+    reference = np.asarray(create_css_linear_gradient_reference(width, height, angle, color_stops))
+
+    mismatched = int(np.any(fast != reference, axis=-1).sum())
+    if mismatched:
+        logger.error(f"Gradient parity FAILED ({width}x{height}, {angle}deg): "
+                     f"{mismatched} pixel(s) differ")
+        return False
+
+    logger.info(f"Gradient parity OK ({width}x{height}, {angle}deg, {len(color_stops)} stops)")
+    return True
+
+
+def initialize_canvas(logger, use_cache: bool = True) -> Image.Image:
     """
     Initialize the canvas with CSS-style gradient background.
 
+    The rendered gradient is cached on disk (see gradient_cache.py), so warm
+    runs memory-map the background instead of recomputing it.
+
     Args:
         logger: Logger instance
+        use_cache: If False, always render the gradient from scratch
 
     Returns:
         PIL Image with gradient background (RGBA mode)
@@ -214,12 +377,20 @@ def initialize_canvas(logger) -> Image.Image:
 
     # Create CSS-style gradient background
     logger.info(f"Creating gradient: {GRADIENT_ANGLE}deg with {len(GRADIENT_STOPS)} color stops")
-    canvas = create_css_linear_gradient(
-        CANVAS_WIDTH,
-        CANVAS_HEIGHT,
-        GRADIENT_ANGLE,
-        GRADIENT_STOPS
-    )
+
+    def render() -> Image.Image:
+        return create_css_linear_gradient(
+            CANVAS_WIDTH,
+            CANVAS_HEIGHT,
+            GRADIENT_ANGLE,
+            GRADIENT_STOPS
+        )
+
+    if use_cache:
+        canvas = get_gradient(CANVAS_WIDTH, CANVAS_HEIGHT, GRADIENT_ANGLE, GRADIENT_STOPS,
+                              'css-linear', render, logger)
+    else:
+        canvas = render()
 
     # Convert to RGBA to support transparency overlays
     canvas = canvas.convert('RGBA')
@@ -228,6 +399,23 @@ def initialize_canvas(logger) -> Image.Image:
     return canvas
 
 
+def get_background(width: int, height: int) -> Image.Image:
+    """
+    Return the background gradient at any size (cached like the canvas gradient).
+
+    Used to letterbox output profiles whose aspect ratio differs from the story.
+
+    Args:
+        width: Width in pixels
+        height: Height in pixels
+
+    Returns:
+        RGBA PIL Image
+    """
+    return get_gradient(width, height, GRADIENT_ANGLE, GRADIENT_STOPS, 'css-linear',
+                        lambda: create_css_linear_gradient(width, height, GRADIENT_ANGLE, GRADIENT_STOPS))
+
+
 # ============================================================================
 # PHASE 2: MAP OVERLAY
 # ============================================================================
@@ -271,12 +459,65 @@ def render_map_overlay(canvas: Image.Image, logger) -> None:
         logger.error(f"Error rendering map overlay: {e}", exc_info=True)
 
 
+# Text fonts in order of preference
+TEXT_FONTS = [str(NOTO_SANS_HEBREW_FONT), str(OPEN_SANS_FONT), SYSTEM_FALLBACK_FONT]
+
+_unloadable_fonts: Set[str] = set()
+_font_warnings: Set[str] = set()
+
+
+def warn_once(message: str, logger) -> None:
+    """Log a font warning the first time it occurs in this process."""
+    if message not in _font_warnings:
+        _font_warnings.add(message)
+        logger.warning(message)
+
+
+def get_text_font_key(style: Tuple[int, int, int], text: str, logger) -> FontKey:
+    """
+    Pick the font for a string: the first of TEXT_FONTS that loads and has a
+    glyph for every character, so text never renders with blank gaps.
+
+    Falling back from the primary font is logged (once per reason).
+
+    Args:
+        style: (size, weight, width)
+        text: Text that will be drawn with the font
+        logger: Logger instance
+
+    Returns:
+        (font file, size, weight, width) for text_cache
+
+    Raises:
+        RuntimeError: If no font in TEXT_FONTS covers the text
+    """
+    for font_path in TEXT_FONTS:
+        if font_path in _unloadable_fonts:
+            continue
+        font_key = (font_path, *style)
+        try:
+            missing = missing_glyphs(font_key, text)
+        except OSError as e:
+            _unloadable_fonts.add(font_path)
+            warn_once(f"Font {Path(font_path).name} could not be loaded ({e}) - trying the next font", logger)
+            continue
+        if missing:
+            warn_once(f"Font {Path(font_path).name} has no glyphs for {missing!r} - trying the next font",
+                      logger)
+            continue
+        if font_path != TEXT_FONTS[0]:
+            warn_once(f"Rendering text with fallback font {Path(font_path).name}", logger)
+        return font_key
+
+    raise RuntimeError(f"No font in TEXT_FONTS has glyphs for every character of {text!r}")
+
+
 def render_header(canvas: Image.Image, hebrew_date: str, logger) -> None:
     """Phase 3: Render header with Hebrew date and separator line."""
     pass
 
 
-def render_cities(canvas: Image.Image, cities: List[Dict], logger) -> None:
+def render_cities(canvas: Image.Image, cities: Iterable[CityForecast], logger) -> None:
     """Phase 4: Render all cities with icons and temperature data."""
     pass
 
@@ -291,18 +532,250 @@ def render_logos(canvas: Image.Image, logger) -> None:
     pass
 
 
+# ============================================================================
+# STATIC BASE LAYER
+# ============================================================================
+
+def get_base_layer_key() -> str:
+    """
+    Build the cache key for the static base layer.
+
+    Covers every input of the static stages: canvas size, gradient,
+    layout constants, the content of each asset file and BASE_LAYER_VERSION.
+    Changing any of them produces a new key, so stale layers are never reused.
+
+    Returns:
+        Hex cache key
+    """
+    layout = {
+        'canvas': [CANVAS_WIDTH, CANVAS_HEIGHT],
+        'gradient': [GRADIENT_ANGLE, [[list(color), position] for color, position in GRADIENT_STOPS]],
+        'map': [MAP_X, MAP_Y, MAP_WIDTH, MAP_HEIGHT],
+        'logos': [LOGOS_X, LOGOS_Y],
+    }
+    assets = {path.name: file_digest(path) for path in BASE_LAYER_ASSETS}
+    return make_cache_key('base-layer', BASE_LAYER_VERSION, layout, assets)
+
+
+def build_base_layer(logger, use_cache: bool = True) -> Image.Image:
+    """
+    Render the static layer shared by every daily image.
+
+    Runs Phase 1 (gradient), Phase 2 (map) and Phase 6 (logos) - the stages
+    that don't depend on forecast data.
+
+    Args:
+        logger: Logger instance
+        use_cache: If False, render the gradient from scratch too
+
+    Returns:
+        RGBA PIL Image with gradient, map and logos
+    """
+    with span('render.gradient'):
+        canvas = initialize_canvas(logger, use_cache=use_cache)
+    with span('render.map'):
+        render_map_overlay(canvas, logger)
+    with span('render.logos'):
+        render_logos(canvas, logger)
+    return canvas
+
+
+def load_base_layer(logger, use_cache: bool = True) -> Image.Image:
+    """
+    Return the static base layer, building and caching it on a miss.
+
+    Args:
+        logger: Logger instance
+        use_cache: If False, always rebuild the layer from the assets
+
+    Returns:
+        RGBA PIL Image ready for the dynamic stages to draw on
+    """
+    if not use_cache:
+        return build_base_layer(logger, use_cache=False)
+
+    key = get_base_layer_key()
+    cached_path = base_layer_cache.get(key)
+    if cached_path is not None:
+        canvas = map_rgba_buffer(cached_path, CANVAS_WIDTH, CANVAS_HEIGHT)
+        if canvas is not None:
+            logger.info(f"Base layer cache hit: {key[:12]}")
+            return canvas
+
+    logger.info(f"Base layer cache miss: {key[:12]} - building")
+    canvas = build_base_layer(logger)
+    try:
+        base_layer_cache.put(key, canvas.tobytes(), logger=logger)
+    except OSError as e:
+        logger.warning(f"Could not store base layer in cache: {e}")
+
+    return canvas
+
+
+# ============================================================================
+# RENDERED IMAGE CACHE
+# ============================================================================
+
+def normalize_city_record(city) -> List:
+    """
+    Reduce a city record to the fields the image shows, as plain JSON values.
+
+    Args:
+        city: CityForecast or legacy city dictionary
+
+    Returns:
+        [name_eng, name_heb, max_temp, min_temp, weather_code]; numeric
+        fields as int (None if missing or not a number)
+    """
+    values = []
+    for field in RENDER_CITY_FIELDS:
+        value = city.get(field)
+        if field.startswith('name'):
+            values.append(value)
+        else:
+            try:
+                values.append(int(value))
+            except (TypeError, ValueError):
+                values.append(None)
+    return values
+
+
+def get_render_fingerprint(forecast_data: Dict) -> str:
+    """
+    Build the deterministic fingerprint of everything that goes into an image.
+
+    Covers the normalized city records (in drawing order), the description,
+    the Hebrew date string, the base layer key (canvas, gradient, map, logos),
+    every TEXT_FONTS file as loaded (fallback included) and the weather
+    icon files, the dynamic layout constants, the
+    Pillow/raqm text engine and RENDER_VERSION. Equal fingerprints produce
+    identical images, so a finished image can be reused as is.
+
+    Args:
+        forecast_data: Dictionary with 'cities', 'description', 'hebrew_date'
+
+    Returns:
+        Hex fingerprint
+    """
+    inputs = {
+        'cities': [normalize_city_record(city) for city in forecast_data['cities']],
+        'description': forecast_data.get('description') or '',
+        'hebrew_date': forecast_data['hebrew_date'],
+    }
+    layout = {
+        'icons': WEATHER_CODE_TO_ICON_V2,
+    }
+    icon_files = get_atlas_filenames(WEATHER_CODE_TO_ICON_V2, DEFAULT_ICON_FILENAME)
+    assets = {
+        'base_layer': get_base_layer_key(),
+        'fonts': get_font_digests(),
+        'icons': {filename: file_digest(WEATHER_ICONS_V2_DIR / filename) for filename in icon_files},
+    }
+    engine = [PILLOW_VERSION, has_raqm()]
+    return make_cache_key('render', RENDER_VERSION, inputs, layout, assets, engine)
+
+
+def get_font_digests() -> Dict[str, Optional[str]]:
+    """
+    Digest the file behind every font in TEXT_FONTS, fallbacks included.
+
+    A font that can't be loaded (so text falls through to the next one)
+    maps to None.
+
+    Returns:
+        Font name to SHA-256 of the loaded file, or None
+    """
+    digests = {}
+    for font_path in TEXT_FONTS:
+        font_file = resolve_font_file(font_path)
+        digests[Path(font_path).name] = file_digest(Path(font_file)) if font_file else None
+    return digests
+
+
+def get_output_cache_key(fingerprint: str, profile: str) -> str:
+    """
+    Build the render cache key of one output profile.
+
+    Args:
+        fingerprint: Key from get_render_fingerprint()
+        profile: Output profile name (its settings are part of the key)
+
+    Returns:
+        Hex cache key
+    """
+    return make_cache_key('render-output', fingerprint, profile, OUTPUT_PROFILES[profile])
+
+
+def reuse_rendered_image(key: str, output_path: Path, logger) -> bool:
+    """
+    Copy a previously encoded image with this cache key to output_path.
+
+    Args:
+        key: Key from get_output_cache_key()
+        output_path: Where the image should end up
+        logger: Logger instance
+
+    Returns:
+        True if the cached image was reused, False on a miss or copy error
+    """
+    import shutil
+
+    cached_path = render_cache.get(key)
+    if cached_path is None:
+        return False
+
+    try:
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+        shutil.copyfile(cached_path, output_path)
+    except OSError as e:
+        logger.warning(f"Could not reuse rendered image {key[:12]}: {e}")
+        return False
+
+    count('render.reused')
+    count('render.bytes_out', output_path.stat().st_size)
+    logger.info(f"Render cache hit: {key[:12]} - reusing {output_path.name}")
+    return True
+
+
+def store_rendered_image(key: str, data: bytes, logger) -> None:
+    """
+    Store a freshly encoded image in the render cache (best effort).
+
+    Args:
+        key: Key from get_output_cache_key()
+        data: Encoded image bytes
+        logger: Logger instance
+    """
+    try:
+        render_cache.put(key, data, logger=logger)
+    except OSError as e:
+        logger.warning(f"Could not store rendered image in cache: {e}")
+
+
 # ============================================================================
 # MAIN GENERATION FUNCTION
 # ============================================================================
 
-def generate_forecast_map(forecast_data: Dict, output_path: Path, logger) -> bool:
+def generate_forecast_map(forecast_data: Dict, output_path: Path, logger,
+                          use_cache: bool = True,
+                          base_layer: Optional[Image.Image] = None,
+                          profiles: Optional[List[str]] = None) -> bool:
     """
     Generate complete forecast map image from forecast data.
 
+    The composite is drawn once and encoded into each requested output
+    profile (see output_profiles.py) in parallel.
+
     Args:
         forecast_data: Dictionary with 'cities', 'description', 'date', 'hebrew_date'
-        output_path: Path where to save the output image
+        output_path: Path where to save the output image (primary profile);
+            other profiles are written next to it (see profile_output_path)
         logger: Logger instance
+        use_cache: If False, render from scratch: rebuild the static base layer
+            and skip the finished-image cache
+        base_layer: Already loaded base layer (from load_base_layer) to draw a
+            copy of; used by batch renders to skip the per-image cache lookup
+        profiles: Output profile names (default: the primary profile only)
 
     Returns:
         True if successful, False otherwise
@@ -312,28 +785,49 @@ def generate_forecast_map(forecast_data: Dict, output_path: Path, logger) -> boo
         logger.info("Starting V2 Map-Based Image Generation")
         logger.info("=" * 60)
 
-        # Phase 1: Initialize canvas with gradient
-        canvas = initialize_canvas(logger)
-
-        # Phase 2: Map overlay
-        render_map_overlay(canvas, logger)
+        outputs = {name: profile_output_path(output_path, name) for name in profiles or [PRIMARY_PROFILE]}
+
+        # Unchanged inputs (retries, manual re-runs, same feed twice): reuse the last images
+        cache_keys = {}
+        if use_cache:
+            with span('render.fingerprint') as current:
+                fingerprint = get_render_fingerprint(forecast_data)
+                if current is not None:
+                    current.attrs['fingerprint'] = fingerprint
+            logger.info(f"Render fingerprint: {fingerprint[:12]}")
+            cache_keys = {name: get_output_cache_key(fingerprint, name) for name in outputs}
+            outputs = {name: path for name, path in outputs.items()
+                       if not reuse_rendered_image(cache_keys[name], path, logger)}
+            if not outputs:
+                logger.info("All outputs reused from the render cache - render skipped")
+                return True
+
+        # Phases 1, 2 and 6: Static base layer (gradient + map + logos)
+        with span('render.base_layer'):
+            if base_layer is not None:
+                canvas = base_layer.copy()
+            else:
+                canvas = load_base_layer(logger, use_cache=use_cache)
 
+        # Dynamic layers are drawn on top of the base layer
         # Phase 3: Header (TODO)
         # render_header(canvas, forecast_data['hebrew_date'], logger)
 
         # Phase 4: Cities (TODO)
-        # render_cities(canvas, forecast_data['cities'], logger)
+        with span('render.cities', cities=len(forecast_data['cities'])):
+            render_cities(canvas, forecast_data['cities'], logger)
 
         # Phase 5: Description (TODO)
         # render_description(canvas, forecast_data['description'], logger)
 
-        # Phase 6: Logos (TODO)
-        # render_logos(canvas, logger)
-
-        # Save the image
+        # Encode every output profile from the one composite
         logger.info(f"Saving image to: {output_path}")
-        canvas.save(output_path, 'PNG', quality=95)
+        with span('render.encode', profiles=list(outputs)):
+            encoded = encode_profiles(canvas, outputs, logger, background=get_background)
         logger.info("Image saved successfully")
+        for name, (data, _) in encoded.items():
+            if name in cache_keys:
+                store_rendered_image(cache_keys[name], data, logger)
 
         logger.info("=" * 60)
         logger.info("V2 Image Generation Complete!")
@@ -352,6 +846,8 @@ def generate_forecast_map(forecast_data: Dict, output_path: Path, logger) -> boo
 
 def main():
     """Main entry point for CLI usage."""
+    from profiling import add_profile_arguments, profiling_from_args
+
     parser = argparse.ArgumentParser(
         description='Generate V2 map-based forecast image'
     )
@@ -365,12 +861,47 @@ def main():
         type=str,
         help='Output file path (default: output/forecast_map_{date}.png)'
     )
+    parser.add_argument(
+        '--verify-gradient',
+        action='store_true',
+        help='Check the vectorized gradient against the per-pixel reference and exit'
+    )
+    parser.add_argument(
+        '--no-cache',
+        action='store_true',
+        help='Render from scratch: rebuild the static base layer and skip the finished-image cache'
+    )
+    parser.add_argument(
+        '--outputs',
+        type=str,
+        metavar='PROFILES',
+        help='Extra output profiles, comma-separated (feed, thumbnail, webp) or "all" '
+             '(default: story PNG only)'
+    )
+    add_profile_arguments(parser)
 
     args = parser.parse_args()
+    try:
+        profiles = parse_profile_list(args.outputs)
+    except ValueError as e:
+        parser.error(str(e))
 
     # Setup logging
     logger = setup_logging()
 
+    if args.verify_gradient:
+        # Production gradient at full size, plus smaller edge cases
+        # (multiple stops, duplicate positions, axis-aligned angles)
+        parity_cases = [
+            (CANVAS_WIDTH, CANVAS_HEIGHT, GRADIENT_ANGLE, GRADIENT_STOPS),
+            (270, 480, 0, GRADIENT_STOPS),
+            (270, 480, 90, [((255, 0, 0), 0), ((0, 255, 0), 50), ((0, 0, 255), 100)]),
+            (270, 480, 135, [((10, 20, 30), 20), ((200, 100, 0), 50), ((0, 0, 0), 50), ((255, 255, 255), 80)]),
+            (1, 1, 180, GRADIENT_STOPS),
+        ]
+        results = [verify_gradient_parity(w, h, a, stops, logger) for w, h, a, stops in parity_cases]
+        exit(0 if all(results) else 1)
+
     # Ensure directories exist
     ensure_directories()
 
@@ -393,7 +924,9 @@ def main():
         output_path = OUTPUT_DIR / f'forecast_map_{date_str}.png'
 
     # Generate the image
-    success = generate_forecast_map(test_data, output_path, logger)
+    with profiling_from_args(args, logger), span('render'):
+        success = generate_forecast_map(test_data, output_path, logger, use_cache=not args.no_cache,
+                                        profiles=profiles)
 
     if success:
         logger.info(f"\n✓ Image generated: {output_path}")
@@ -0,0 +1,134 @@
+"""
+IMS Weather Forecast Automation - Gradient Background Cache
+
+Rendered gradient backgrounds are stored as raw RGBA buffers keyed by
+(width, height, angle, color stops, mode). A warm render memory-maps the
+cached buffer instead of recomputing the gradient. Used by the V2 map
+generator.
+"""
+
+import logging
+import mmap
+import sys
+from typing import Callable, List, Optional, Tuple
+
+from PIL import Image
+
+from disk_cache import DiskCache, make_cache_key
+from utils import CACHE_DIR
+
+
+# ============================================================================
+# CONFIGURATION
+# ============================================================================
+
+GRADIENT_CACHE_DIR = CACHE_DIR / "gradients"
+GRADIENT_CACHE_MAX_BYTES = 256 * 1024 * 1024  # ~30 full-size 1080x1920 RGBA backgrounds
+
+gradient_cache = DiskCache(GRADIENT_CACHE_DIR, GRADIENT_CACHE_MAX_BYTES, suffix='.rgba')
+
+# Python 3.13+ can map a file without keeping a duplicate of its descriptor
+MMAP_OPTIONS = {'trackfd': False} if sys.version_info >= (3, 13) else {}
+
+
+# ============================================================================
+# CACHE FUNCTIONS
+# ============================================================================
+
+def gradient_cache_key(width: int, height: int, angle: float,
+                       color_stops: List[Tuple[Tuple[int, int, int], float]],
+                       mode: str) -> str:
+    """
+    Build the cache key for a gradient background.
+
+    Args:
+        width: Canvas width in pixels
+        height: Canvas height in pixels
+        angle: Gradient angle in degrees
+        color_stops: List of (RGB_tuple, position_percent) tuples
+        mode: Gradient flavour (e.g. 'css-linear', 'v1-vertical-header180')
+
+    Returns:
+        Hex cache key
+    """
+    stops = [[list(color), float(position)] for color, position in color_stops]
+    return make_cache_key('gradient', width, height, float(angle), stops, mode)
+
+
+def map_rgba_buffer(path, width: int, height: int) -> Optional[Image.Image]:
+    """
+    Memory-map a raw RGBA file as a read-only PIL image.
+
+    The file is closed as soon as it is mapped. The mapping itself is owned
+    by the returned image and nothing else: Pillow unmaps it when the image
+    is freed or first modified (drawing copies the pixels out of the mapped
+    file), so callers can draw on the image without touching the cached
+    file and never close anything themselves. Before Python 3.13 the
+    mapping holds a duplicate descriptor for that same lifetime.
+
+    Args:
+        path: Path to the raw RGBA file
+        width: Image width in pixels
+        height: Image height in pixels
+
+    Returns:
+        PIL Image backed by the mapped file, or None if the file is unusable
+    """
+    expected_size = width * height * 4
+    try:
+        with open(path, 'rb') as f:
+            buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ, **MMAP_OPTIONS)
+    except (OSError, ValueError):
+        return None
+
+    if len(buffer) != expected_size:
+        buffer.close()
+        return None
+
+    image = Image.frombuffer('RGBA', (width, height), buffer, 'raw', 'RGBA', 0, 1)
+    del buffer  # the image now holds the only reference to the mapping
+    return image
+
+
+def get_gradient(width: int, height: int, angle: float,
+                 color_stops: List[Tuple[Tuple[int, int, int], float]],
+                 mode: str,
+                 render: Callable[[], Image.Image],
+                 logger: Optional[logging.Logger] = None) -> Image.Image:
+    """
+    Return a gradient background from the cache, rendering it on a miss.
+
+    Args:
+        width: Canvas width in pixels
+        height: Canvas height in pixels
+        angle: Gradient angle in degrees
+        color_stops: List of (RGB_tuple, position_percent) tuples
+        mode: Gradient flavour, part of the cache key
+        render: Callable producing the gradient image on a cache miss
+        logger: Optional logger
+
+    Returns:
+        RGBA PIL Image (memory-mapped on a hit)
+    """
+    key = gradient_cache_key(width, height, angle, color_stops, mode)
+
+    cached_path = gradient_cache.get(key)
+    if cached_path is not None:
+        image = map_rgba_buffer(cached_path, width, height)
+        if image is not None:
+            if logger:
+                logger.info(f"Gradient cache hit: {key[:12]}")
+            return image
+
+    if logger:
+        logger.info(f"Gradient cache miss: {key[:12]} - rendering")
+
+    image = render().convert('RGBA')
+    try:
+        gradient_cache.put(key, image.tobytes(), logger=logger)
+    except OSError as e:
+        # Caching is best-effort; the render itself succeeded
+        if logger:
+            logger.warning(f"Could not store gradient in cache: {e}")
+
+    return image
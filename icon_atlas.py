@@ -0,0 +1,204 @@
+"""
+Weather icon sprite atlas for V2.
+
+Packs every icon referenced by WEATHER_CODE_TO_ICON_V2 into one pre-resized
+RGBA image per icon size, with an index from IMS code to atlas rectangle.
+Rendering N cities then costs one atlas load plus N crop/paste operations
+instead of N file opens and LANCZOS resizes.
+
+Atlases are cached as raw RGBA in cache/icon_atlases/ and kept in memory
+for the lifetime of the process.
+"""
+
+import math
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+
+from PIL import Image
+
+from disk_cache import DiskCache, make_cache_key, file_digest
+from gradient_cache import map_rgba_buffer
+from utils import CACHE_DIR
+from weather_icon_mapping import WEATHER_CODE_TO_ICON_V2, WEATHER_ICONS_V2_DIR
+
+
+# ============================================================================
+# CONFIGURATION
+# ============================================================================
+
+# Bump when the packing layout changes
+ICON_ATLAS_VERSION = 1
+ICON_ATLAS_CACHE_DIR = CACHE_DIR / "icon_atlases"
+ICON_ATLAS_CACHE_MAX_BYTES = 32 * 1024 * 1024
+DEFAULT_ICON_FILENAME = "clear.png"
+
+icon_atlas_cache = DiskCache(ICON_ATLAS_CACHE_DIR, ICON_ATLAS_CACHE_MAX_BYTES, suffix='.rgba')
+
+Rect = Tuple[int, int, int, int]  # (left, upper, right, lower)
+
+
+# ============================================================================
+# ATLAS
+# ============================================================================
+
+class IconAtlas:
+    """Pre-resized weather icons packed into a single image."""
+
+    def __init__(self, image: Image.Image, index: Dict[int, Rect], default_rect: Rect, size: int):
+        """
+        Args:
+            image: RGBA atlas image
+            index: Map from IMS weather code to icon rectangle in the atlas
+            default_rect: Rectangle used for unmapped codes
+            size: Edge length of every icon in pixels
+        """
+        self.image = image
+        self.index = index
+        self.default_rect = default_rect
+        self.size = size
+        self._sprites: Dict[Rect, Image.Image] = {}
+
+    def rect_for(self, weather_code) -> Rect:
+        """Return the atlas rectangle for an IMS code (int or numeric string)."""
+        try:
+            return self.index.get(int(weather_code), self.default_rect)
+        except (TypeError, ValueError):
+            return self.default_rect
+
+    def get_icon(self, weather_code) -> Image.Image:
+        """
+        Return the icon for an IMS code as an RGBA image.
+
+        Each distinct icon is sliced out of the atlas once and reused.
+
+        Args:
+            weather_code: IMS weather code (int or numeric string)
+
+        Returns:
+            RGBA icon image of size x size pixels
+        """
+        rect = self.rect_for(weather_code)
+        sprite = self._sprites.get(rect)
+        if sprite is None:
+            sprite = self.image.crop(rect)
+            self._sprites[rect] = sprite
+        return sprite
+
+    def paste_icon(self, canvas: Image.Image, weather_code, position: Tuple[int, int]) -> None:
+        """Alpha-composite the icon for an IMS code onto canvas at position."""
+        icon = self.get_icon(weather_code)
+        canvas.paste(icon, position, icon)
+
+
+def get_atlas_filenames(icon_map: Dict[int, str], default_filename: str = DEFAULT_ICON_FILENAME) -> List[str]:
+    """Return the unique icon filenames in packing order (sorted, default included)."""
+    return sorted(set(icon_map.values()) | {default_filename})
+
+
+def get_atlas_layout(filenames: List[str], size: int) -> Tuple[Tuple[int, int], Dict[str, Rect]]:
+    """
+    Compute the grid packing of icons of equal size.
+
+    Args:
+        filenames: Icon filenames in packing order
+        size: Icon edge length in pixels
+
+    Returns:
+        Tuple of ((atlas_width, atlas_height), {filename: rect})
+    """
+    columns = max(1, math.ceil(math.sqrt(len(filenames))))
+    rows = max(1, math.ceil(len(filenames) / columns))
+
+    rects = {}
+    for i, filename in enumerate(filenames):
+        left = (i % columns) * size
+        upper = (i // columns) * size
+        rects[filename] = (left, upper, left + size, upper + size)
+
+    return (columns * size, rows * size), rects
+
+
+def render_atlas_image(filenames: List[str], rects: Dict[str, Rect],
+                       atlas_size: Tuple[int, int], size: int, icons_dir, logger=None) -> Image.Image:
+    """Decode, resize and pack every icon into a new atlas image."""
+    atlas = Image.new('RGBA', atlas_size, (0, 0, 0, 0))
+
+    for filename in filenames:
+        icon_path = icons_dir / filename
+        try:
+            with Image.open(icon_path) as icon:
+                icon = icon.convert('RGBA').resize((size, size), Image.Resampling.LANCZOS)
+            atlas.paste(icon, rects[filename][:2])
+        except (OSError, ValueError) as e:
+            # Leave a transparent cell so a missing icon never breaks a render
+            if logger:
+                logger.warning(f"Could not load icon {filename}: {e}")
+
+    return atlas
+
+
+def build_icon_atlas(size: int,
+                     icon_map: Optional[Dict[int, str]] = None,
+                     icons_dir=None,
+                     default_filename: str = DEFAULT_ICON_FILENAME,
+                     logger=None) -> IconAtlas:
+    """
+    Build (or load from cache) the icon atlas for one icon size.
+
+    Args:
+        size: Icon edge length in pixels
+        icon_map: IMS code to icon filename (default: WEATHER_CODE_TO_ICON_V2)
+        icons_dir: Directory holding the icon files (default: WEATHER_ICONS_V2_DIR)
+        default_filename: Icon used for codes missing from icon_map
+        logger: Optional logger
+
+    Returns:
+        IconAtlas instance
+    """
+    if icon_map is None:
+        icon_map = WEATHER_CODE_TO_ICON_V2
+    if icons_dir is None:
+        icons_dir = WEATHER_ICONS_V2_DIR
+
+    filenames = get_atlas_filenames(icon_map, default_filename)
+    atlas_size, rects = get_atlas_layout(filenames, size)
+    index = {int(code): rects[filename] for code, filename in icon_map.items()}
+    default_rect = rects[default_filename]
+
+    key = make_cache_key(
+        'icon-atlas', ICON_ATLAS_VERSION, size, str(icons_dir),
+        {filename: file_digest(icons_dir / filename) for filename in filenames}
+    )
+
+    cached_path = icon_atlas_cache.get(key)
+    if cached_path is not None:
+        image = map_rgba_buffer(cached_path, *atlas_size)
+        if image is not None:
+            if logger:
+                logger.info(f"Icon atlas cache hit: {size}px ({len(filenames)} icons)")
+            return IconAtlas(image, index, default_rect, size)
+
+    if logger:
+        logger.info(f"Building icon atlas: {size}px ({len(filenames)} icons)")
+    image = render_atlas_image(filenames, rects, atlas_size, size, icons_dir, logger)
+    try:
+        icon_atlas_cache.put(key, image.tobytes(), logger=logger)
+    except OSError as e:
+        if logger:
+            logger.warning(f"Could not store icon atlas in cache: {e}")
+
+    return IconAtlas(image, index, default_rect, size)
+
+
+@lru_cache(maxsize=None)
+def get_icon_atlas(size: int) -> IconAtlas:
+    """
+    Return the process-wide V2 icon atlas for a size.
+
+    Args:
+        size: Icon edge length in pixels
+
+    Returns:
+        IconAtlas for WEATHER_CODE_TO_ICON_V2 at that size
+    """
+    return build_icon_atlas(size)
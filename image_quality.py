@@ -0,0 +1,106 @@
+"""
+IMS Weather Forecast Automation - Image Quality Metrics
+
+PSNR and SSIM of a lossy encode against the lossless render, computed with
+NumPy only (no scikit-image dependency). PSNR is taken over all RGB
+channels, so it also sees chroma subsampling losses; SSIM works on the luma
+channel (ITU-R BT.601), where structural artefacts are most visible.
+
+SSIM uses the common 8x8 box-window variant (Wang et al. 2004 with a uniform
+instead of a Gaussian window), computed with summed-area tables so a full
+1080x1920 image takes a fraction of a second. Values are close to, but not
+identical with, Gaussian-window SSIM implementations.
+"""
+
+import math
+from typing import Tuple
+
+import numpy as np
+from PIL import Image
+
+SSIM_WINDOW = 8
+SSIM_K1 = 0.01
+SSIM_K2 = 0.03
+PIXEL_RANGE = 255.0
+
+
+def rgb_array(image: Image.Image) -> np.ndarray:
+    """Return the RGB pixels of an image as a float64 (height, width, 3) array."""
+    return np.asarray(image.convert('RGB'), dtype=np.float64)
+
+
+def luma(rgb: np.ndarray) -> np.ndarray:
+    """Return the BT.601 luma of an RGB array."""
+    return rgb @ np.array([0.299, 0.587, 0.114])
+
+
+def psnr(reference: np.ndarray, candidate: np.ndarray) -> float:
+    """
+    Peak signal-to-noise ratio in dB.
+
+    Args:
+        reference: Pixels of the lossless image (RGB array or luma)
+        candidate: Pixels of the encoded image (same shape)
+
+    Returns:
+        PSNR in dB (inf for identical images)
+    """
+    mse = float(np.mean((reference - candidate) ** 2))
+    if mse == 0:
+        return math.inf
+    return 10 * math.log10(PIXEL_RANGE ** 2 / mse)
+
+
+def _window_sums(values: np.ndarray, window: int) -> np.ndarray:
+    """Sum of every window x window block (valid positions only) via a summed-area table."""
+    table = np.zeros((values.shape[0] + 1, values.shape[1] + 1))
+    table[1:, 1:] = values.cumsum(axis=0).cumsum(axis=1)
+    return (table[window:, window:] - table[:-window, window:]
+            - table[window:, :-window] + table[:-window, :-window])
+
+
+def ssim(reference: np.ndarray, candidate: np.ndarray, window: int = SSIM_WINDOW) -> float:
+    """
+    Mean structural similarity over all window x window blocks.
+
+    Args:
+        reference: Luma of the lossless image
+        candidate: Luma of the encoded image (same shape)
+        window: Window edge length in pixels
+
+    Returns:
+        Mean SSIM (1.0 for identical images)
+    """
+    n = window * window
+    mu_x = _window_sums(reference, window) / n
+    mu_y = _window_sums(candidate, window) / n
+    # Sample (co)variances, as in the reference implementation
+    var_x = (_window_sums(reference * reference, window) / n - mu_x * mu_x) * n / (n - 1)
+    var_y = (_window_sums(candidate * candidate, window) / n - mu_y * mu_y) * n / (n - 1)
+    cov = (_window_sums(reference * candidate, window) / n - mu_x * mu_y) * n / (n - 1)
+
+    c1 = (SSIM_K1 * PIXEL_RANGE) ** 2
+    c2 = (SSIM_K2 * PIXEL_RANGE) ** 2
+    index = ((2 * mu_x * mu_y + c1) * (2 * cov + c2)) / ((mu_x ** 2 + mu_y ** 2 + c1) * (var_x + var_y + c2))
+    return float(index.mean())
+
+
+def compare_images(reference: Image.Image, candidate: Image.Image) -> Tuple[float, float]:
+    """
+    Compare an encoded image with its lossless source.
+
+    Args:
+        reference: Lossless image
+        candidate: Decoded lossy encode of the same size
+
+    Returns:
+        (luma SSIM, RGB PSNR in dB)
+
+    Raises:
+        ValueError: If the sizes differ
+    """
+    if reference.size != candidate.size:
+        raise ValueError(f"size mismatch: {reference.size} vs {candidate.size}")
+    ref_rgb = rgb_array(reference)
+    cand_rgb = rgb_array(candidate)
+    return ssim(luma(ref_rgb), luma(cand_rgb)), psnr(ref_rgb, cand_rgb)
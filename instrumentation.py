@@ -0,0 +1,344 @@
+"""
+IMS Weather Forecast Automation - Run Instrumentation
+
+Named spans and counters for one workflow run, written out as a
+machine-readable run report (run_report.json) so performance can be tracked
+across runs.
+
+A span records wall time, CPU time of its thread, the process peak RSS at
+its end and, when memory tracing is on, the peak traced (tracemalloc)
+allocation while it was open. Counters (bytes in/out, cache hits/misses)
+are attributed to the innermost open span of the calling thread and summed
+for the whole run. Spans nest per thread; a stage running on a worker thread
+starts a new root span.
+
+Instrumentation is off unless a run report was started, in which case
+span() and count() do next to nothing, so library modules can be
+instrumented unconditionally. Spans are also the hook points of the
+opt-in profiler (profiling.py), via set_span_hook().
+
+Usage:
+    report = start_run_report(trace_memory=True)
+    with span('download'):
+        count('download.bytes_in', len(content))
+    stop_run_report()
+    write_run_report(report, OUTPUT_DIR / RUN_REPORT_FILENAME, logger)
+"""
+
+import json
+import os
+import platform
+import sys
+import threading
+import time
+import tracemalloc
+from contextlib import ExitStack, contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, ContextManager, Dict, Iterator, List, Optional
+
+# resource is Unix-only; peak RSS is omitted without it
+try:
+    import resource
+    RESOURCE_AVAILABLE = True
+except ImportError:
+    RESOURCE_AVAILABLE = False
+
+
+# ============================================================================
+# CONFIGURATION
+# ============================================================================
+
+RUN_REPORT_FILENAME = "run_report.json"
+RUN_REPORT_VERSION = 1
+
+
+def get_peak_rss_kb() -> Optional[int]:
+    """Return the process peak resident set size in KiB (None if unavailable)."""
+    if not RESOURCE_AVAILABLE:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS, KiB on Linux
+    return peak // 1024 if sys.platform == 'darwin' else peak
+
+
+# ============================================================================
+# SPANS
+# ============================================================================
+
+class Span:
+    """One timed region of the run."""
+
+    __slots__ = ('name', 'parent', 'thread', 'start', 'wall', 'cpu',
+                 'peak_rss_kb', 'alloc_peak_kb', 'counters', 'attrs')
+
+    def __init__(self, name: str, parent: Optional[str], start: float, attrs: Dict):
+        """
+        Args:
+            name: Span name (dotted, e.g. 'render.cities')
+            parent: Name of the enclosing span on the same thread
+            start: Seconds since the run started
+            attrs: Extra JSON-serializable details
+        """
+        self.name = name
+        self.parent = parent
+        self.thread = threading.current_thread().name
+        self.start = start
+        self.wall = 0.0
+        self.cpu = 0.0
+        self.peak_rss_kb: Optional[int] = None
+        self.alloc_peak_kb: Optional[float] = None
+        self.counters: Dict[str, int] = {}
+        self.attrs = attrs
+
+    def to_dict(self) -> Dict:
+        """Return the span as a report entry."""
+        entry = {
+            'name': self.name,
+            'parent': self.parent,
+            'thread': self.thread,
+            'start': round(self.start, 4),
+            'wall_seconds': round(self.wall, 4),
+            'cpu_seconds': round(self.cpu, 4),
+            'peak_rss_kb': self.peak_rss_kb,
+        }
+        if self.alloc_peak_kb is not None:
+            entry['alloc_peak_kb'] = round(self.alloc_peak_kb, 1)
+        if self.counters:
+            entry['counters'] = dict(self.counters)
+        if self.attrs:
+            entry['attrs'] = self.attrs
+        return entry
+
+
+class RunReport:
+    """Spans and counters collected during one run."""
+
+    def __init__(self, trace_memory: bool = False):
+        """
+        Args:
+            trace_memory: If True, trace allocations with tracemalloc (slows
+                Python-heavy code; peak RSS is recorded either way)
+        """
+        self.trace_memory = trace_memory
+        self.started_tracing = False
+        self.created = datetime.now().isoformat(timespec='seconds')
+        self.start = time.perf_counter()
+        self.cpu_start = time.process_time()
+        self.end: Optional[float] = None
+        self.cpu_end: Optional[float] = None
+        self.spans: List[Span] = []
+        self.counters: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._open: List[Span] = []  # All open spans (every thread), for allocation peaks
+
+    def stack(self) -> List[Span]:
+        """Return the calling thread's stack of open spans."""
+        stack = getattr(self._local, 'stack', None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    def fold_alloc_peak(self) -> None:
+        """
+        Credit the traced peak since the last reset to every open span, then reset it.
+
+        tracemalloc keeps one process-wide peak, so it is reset at every span
+        boundary and each open span keeps the maximum it has seen. Must be
+        called with the lock held.
+        """
+        if not tracemalloc.is_tracing():
+            return
+        peak_kb = tracemalloc.get_traced_memory()[1] / 1024
+        for open_span in self._open:
+            if open_span.alloc_peak_kb is None or peak_kb > open_span.alloc_peak_kb:
+                open_span.alloc_peak_kb = peak_kb
+        tracemalloc.reset_peak()
+
+    def add_counter(self, name: str, value: int) -> None:
+        """Add to a counter of the run and of the calling thread's innermost span."""
+        stack = self.stack()
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+            if stack:
+                counters = stack[-1].counters
+                counters[name] = counters.get(name, 0) + value
+
+    def to_dict(self) -> Dict:
+        """Return the report body (run totals, counters and spans)."""
+        end = self.end if self.end is not None else time.perf_counter()
+        cpu_end = self.cpu_end if self.cpu_end is not None else time.process_time()
+        return {
+            'version': RUN_REPORT_VERSION,
+            'created': self.created,
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+            'wall_seconds': round(end - self.start, 4),
+            'cpu_seconds': round(cpu_end - self.cpu_start, 4),
+            'peak_rss_kb': get_peak_rss_kb(),
+            'trace_memory': self.trace_memory,
+            'counters': dict(sorted(self.counters.items())),
+            'spans': [s.to_dict() for s in sorted(self.spans, key=lambda s: s.start)],
+        }
+
+
+# The run being recorded (None = instrumentation off)
+_active: Optional[RunReport] = None
+
+# Context manager factory entered around every span, e.g. the profiler
+_span_hook: Optional[Callable[[str], ContextManager]] = None
+
+
+def set_span_hook(hook: Optional[Callable[[str], ContextManager]]) -> None:
+    """
+    Install (or with None, remove) a hook entered around every span.
+
+    Args:
+        hook: Callable taking the span name and returning a context manager
+    """
+    global _span_hook
+    _span_hook = hook
+
+
+def start_run_report(trace_memory: bool = False) -> RunReport:
+    """
+    Start recording spans and counters for a run.
+
+    Args:
+        trace_memory: If True, start tracemalloc (if not already tracing) so
+            spans record their peak traced allocation
+
+    Returns:
+        The active RunReport
+    """
+    global _active
+    report = RunReport(trace_memory)
+    if trace_memory and not tracemalloc.is_tracing():
+        tracemalloc.start()
+        report.started_tracing = True
+    _active = report
+    return report
+
+
+def stop_run_report() -> Optional[RunReport]:
+    """
+    Stop recording and return the finished report (None if none was active).
+
+    Stops tracemalloc if start_run_report started it.
+    """
+    global _active
+    report, _active = _active, None
+    if report is None:
+        return None
+    report.end = time.perf_counter()
+    report.cpu_end = time.process_time()
+    if report.started_tracing:
+        tracemalloc.stop()
+    return report
+
+
+def get_run_report() -> Optional[RunReport]:
+    """Return the active report, or None if instrumentation is off."""
+    return _active
+
+
+@contextmanager
+def span(name: str, **attrs) -> Iterator[Optional[Span]]:
+    """
+    Time a region of code as a named span of the active run.
+
+    Args:
+        name: Span name (dotted, e.g. 'render.cities')
+        **attrs: Extra JSON-serializable details for the report
+
+    Yields:
+        The Span (or None when no run report is active)
+    """
+    report = _active
+    hook = _span_hook
+    if report is None and hook is None:
+        yield None
+        return
+
+    with ExitStack() as stack:
+        if hook is not None:
+            stack.enter_context(hook(name))
+        if report is None:
+            yield None
+        else:
+            yield stack.enter_context(record_span(report, name, attrs))
+
+
+@contextmanager
+def record_span(report: RunReport, name: str, attrs: Dict) -> Iterator[Span]:
+    """Record one span into a report (see span())."""
+    stack = report.stack()
+    current = Span(name, stack[-1].name if stack else None,
+                   time.perf_counter() - report.start, attrs)
+    with report._lock:
+        report.fold_alloc_peak()
+        report._open.append(current)
+    stack.append(current)
+    cpu_start = time.thread_time()
+    try:
+        yield current
+    finally:
+        current.cpu = time.thread_time() - cpu_start
+        current.wall = time.perf_counter() - report.start - current.start
+        current.peak_rss_kb = get_peak_rss_kb()
+        stack.pop()
+        with report._lock:
+            report.fold_alloc_peak()
+            report._open.remove(current)
+            report.spans.append(current)
+
+
+def count(name: str, value: int = 1) -> None:
+    """
+    Add to a counter (e.g. 'download.bytes_in', 'cache.gradients.hit').
+
+    No-op when instrumentation is off.
+
+    Args:
+        name: Counter name
+        value: Amount to add
+    """
+    report = _active
+    if report is not None:
+        report.add_counter(name, value)
+
+
+# ============================================================================
+# REPORT
+# ============================================================================
+
+def write_run_report(report: RunReport, path: Path, logger, extra: Optional[Dict] = None) -> bool:
+    """
+    Write a run report as JSON (atomic).
+
+    Args:
+        report: Finished RunReport
+        path: Output file (normally RUN_REPORT_FILENAME next to the image)
+        logger: Logger instance
+        extra: Additional top-level fields (run status, stage timings, ...)
+
+    Returns:
+        True if written, False otherwise
+    """
+    body = report.to_dict()
+    if extra:
+        body.update(extra)
+
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(path.name + '.tmp')
+        tmp_path.write_text(json.dumps(body, indent=2, ensure_ascii=False), encoding='utf-8')
+        os.replace(tmp_path, path)
+    except OSError as e:
+        logger.warning(f"Could not write run report: {e}")
+        return False
+
+    logger.info(f"Run report: {path}")
+    return True
@@ -0,0 +1,69 @@
+"""
+IMS Weather Forecast Automation - Lazy Module Loader
+
+Defers importing a module until one of its attributes is first used, so
+entry points (forecast_workflow.py --help, extract-only runs) don't pay for
+PIL, numpy, requests and the rest of the stack before they need them.
+
+    download_forecast = lazy_import('download_forecast')
+    ...
+    download_forecast.download_feeds(logger)   # imported here, once
+
+Loading is guarded by a lock, so workflow stages on different threads can
+touch the same lazy module safely. Use attribute access on the returned
+module; `from x import y` always imports eagerly.
+"""
+
+import importlib
+import sys
+import threading
+import types
+
+
+class LazyModule(types.ModuleType):
+    """Module stand-in that imports the real module on first attribute access."""
+
+    def __init__(self, name: str):
+        super().__init__(name)
+        self.__dict__['_lazy_module'] = None
+        self.__dict__['_lazy_lock'] = threading.Lock()
+
+    def _load(self) -> types.ModuleType:
+        module = self.__dict__['_lazy_module']
+        if module is None:
+            with self.__dict__['_lazy_lock']:
+                module = self.__dict__['_lazy_module']
+                if module is None:
+                    module = importlib.import_module(self.__name__)
+                    self.__dict__['_lazy_module'] = module
+        return module
+
+    def __getattr__(self, attr: str):
+        # Only called for names not set on the stand-in itself
+        return getattr(self._load(), attr)
+
+    def __setattr__(self, attr: str, value) -> None:
+        setattr(self._load(), attr, value)
+
+    def __dir__(self):
+        return dir(self._load())
+
+    def __repr__(self) -> str:
+        state = 'loaded' if self.__dict__['_lazy_module'] is not None else 'not loaded'
+        return f"<lazy module '{self.__name__}' ({state})>"
+
+
+def lazy_import(name: str) -> types.ModuleType:
+    """
+    Return a module that is imported on first attribute access.
+
+    If the module is already imported, it is returned as is.
+
+    Args:
+        name: Absolute module name
+
+    Returns:
+        The module, or a LazyModule stand-in for it
+    """
+    module = sys.modules.get(name)
+    return module if module is not None else LazyModule(name)
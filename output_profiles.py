@@ -0,0 +1,524 @@
+"""
+IMS Weather Forecast Automation - Output Profiles
+
+The forecast image is drawn once as a 1080x1920 composite and then encoded
+into several named output profiles, each with its own size, format and
+encoder settings:
+
+    story      1080x1920 PNG   Instagram story (the primary output)
+    feed       1080x1350 JPEG  Instagram feed post; the story is fitted
+                               inside and centred on the background gradient
+    thumbnail   360x640  JPEG  Preview for the email body
+    webp       1080x1920 WebP  Lightweight full-size copy
+    email      1080x1920 JPEG  Email attachment, encoded to a byte budget
+
+A profile with a byte budget is not encoded at a fixed quality: the quality
+is searched to land just under the budget. The first time, every chroma
+subsampling option is searched and the candidate closest to the lossless
+render (by RGB PSNR, see image_quality.py) wins; the chosen quality and
+subsampling are remembered (cache/encoder_hints.json) and later encodes
+search outward from them in that mode only, which usually takes two or
+three encodes. The attached image is base64-encoded in the MIME message,
+so every byte saved here saves 4/3 of a byte on the wire.
+
+The primary profile is written to the requested output path; the others go
+next to it as <stem>_<profile><suffix> (daily_forecast_feed.jpg, ...).
+Encodes run on a thread pool - Pillow releases the GIL while resizing and
+encoding, so the profiles overlap instead of running back to back.
+
+Pillow is loaded on first use, so the profile table can be read (e.g. for
+forecast_workflow.py --help) without importing it.
+"""
+
+from __future__ import annotations
+
+import io
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+from instrumentation import count, span
+from lazy_import import lazy_import
+from utils import CACHE_DIR
+
+Image = lazy_import('PIL.Image')
+
+
+# ============================================================================
+# CONFIGURATION
+# ============================================================================
+
+# size: (width, height), or None for the composite size
+# fit: 'contain' scales the composite into size (aspect kept) over the background
+# save: keyword arguments for Image.save
+# budget_bytes / quality_range / subsampling_options: size-budgeted encoding
+OUTPUT_PROFILES: Dict[str, Dict] = {
+    'story': {
+        'size': None,
+        'format': 'PNG',
+        'suffix': '.png',
+        'save': {'optimize': False},
+    },
+    'feed': {
+        'size': (1080, 1350),
+        'fit': 'contain',
+        'format': 'JPEG',
+        'suffix': '.jpg',
+        'save': {'quality': 90, 'progressive': True, 'optimize': True, 'subsampling': '4:2:0'},
+    },
+    'thumbnail': {
+        'size': (360, 640),
+        'fit': 'contain',
+        'format': 'JPEG',
+        'suffix': '.jpg',
+        'save': {'quality': 80, 'progressive': True, 'optimize': True, 'subsampling': '4:2:0'},
+    },
+    'webp': {
+        'size': None,
+        'format': 'WEBP',
+        'suffix': '.webp',
+        'save': {'quality': 80, 'method': 4},
+    },
+    'email': {
+        'size': None,
+        'format': 'JPEG',
+        'suffix': '.jpg',
+        'budget_bytes': 160 * 1024,
+        'quality_range': (50, 95),
+        'subsampling_options': ['4:4:4', '4:2:0'],
+        'save': {'progressive': True, 'optimize': True},
+    },
+}
+
+PRIMARY_PROFILE = 'story'
+
+# Formats without an alpha channel
+RGB_ONLY_FORMATS = {'JPEG'}
+
+# JPEG options that only make the file smaller (Huffman optimization, progressive
+# scans) but make each encode several times slower; budgeted encodes search the
+# whole quality range without them, then refine upwards from that quality with them
+FINAL_ONLY_OPTIONS = ('optimize', 'progressive')
+
+# Quality and subsampling last chosen per budgeted profile, where the next search starts
+ENCODER_HINTS_FILE = CACHE_DIR / "encoder_hints.json"
+
+# Builds a background of a given (width, height) for 'contain' profiles
+BackgroundFactory = Callable[[int, int], 'Image.Image']
+
+
+def parse_profile_list(value: Optional[str]) -> List[str]:
+    """
+    Turn a comma-separated profile list into profile names.
+
+    The primary profile is always included and comes first.
+
+    Args:
+        value: e.g. 'feed,webp', 'all', or None / '' for the primary only
+
+    Returns:
+        Profile names
+
+    Raises:
+        ValueError: If a name is not in OUTPUT_PROFILES
+    """
+    if value is None or not value.strip():
+        return [PRIMARY_PROFILE]
+    if value.strip().lower() == 'all':
+        return list(OUTPUT_PROFILES)
+
+    names = [name.strip() for name in value.split(',') if name.strip()]
+    unknown = [name for name in names if name not in OUTPUT_PROFILES]
+    if unknown:
+        raise ValueError(f"unknown output profile(s): {', '.join(unknown)} "
+                         f"(available: {', '.join(OUTPUT_PROFILES)})")
+    return [PRIMARY_PROFILE] + [name for name in dict.fromkeys(names) if name != PRIMARY_PROFILE]
+
+
+def profile_output_path(output_path: Path, name: str) -> Path:
+    """
+    Return where a profile is written, given the primary output path.
+
+    Args:
+        output_path: Path of the primary (story) image
+        name: Profile name
+
+    Returns:
+        output_path itself for the primary profile, else <stem>_<name><suffix>
+    """
+    if name == PRIMARY_PROFILE:
+        return output_path
+    return output_path.with_name(f"{output_path.stem}_{name}{OUTPUT_PROFILES[name]['suffix']}")
+
+
+def describe_profile(name: str, stats: Dict) -> str:
+    """Short human-readable summary of an encode for the log."""
+    profile = OUTPUT_PROFILES[name]
+    quality = stats.get('quality', profile['save'].get('quality'))
+    text = f"{stats['size'][0]}x{stats['size'][1]} {profile['format']}"
+    if quality is not None:
+        text += f" q{quality}"
+    if stats.get('subsampling'):
+        text += f" {stats['subsampling']}"
+    return text
+
+
+# ============================================================================
+# ENCODING
+# ============================================================================
+
+def resize_for_profile(composite: Image.Image, name: str,
+                       background: Optional[BackgroundFactory] = None) -> Image.Image:
+    """
+    Scale the composite to a profile's size.
+
+    Args:
+        composite: Finished full-size image
+        name: Profile name
+        background: Background for 'contain' profiles whose aspect ratio
+            differs from the composite (default: white)
+
+    Returns:
+        Image at the profile size (the composite itself if no resize is needed)
+    """
+    profile = OUTPUT_PROFILES[name]
+    size = profile.get('size')
+    if size is None or tuple(size) == composite.size:
+        return composite
+
+    width, height = size
+    scale = min(width / composite.width, height / composite.height)
+    scaled_size = (max(1, round(composite.width * scale)), max(1, round(composite.height * scale)))
+    scaled = composite.resize(scaled_size, Image.Resampling.LANCZOS)
+    if scaled_size == (width, height):
+        return scaled
+
+    # Letterbox: centre the scaled composite on the background
+    if background is not None:
+        canvas = background(width, height).convert(composite.mode)
+    else:
+        canvas = Image.new(composite.mode, (width, height), 'white')
+    canvas.paste(scaled, ((width - scaled_size[0]) // 2, (height - scaled_size[1]) // 2))
+    return canvas
+
+
+def encode_image(image: Image.Image, image_format: str, save: Dict) -> bytes:
+    """Encode an image in memory."""
+    buffer = io.BytesIO()
+    image.save(buffer, image_format, **save)
+    return buffer.getvalue()
+
+
+def fit_quality(image: Image.Image, image_format: str, save: Dict, budget: int,
+                quality_range: Tuple[int, int], start: Optional[int] = None) -> Tuple[bytes, int, int]:
+    """
+    Search the highest quality whose encode fits a byte budget.
+
+    Encoded size grows (almost) monotonically with quality. Without a start
+    quality the top quality is tried first, as it often fits already, then
+    the range is bisected (about log2(range) encodes). With one, the search
+    gallops outward from it (1, 2, 4, ... steps) and bisects the bracket, so
+    a start within a step or two of the answer costs two or three encodes.
+
+    Args:
+        image: Image to encode (RGB for JPEG)
+        image_format: Pillow format name ('JPEG', 'WEBP')
+        save: Other Image.save options
+        budget: Maximum encoded size in bytes
+        quality_range: (lowest, highest) quality to consider
+        start: Likely answer, e.g. the quality chosen for yesterday's image
+
+    Returns:
+        (encoded bytes, quality, number of encodes). If even the lowest
+        quality is over budget, that encode is returned.
+    """
+    low, high = quality_range
+    encodes: Dict[int, bytes] = {}
+
+    def encode(quality: int) -> bytes:
+        if quality not in encodes:
+            encodes[quality] = encode_image(image, image_format, {**save, 'quality': quality})
+        return encodes[quality]
+
+    def fits(quality: int) -> bool:
+        return len(encode(quality)) <= budget
+
+    # Bracket the answer: best fits (None: nothing found yet), above ceiling is over budget
+    if start is None:
+        if fits(high):
+            return encodes[high], high, len(encodes)
+        best, ceiling = None, high - 1
+    else:
+        start = min(max(start, low), high)
+        best, ceiling, step = None, high, 1
+        if fits(start):
+            best = start
+            while best < ceiling:
+                probe = min(ceiling, best + step)
+                if not fits(probe):
+                    ceiling = probe - 1
+                    break
+                best, step = probe, step * 2
+        else:
+            ceiling = start - 1
+            while ceiling >= low:
+                probe = max(low, ceiling + 1 - step)
+                if fits(probe):
+                    best = probe
+                    break
+                ceiling, step = probe - 1, step * 2
+
+    lo, hi = (best + 1 if best is not None else low), ceiling
+    while lo <= hi:
+        mid = (lo + hi) // 2
+        if fits(mid):
+            best = mid
+            lo = mid + 1
+        else:
+            hi = mid - 1
+
+    quality = best if best is not None else low
+    return encode(quality), quality, len(encodes)
+
+
+def load_encoder_hint(name: str, path: Path = ENCODER_HINTS_FILE) -> Optional[Dict]:
+    """
+    Return the {'quality', 'subsampling'} last chosen for a budgeted profile, if any.
+
+    Args:
+        name: Profile name
+        path: Hint store
+
+    Returns:
+        Hint dictionary, or None if none is stored (or it is unreadable)
+    """
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            hint = json.load(f).get(name)
+    except (OSError, ValueError, AttributeError):
+        return None
+    if not isinstance(hint, dict) or not isinstance(hint.get('quality'), int):
+        return None
+    return hint
+
+
+def save_encoder_hint(name: str, stats: Dict, path: Path = ENCODER_HINTS_FILE) -> None:
+    """
+    Remember the quality and subsampling chosen for a budgeted profile (best effort).
+
+    Args:
+        name: Profile name
+        stats: Stats from encode_within_budget()
+        path: Hint store
+    """
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            hints = json.load(f)
+        if not isinstance(hints, dict):
+            hints = {}
+    except (OSError, ValueError):
+        hints = {}
+    hints[name] = {'quality': stats['quality'], 'subsampling': stats['subsampling']}
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # Backfill workers encode concurrently: one temporary file per process
+        tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(hints, f, indent=2, sort_keys=True)
+        os.replace(tmp_path, path)
+    except OSError:
+        pass
+
+
+def encode_candidate(image: Image.Image, name: str, subsampling: Optional[str],
+                     start: Optional[int] = None) -> Dict:
+    """
+    Fit one subsampling mode of a budgeted profile to its budget.
+
+    Without a start quality, the whole quality range is first searched with
+    fast encodes (no FINAL_ONLY_OPTIONS), then refined upwards from that
+    quality with the full options, which only shrink the file. With one,
+    the full options are searched outward from it directly.
+
+    Args:
+        image: Lossless image at the profile size (RGB for JPEG)
+        name: Profile name
+        subsampling: JPEG chroma subsampling, or None for the profile's setting
+        start: Quality to start from (see fit_quality)
+
+    Returns:
+        Candidate with 'data', 'quality', 'subsampling' and 'encodes'
+    """
+    profile = OUTPUT_PROFILES[name]
+    budget = profile['budget_bytes']
+    save = dict(profile['save'])
+    if subsampling is not None:
+        save['subsampling'] = subsampling
+
+    search = {key: value for key, value in save.items() if key not in FINAL_ONLY_OPTIONS}
+    if start is not None or search == save:
+        data, quality, encodes = fit_quality(image, profile['format'], save, budget,
+                                             profile['quality_range'], start)
+    else:
+        data, quality, encodes = fit_quality(image, profile['format'], search, budget,
+                                             profile['quality_range'])
+        # The full options only shrink the file: the fast result is a lower bound
+        final, final_quality, tries = fit_quality(image, profile['format'], save, budget,
+                                                  (quality, profile['quality_range'][1]))
+        encodes += tries
+        if len(final) <= budget or len(final) <= len(data):
+            data, quality = final, final_quality
+    return {'data': data, 'quality': quality, 'subsampling': subsampling, 'encodes': encodes}
+
+
+def encode_within_budget(image: Image.Image, name: str,
+                         hint: Optional[Dict] = None) -> Tuple[bytes, Dict]:
+    """
+    Encode a budgeted profile: best candidate under the byte budget.
+
+    With a hint (the quality and subsampling chosen last time, see
+    load_encoder_hint), only the hinted subsampling is searched, starting at
+    the hinted quality. Without one, or if the hinted mode can't meet the
+    budget, each subsampling option (or the profile's save settings alone)
+    is fitted to the budget. Among the candidates that fit, the one with the
+    highest PSNR against the lossless image wins (RGB PSNR sees chroma
+    subsampling, luma SSIM does not); if none fits, the smallest one is used.
+
+    Args:
+        image: Lossless image at the profile size (RGB for JPEG)
+        name: Profile name
+        hint: {'quality', 'subsampling'} to start from, or None
+
+    Returns:
+        (encoded bytes, stats with 'quality', 'subsampling', 'encodes',
+        'hint' (the start quality, or None), 'budget_bytes', 'over_budget',
+        'ssim' (luma) and 'psnr_db' (RGB))
+    """
+    from image_quality import compare_images
+
+    profile = OUTPUT_PROFILES[name]
+    budget = profile['budget_bytes']
+    options = profile.get('subsampling_options') or [None]
+    if hint is not None and hint.get('subsampling') not in options:
+        hint = None
+
+    candidates = []
+    if hint is not None:
+        candidate = encode_candidate(image, name, hint['subsampling'], hint['quality'])
+        if len(candidate['data']) <= budget:
+            candidates.append(candidate)
+    if not candidates:
+        candidates = [encode_candidate(image, name, subsampling) for subsampling in options]
+    encodes = sum(candidate['encodes'] for candidate in candidates)
+
+    for candidate in candidates:
+        decoded = Image.open(io.BytesIO(candidate['data']))
+        candidate['ssim'], candidate['psnr_db'] = compare_images(image, decoded)
+
+    fitting = [c for c in candidates if len(c['data']) <= budget]
+    if fitting:
+        best = max(fitting, key=lambda c: c['psnr_db'])
+    else:
+        best = min(candidates, key=lambda c: len(c['data']))
+
+    return best['data'], {
+        'quality': best['quality'],
+        'subsampling': best['subsampling'],
+        'encodes': encodes,
+        'hint': hint['quality'] if hint is not None else None,
+        'budget_bytes': budget,
+        'over_budget': len(best['data']) > budget,
+        'ssim': round(best['ssim'], 5),
+        'psnr_db': round(best['psnr_db'], 2),
+    }
+
+
+def encode_profile(composite: Image.Image, name: str,
+                   background: Optional[BackgroundFactory] = None) -> Tuple[bytes, Dict]:
+    """
+    Resize and encode the composite for one profile (runs on a worker thread).
+
+    Args:
+        composite: Finished full-size image
+        name: Profile name
+        background: See resize_for_profile()
+
+    Returns:
+        (encoded bytes, stats with 'size', 'bytes', 'seconds')
+    """
+    profile = OUTPUT_PROFILES[name]
+    start = time.perf_counter()
+    with span(f'render.encode.{name}', format=profile['format']) as current:
+        image = resize_for_profile(composite, name, background)
+        if profile['format'] in RGB_ONLY_FORMATS and image.mode != 'RGB':
+            image = image.convert('RGB')
+        if 'budget_bytes' in profile:
+            data, stats = encode_within_budget(image, name, load_encoder_hint(name))
+            save_encoder_hint(name, stats)
+        else:
+            data, stats = encode_image(image, profile['format'], profile['save']), {}
+        stats.update({
+            'size': list(image.size),
+            'bytes': len(data),
+            'seconds': round(time.perf_counter() - start, 4),
+        })
+        if current is not None:
+            current.attrs.update({key: value for key, value in stats.items() if key != 'size'})
+    count('render.bytes_out', len(data))
+    count('render.encoded')
+    return data, stats
+
+
+def write_output(path: Path, data: bytes) -> None:
+    """Write an encoded image atomically (readers never see a partial file)."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(path.name + '.tmp')
+    tmp_path.write_bytes(data)
+    os.replace(tmp_path, path)
+
+
+def encode_profiles(composite: Image.Image, outputs: Dict[str, Path], logger,
+                    background: Optional[BackgroundFactory] = None) -> Dict[str, Tuple[bytes, Dict]]:
+    """
+    Encode several profiles of one composite in parallel and write them out.
+
+    Args:
+        composite: Finished full-size image (not modified)
+        outputs: Profile name -> output path
+        logger: Logger instance
+        background: See resize_for_profile()
+
+    Returns:
+        Profile name -> (encoded bytes, stats)
+
+    Raises:
+        OSError / ValueError: If an encode or write fails
+    """
+    if not outputs:
+        return {}
+
+    composite.load()  # Make sure worker threads only read the pixel data
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=len(outputs), thread_name_prefix='encode') as pool:
+        futures = {name: pool.submit(encode_profile, composite, name, background) for name in outputs}
+        results = {name: future.result() for name, future in futures.items()}
+
+    for name, path in outputs.items():
+        data, stats = results[name]
+        write_output(path, data)
+        logger.info(f"  {name:10s} {describe_profile(name, stats):26s} "
+                    f"{stats['bytes'] / 1024:8.1f} KiB  {stats['seconds'] * 1000:7.1f} ms  {path.name}")
+        if 'budget_bytes' in stats:
+            log = logger.warning if stats['over_budget'] else logger.info
+            from_hint = f" from q{stats['hint']}" if stats['hint'] is not None else ''
+            log(f"  {'':10s} budget {stats['budget_bytes'] / 1024:.0f} KiB"
+                f"{' EXCEEDED at lowest quality' if stats['over_budget'] else ''}, "
+                f"{stats['encodes']} encodes{from_hint}, SSIM {stats['ssim']:.4f}, "
+                f"PSNR {stats['psnr_db']:.1f} dB vs lossless")
+
+    logger.info(f"Encoded {len(outputs)} output profile(s) in "
+                f"{(time.perf_counter() - start) * 1000:.1f} ms")
+    return results
@@ -0,0 +1,295 @@
+"""
+IMS Weather Forecast Automation - Opt-in Profiler
+
+Profiles selected stages with cProfile when a script runs with --profile.
+The profiled regions are the instrumentation spans (see instrumentation.py):
+workflow stages ('stage.image'), render sub-stages ('render.cities'), parsing
+('parse.cities'), SMTP phases and so on. A name matches a span by its full
+name or its last part, so '--profile cities' selects both 'stage.cities'
+and 'render.cities'. Without a list every span is a candidate; a span inside
+an already profiled span on the same thread is part of the outer profile.
+
+Output (output/profiles/<timestamp>/):
+    <span>.prof        cProfile stats per span name (pstats, snakeviz, ...)
+    stacks.collapsed   Collapsed stacks ("a;b;c <microseconds>") for
+                       flamegraph.pl, speedscope or inferno. cProfile records
+                       caller/callee pairs, not full stacks, so stacks are
+                       rebuilt from the call graph and time is split across
+                       callers in proportion to each caller's share.
+    allocations.txt    With --profile-alloc: top tracemalloc allocation
+                       sites per span (net growth between span start and end;
+                       tracemalloc is process-wide, so stages running at the
+                       same time on other threads show up too)
+
+Usage:
+    python forecast_workflow.py --dry-run --profile
+    python forecast_workflow.py --dry-run --profile image,cities --profile-alloc
+    python generate_forecast_map.py --profile render.cities
+"""
+
+import argparse
+import threading
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+
+from instrumentation import set_span_hook
+from lazy_import import lazy_import
+from utils import OUTPUT_DIR
+
+# Only needed once --profile is given; the scripts import this module for their CLI flags
+cProfile = lazy_import('cProfile')
+pstats = lazy_import('pstats')
+
+
+# ============================================================================
+# CONFIGURATION
+# ============================================================================
+
+PROFILE_DIR = OUTPUT_DIR / "profiles"
+COLLAPSED_FILENAME = "stacks.collapsed"
+ALLOCATIONS_FILENAME = "allocations.txt"
+
+TOP_ALLOCATIONS = 15       # Allocation sites listed per span
+MAX_STACK_DEPTH = 64       # Deeper rebuilt stacks are cut off
+MIN_STACK_MICROSECONDS = 1  # Smaller stack samples are dropped
+
+# pstats function key: (filename, line number, function name)
+FuncKey = Tuple[str, int, str]
+
+
+def parse_stage_list(value: Optional[str]) -> Optional[Set[str]]:
+    """Turn a --profile argument into a set of span names (None = all spans)."""
+    if value is None or value.strip().lower() in ('', 'all'):
+        return None
+    return {name.strip() for name in value.split(',') if name.strip()}
+
+
+# ============================================================================
+# COLLAPSED STACKS
+# ============================================================================
+
+def format_frame(func: FuncKey) -> str:
+    """Format a pstats function key as a flame-graph frame name."""
+    filename, line, name = func
+    if filename == '~':  # Built-in
+        return name.strip('<>').replace(';', ',')
+    return f"{name} ({Path(filename).name}:{line})".replace(';', ',')
+
+
+def collapse_stats(stats: 'pstats.Stats', root: str) -> Dict[str, int]:
+    """
+    Rebuild collapsed stacks from cProfile's caller/callee graph.
+
+    Each function's own time is spread over the paths that reach it, in
+    proportion to the cumulative time each caller spent in it.
+
+    Args:
+        stats: Profile statistics
+        root: Name of the root frame (the span name)
+
+    Returns:
+        Collapsed stack ("root;a;b") to own time in microseconds
+    """
+    raw = stats.stats  # func -> (cc, nc, tt, ct, callers)
+    callees: Dict[FuncKey, Dict[FuncKey, float]] = {}
+    for func, (_, _, _, _, callers) in raw.items():
+        for caller, (_, _, _, edge_ct) in callers.items():
+            callees.setdefault(caller, {})[func] = edge_ct
+
+    stacks: Dict[str, int] = {}
+
+    def walk(func: FuncKey, weight: float, path: List[FuncKey], prefix: str) -> None:
+        _, _, own_time, cumulative, _ = raw[func]
+        frames = f"{prefix};{format_frame(func)}"
+        micros = int(own_time * weight * 1e6)
+        if micros >= MIN_STACK_MICROSECONDS:
+            stacks[frames] = stacks.get(frames, 0) + micros
+        if len(path) >= MAX_STACK_DEPTH:
+            return
+        for callee, edge_ct in callees.get(func, {}).items():
+            callee_ct = raw[callee][3]
+            if callee in path or callee_ct <= 0:
+                continue  # Recursion is folded into the outermost call
+            walk(callee, weight * min(1.0, edge_ct / callee_ct), path + [callee], frames)
+
+    roots = [func for func, entry in raw.items() if not entry[4]]
+    for func in roots:
+        walk(func, 1.0, [func], root)
+    return stacks
+
+
+# ============================================================================
+# PROFILER
+# ============================================================================
+
+class Profiler:
+    """cProfile (and optional tracemalloc) collection for selected spans."""
+
+    def __init__(self, stages: Optional[Set[str]] = None, trace_allocations: bool = False,
+                 output_dir: Optional[Path] = None):
+        """
+        Args:
+            stages: Span names to profile (full or last dotted part); None = all
+            trace_allocations: If True, also report top tracemalloc allocation sites
+            output_dir: Directory for the output files (default: timestamped
+                folder under PROFILE_DIR)
+        """
+        self.stages = stages
+        self.trace_allocations = trace_allocations
+        self.output_dir = output_dir or PROFILE_DIR / datetime.now().strftime('%Y%m%d-%H%M%S')
+        self.stats: Dict[str, 'pstats.Stats'] = {}
+        self.allocations: Dict[str, List[tracemalloc.StatisticDiff]] = {}
+        self.started_tracing = False
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def selects(self, name: str) -> bool:
+        """Return True if a span name was selected for profiling."""
+        if self.stages is None:
+            return True
+        return name in self.stages or name.rsplit('.', 1)[-1] in self.stages
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        """Profile one span (used as the instrumentation span hook)."""
+        # cProfile allows one active profiler per thread: nested spans fold into the outer one
+        if not self.selects(name) or getattr(self._local, 'active', False):
+            yield
+            return
+
+        self._local.active = True
+        before = tracemalloc.take_snapshot() if self.trace_allocations else None
+        profile = cProfile.Profile()
+        profile.enable()
+        try:
+            yield
+        finally:
+            profile.disable()
+            self._local.active = False
+            after = tracemalloc.take_snapshot() if before is not None else None
+            with self._lock:
+                if name in self.stats:
+                    self.stats[name].add(profile)
+                else:
+                    self.stats[name] = pstats.Stats(profile)
+                if after is not None:
+                    diff = after.compare_to(before, 'lineno')
+                    self.allocations.setdefault(name, []).extend(diff[:TOP_ALLOCATIONS])
+
+    def start(self) -> None:
+        """Hook into every instrumentation span."""
+        if self.trace_allocations and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self.started_tracing = True
+        set_span_hook(self.stage)
+
+    def stop(self) -> None:
+        """Remove the span hook (and stop tracemalloc if this profiler started it)."""
+        set_span_hook(None)
+        if self.started_tracing:
+            tracemalloc.stop()
+            self.started_tracing = False
+
+    def write(self, logger) -> List[Path]:
+        """
+        Write .prof files, collapsed stacks and the allocation report.
+
+        Args:
+            logger: Logger instance
+
+        Returns:
+            Paths written
+        """
+        if not self.stats:
+            logger.warning("Profiler: no selected stage ran - nothing to write")
+            return []
+
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        written = []
+
+        stacks: Dict[str, int] = {}
+        for name, stats in sorted(self.stats.items()):
+            path = self.output_dir / f"{name}.prof"
+            stats.dump_stats(path)
+            written.append(path)
+            for frames, micros in collapse_stats(stats, name).items():
+                stacks[frames] = stacks.get(frames, 0) + micros
+
+        collapsed_path = self.output_dir / COLLAPSED_FILENAME
+        collapsed_path.write_text(
+            ''.join(f"{frames} {micros}\n" for frames, micros in sorted(stacks.items())),
+            encoding='utf-8'
+        )
+        written.append(collapsed_path)
+
+        if self.trace_allocations:
+            lines = []
+            for name, diffs in sorted(self.allocations.items()):
+                lines.append(f"== {name}")
+                top = sorted(diffs, key=lambda diff: diff.size_diff, reverse=True)[:TOP_ALLOCATIONS]
+                for diff in top:
+                    frame = diff.traceback[0]
+                    lines.append(f"{diff.size_diff / 1024:12.1f} KiB {diff.count_diff:+8d} blocks  "
+                                 f"{frame.filename}:{frame.lineno}")
+                lines.append("")
+            allocations_path = self.output_dir / ALLOCATIONS_FILENAME
+            allocations_path.write_text('\n'.join(lines), encoding='utf-8')
+            written.append(allocations_path)
+
+        logger.info(f"Profiles for {len(self.stats)} stage(s) written to {self.output_dir}")
+        logger.info(f"  Flame graph: flamegraph.pl {collapsed_path} > flame.svg "
+                    f"(or load it in speedscope)")
+        for name, stats in sorted(self.stats.items()):
+            logger.info(f"  {name}: {stats.total_tt:.3f}s profiled")
+        return written
+
+
+# ============================================================================
+# CLI HELPERS
+# ============================================================================
+
+def add_profile_arguments(parser: argparse.ArgumentParser) -> None:
+    """Add --profile / --profile-alloc to a script's argument parser."""
+    parser.add_argument(
+        '--profile',
+        nargs='?',
+        const='all',
+        metavar='STAGES',
+        help='Profile stages with cProfile (comma-separated span names, default: all); '
+             f'writes .prof files and flame-graph stacks to {PROFILE_DIR.relative_to(OUTPUT_DIR.parent)}/'
+    )
+    parser.add_argument(
+        '--profile-alloc',
+        action='store_true',
+        help='With --profile: also report the top tracemalloc allocation sites per stage'
+    )
+
+
+@contextmanager
+def profiling_from_args(args: argparse.Namespace, logger) -> Iterator[Optional[Profiler]]:
+    """
+    Profile the enclosed run if --profile was given, then write the output.
+
+    Args:
+        args: Parsed arguments (see add_profile_arguments)
+        logger: Logger instance
+
+    Yields:
+        The Profiler, or None if profiling is off
+    """
+    if args.profile is None:
+        if args.profile_alloc:
+            logger.warning("--profile-alloc has no effect without --profile")
+        yield None
+        return
+
+    profiler = Profiler(parse_stage_list(args.profile), trace_allocations=args.profile_alloc)
+    profiler.start()
+    try:
+        yield profiler
+    finally:
+        profiler.stop()
+        profiler.write(logger)
@@ -4,11 +4,15 @@ IMS Weather Forecast - Email Delivery (SMTP)
 Phase 4 v2: Simple SMTP implementation with Gmail
 
 Sends daily weather forecast images via email using Python's built-in SMTP library.
+Every recipient gets an individual copy, sent over persistent SMTP sessions
+- several at once for long recipient lists - at a rate-limited pace
+(see smtp_delivery.py).
 """
 
 import os
 import sys
 import argparse
+import logging
 import smtplib
 from email.mime.multipart import MIMEMultipart
 from email.mime.text import MIMEText
@@ -16,22 +20,34 @@ from email.mime.image import MIMEImage
 from pathlib import Path
 from datetime import datetime
 
-# CRITICAL: Load environment variables from .env file
-# This was MISSING in Phase 4 v1 - causing all local runs to fail!
-from dotenv import load_dotenv
-load_dotenv()
-
+from instrumentation import count, span
+from smtp_delivery import (
+    DELIVERY_SENT, FAN_OUT_DEADLINE, MAX_SESSIONS, PersonalizedMessage, fan_out, summarize_deliveries
+)
 from utils import setup_logging
 
-# Initialize logging
-logger = setup_logging()
+# Shared workflow logger; handlers are configured by the entry point
+# (setup_logging() in main() or in forecast_workflow.py), not on import
+logger = logging.getLogger('ims_forecast')
 
 # Paths
 BASE_DIR = Path(__file__).parent.absolute()
-DEFAULT_IMAGE_PATH = BASE_DIR / "output" / "daily_forecast.jpg"
+# Size-budgeted JPEG written next to the story by the 'email' output profile
+DEFAULT_IMAGE_PATH = BASE_DIR / "output" / "daily_forecast_email.jpg"
 EMAIL_TEMPLATE_PATH = BASE_DIR / "email_template.html"
 RECIPIENTS_FILE_PATH = BASE_DIR / "recipients.txt"
 
+# Seconds for SMTP connect and each command
+SMTP_TIMEOUT = 60
+
+# Optional delivery tuning from the environment (defaults in smtp_delivery.py)
+OPTIONAL_VARS = {
+    'SMTP_MAX_SESSIONS': int,    # Concurrent SMTP sessions
+    'SMTP_MAX_IN_FLIGHT': int,   # Messages being sent at the same time
+    'SMTP_RATE_LIMIT': float,    # Messages per second to the provider
+    'SMTP_DEADLINE': float,      # Seconds for the whole delivery
+}
+
 
 def validate_environment_variables():
     """
@@ -41,11 +57,18 @@ def validate_environment_variables():
     Fail fast with clear error messages.
 
     Returns:
-        dict: Dictionary of validated environment variables
+        dict: Dictionary of validated environment variables (optional
+            OPTIONAL_VARS only when set)
 
     Raises:
-        ValueError: If any required variable is missing
+        ValueError: If any required variable is missing or a number is invalid
     """
+    # CRITICAL: Load environment variables from .env file
+    # This was MISSING in Phase 4 v1 - causing all local runs to fail!
+    # Loaded here rather than on import, so importing this module has no side effects
+    from dotenv import load_dotenv
+    load_dotenv()
+
     required_vars = {
         'EMAIL_ADDRESS': 'Sender email address (Gmail account)',
         'EMAIL_PASSWORD': 'Gmail App Password (16 characters)',
@@ -85,6 +108,18 @@ def validate_environment_variables():
     except ValueError:
         raise ValueError(f"SMTP_PORT must be a number, got: {env_vars['SMTP_PORT']}")
 
+    for var_name, convert in OPTIONAL_VARS.items():
+        value = os.environ.get(var_name)
+        if not value:
+            continue
+        try:
+            number = convert(value)
+        except ValueError:
+            number = 0
+        if number <= 0:
+            raise ValueError(f"{var_name} must be a positive number, got: {value}")
+        env_vars[var_name] = number
+
     return env_vars
 
 
@@ -175,38 +210,192 @@ def create_email_html(forecast_date):
     return html
 
 
-def send_email(image_path=None, dry_run=False):
+class EmailSession:
     """
-    Send forecast email via SMTP with image attachment.
+    Everything needed to send the daily email except the image.
+
+    Built by prepare_email() before the image exists, so settings validation,
+    recipients, the HTML body and the SMTP connect/TLS/login can overlap
+    with download, extraction and rendering.
+    """
+
+    __slots__ = ('env_vars', 'recipients', 'forecast_date', 'html_body', 'server', 'delivery')
+
+    def __init__(self, env_vars, recipients, forecast_date, html_body, server=None):
+        self.env_vars = env_vars
+        self.recipients = recipients
+        self.forecast_date = forecast_date
+        self.html_body = html_body
+        self.server = server
+        # smtp_delivery.summarize_deliveries() counts, set by deliver_email()
+        self.delivery = None
+
+
+def connect_smtp(env_vars):
+    """
+    Open an authenticated SMTP connection (connect, STARTTLS, login).
 
     Args:
-        image_path (Path, optional): Path to forecast image. Defaults to output/daily_forecast.jpg
-        dry_run (bool): If True, validate settings but don't send email
+        env_vars (dict): Output of validate_environment_variables()
 
     Returns:
-        bool: True if email sent successfully (or dry-run passed), False otherwise
+        smtplib.SMTP: Logged-in connection
+    """
+    logger.info(f"Connecting to SMTP server {env_vars['SMTP_SERVER']}:{env_vars['SMTP_PORT']}...")
+    with span('smtp.connect'):
+        server = smtplib.SMTP(env_vars['SMTP_SERVER'], env_vars['SMTP_PORT'], timeout=SMTP_TIMEOUT)
+    server.set_debuglevel(0)  # Set to 1 for verbose SMTP debugging
+
+    logger.info("Starting TLS encryption...")
+    with span('smtp.starttls'):
+        server.starttls()
+
+    logger.info("Logging in to SMTP server...")
+    with span('smtp.login'):
+        server.login(env_vars['EMAIL_ADDRESS'], env_vars['EMAIL_PASSWORD'])
+    count('smtp.connections')
+    return server
+
+
+def close_email_session(session):
+    """Close the session's SMTP connection, if any (errors are ignored)."""
+    if session.server is None:
+        return
+    try:
+        session.server.quit()
+    except (smtplib.SMTPException, OSError):
+        session.server.close()
+    session.server = None
+
+
+def report_email_error(error, env_vars):
+    """
+    Log an email failure with troubleshooting hints.
+
+    Args:
+        error (Exception): The exception raised while preparing or sending
+        env_vars (dict): Validated settings (may be empty)
+    """
+    if isinstance(error, ValueError):
+        # Configuration error (missing env vars)
+        logger.error(str(error))
+
+    elif isinstance(error, smtplib.SMTPAuthenticationError):
+        logger.error("\n" + "="*70)
+        logger.error("SMTP Authentication Failed")
+        logger.error("="*70)
+        logger.error("\nPossible causes:")
+        logger.error("1. Incorrect email address or password")
+        logger.error("2. Not using an App Password (required for Gmail)")
+        logger.error("3. 2-Step Verification not enabled on Google account")
+        logger.error("\nTo fix:")
+        logger.error("1. Go to: https://myaccount.google.com/apppasswords")
+        logger.error("2. Generate a new 16-character App Password")
+        logger.error("3. Update EMAIL_PASSWORD in your .env file")
+        logger.error("="*70)
+
+    elif isinstance(error, smtplib.SMTPException):
+        logger.error(f"\nSMTP Error: {error}")
+        logger.error("\nCheck your SMTP settings:")
+        logger.error(f"  SMTP_SERVER: {env_vars.get('SMTP_SERVER', 'NOT SET')}")
+        logger.error(f"  SMTP_PORT: {env_vars.get('SMTP_PORT', 'NOT SET')}")
+        logger.error("\nFor Gmail, use:")
+        logger.error("  SMTP_SERVER=smtp.gmail.com")
+        logger.error("  SMTP_PORT=587")
+
+    else:
+        logger.error(f"\nUnexpected error: {error}")
+        logger.error("Full traceback:", exc_info=error)
+
+
+def prepare_email(connect=True):
+    """
+    Validate settings, read recipients, render the HTML body and log in to SMTP.
+
+    Args:
+        connect (bool): If False, skip the SMTP connection (dry run)
+
+    Returns:
+        EmailSession, or None if preparation failed
     """
+    env_vars = {}
     try:
         # Validate environment variables first
         logger.info("Validating environment variables...")
         env_vars = validate_environment_variables()
 
-        sender_email = env_vars['EMAIL_ADDRESS']
-        sender_password = env_vars['EMAIL_PASSWORD']
-        smtp_server = env_vars['SMTP_SERVER']
-        smtp_port = env_vars['SMTP_PORT']
-
         # Read recipients from recipients.txt
         logger.info("Reading recipients from recipients.txt...")
         recipients = read_recipients()
 
         logger.info(f"SMTP Configuration:")
-        logger.info(f"  Server: {smtp_server}:{smtp_port}")
-        logger.info(f"  From: {sender_email}")
+        logger.info(f"  Server: {env_vars['SMTP_SERVER']}:{env_vars['SMTP_PORT']}")
+        logger.info(f"  From: {env_vars['EMAIL_ADDRESS']}")
         logger.info(f"  To: {len(recipients)} recipient(s)")
         for recipient in recipients:
             logger.info(f"      - {recipient}")
 
+        # Get forecast date from today
+        forecast_date = datetime.now().strftime("%d/%m/%Y")
+        html_body = create_email_html(forecast_date)
+
+        server = connect_smtp(env_vars) if connect else None
+        return EmailSession(env_vars, recipients, forecast_date, html_body, server)
+
+    except Exception as e:
+        report_email_error(e, env_vars)
+        return None
+
+
+def build_email_message(session, image_path):
+    """
+    Build the MIME message: HTML body plus the forecast image as an attachment.
+
+    The message has no To: header; each recipient's copy gets its own
+    (see smtp_delivery.PersonalizedMessage).
+
+    Args:
+        session (EmailSession): Output of prepare_email()
+        image_path (Path): Forecast image to attach
+
+    Returns:
+        tuple: (MIMEMultipart message, attached image size in bytes)
+    """
+    msg = MIMEMultipart('related')
+    msg['From'] = session.env_vars['EMAIL_ADDRESS']
+    msg['Subject'] = f"תחזית מזג אוויר יומית - {session.forecast_date} | Daily Weather Forecast"
+    msg.attach(MIMEText(session.html_body, 'html', 'utf-8'))
+
+    # Attach forecast image
+    with open(image_path, 'rb') as img_file:
+        img_data = img_file.read()
+    image = MIMEImage(img_data, name=image_path.name)
+    image.add_header('Content-Disposition', 'attachment', filename=image_path.name)
+    msg.attach(image)
+    return msg, len(img_data)
+
+
+def deliver_email(session, image_path=None, dry_run=False):
+    """
+    Attach the image and send one copy per recipient over a prepared session.
+
+    The session's connection (opened by prepare_email) is the first of up
+    to SMTP_MAX_SESSIONS concurrent sessions; all are closed afterwards.
+    Dropped connections and 421 replies are handled by reconnecting, and
+    recipients not reached within SMTP_DEADLINE are reported as deferred
+    (see smtp_delivery.fan_out).
+
+    Args:
+        session (EmailSession): Output of prepare_email()
+        image_path (Path, optional): Path to forecast image. Defaults to output/daily_forecast_email.jpg
+        dry_run (bool): If True, build the message but don't send it
+
+    Returns:
+        bool: True if every recipient got the email (or dry-run passed),
+            False otherwise. After a send, session.delivery holds the
+            sent/refused/failed/deferred counts.
+    """
+    try:
         # Use default image path if not specified
         if image_path is None:
             image_path = DEFAULT_IMAGE_PATH
@@ -216,108 +405,92 @@ def send_email(image_path=None, dry_run=False):
         # Validate image exists
         if not image_path.exists():
             logger.error(f"Forecast image not found: {image_path}")
-            logger.error("Generate the image first using: python generate_forecast_image.py")
+            logger.error("Generate the image first using: python generate_forecast_map.py")
             return False
 
         logger.info(f"Image: {image_path}")
 
-        # Get forecast date from today
-        forecast_date = datetime.now().strftime("%d/%m/%Y")
-
-        # Create email message
+        # Create email message with the forecast image attached
         logger.info("Creating email message...")
-        msg = MIMEMultipart('related')
-        msg['From'] = sender_email
-        msg['To'] = ', '.join(recipients)  # Multiple recipients separated by commas
-        msg['Subject'] = f"תחזית מזג אוויר יומית - {forecast_date} | Daily Weather Forecast"
-
-        # Create HTML body
-        html_body = create_email_html(forecast_date)
-        msg.attach(MIMEText(html_body, 'html', 'utf-8'))
+        msg, image_size = build_email_message(session, image_path)
+        subject = msg['Subject']
 
-        # Attach forecast image
-        logger.info("Attaching forecast image...")
-        with open(image_path, 'rb') as img_file:
-            img_data = img_file.read()
-            image = MIMEImage(img_data, name=image_path.name)
-            image.add_header('Content-Disposition', 'attachment', filename=image_path.name)
-            msg.attach(image)
+        # Serialize once; each recipient's copy only adds To: and Message-ID:
+        with span('smtp.build_message'):
+            message = PersonalizedMessage(msg)
 
         if dry_run:
             logger.info("\n" + "="*70)
             logger.info("DRY RUN MODE - Email not sent")
             logger.info("="*70)
             logger.info("Email configuration validated successfully!")
-            logger.info(f"Subject: {msg['Subject']}")
-            logger.info(f"From: {msg['From']}")
-            logger.info(f"To: {msg['To']}")
-            logger.info(f"Attachment: {image_path.name} ({len(img_data):,} bytes)")
+            logger.info(f"Subject: {subject}")
+            logger.info(f"From: {message.sender}")
+            logger.info(f"To: {len(session.recipients)} recipient(s), one message each "
+                        f"({len(message.body):,} bytes per message)")
+            logger.info(f"Attachment: {image_path.name} ({image_size:,} bytes)")
             logger.info("="*70)
             logger.info("\nTo send the email for real, run without --dry-run flag")
             return True
 
-        # Send email via SMTP
-        logger.info(f"Connecting to SMTP server {smtp_server}:{smtp_port}...")
-
-        with smtplib.SMTP(smtp_server, smtp_port) as server:
-            server.set_debuglevel(0)  # Set to 1 for verbose SMTP debugging
-
-            logger.info("Starting TLS encryption...")
-            server.starttls()
-
-            logger.info("Logging in to SMTP server...")
-            server.login(sender_email, sender_password)
-
-            logger.info("Sending email...")
-            server.send_message(msg)
+        # The first SMTP session takes over (and closes) the connection opened by prepare_email()
+        env_vars = session.env_vars
+        rate = env_vars.get('SMTP_RATE_LIMIT')
+        results = fan_out(
+            message, session.recipients,
+            connect=lambda: connect_smtp(env_vars),
+            provider=env_vars['SMTP_SERVER'],
+            max_sessions=env_vars.get('SMTP_MAX_SESSIONS', MAX_SESSIONS),
+            max_in_flight=env_vars.get('SMTP_MAX_IN_FLIGHT'),
+            deadline_seconds=env_vars.get('SMTP_DEADLINE', FAN_OUT_DEADLINE),
+            rate_limit=(rate, max(1, int(rate))) if rate else None,
+            server=session.server,
+            logger=logger,
+        )
+        session.server = None
+        summary = summarize_deliveries(results)
+        session.delivery = summary
 
         logger.info("\n" + "="*70)
-        logger.info("✓ Email sent successfully!")
+        if summary[DELIVERY_SENT] == summary['total']:
+            logger.info("✓ Email sent successfully!")
+        elif summary[DELIVERY_SENT]:
+            logger.warning(f"⚠ Email sent to {summary[DELIVERY_SENT]} of {summary['total']} recipients")
+        else:
+            logger.error("✗ Email was not delivered to any recipient")
         logger.info("="*70)
-        logger.info(f"From: {sender_email}")
-        logger.info(f"To: {len(recipients)} recipient(s)")
-        for recipient in recipients:
-            logger.info(f"    - {recipient}")
-        logger.info(f"Subject: {msg['Subject']}")
+        logger.info(f"From: {message.sender}")
+        logger.info(f"To: {summary['sent']} sent, {summary['refused']} refused, "
+                    f"{summary['failed']} failed, {summary['deferred']} deferred")
+        logger.info(f"Subject: {subject}")
         logger.info(f"Attachment: {image_path.name}")
         logger.info("="*70)
 
-        return True
+        return summary[DELIVERY_SENT] == summary['total']
 
-    except ValueError as e:
-        # Configuration error (missing env vars)
-        logger.error(str(e))
+    except Exception as e:
+        report_email_error(e, session.env_vars)
         return False
 
-    except smtplib.SMTPAuthenticationError:
-        logger.error("\n" + "="*70)
-        logger.error("SMTP Authentication Failed")
-        logger.error("="*70)
-        logger.error("\nPossible causes:")
-        logger.error("1. Incorrect email address or password")
-        logger.error("2. Not using an App Password (required for Gmail)")
-        logger.error("3. 2-Step Verification not enabled on Google account")
-        logger.error("\nTo fix:")
-        logger.error("1. Go to: https://myaccount.google.com/apppasswords")
-        logger.error("2. Generate a new 16-character App Password")
-        logger.error("3. Update EMAIL_PASSWORD in your .env file")
-        logger.error("="*70)
-        return False
+    finally:
+        close_email_session(session)
 
-    except smtplib.SMTPException as e:
-        logger.error(f"\nSMTP Error: {e}")
-        logger.error("\nCheck your SMTP settings:")
-        logger.error(f"  SMTP_SERVER: {env_vars.get('SMTP_SERVER', 'NOT SET')}")
-        logger.error(f"  SMTP_PORT: {env_vars.get('SMTP_PORT', 'NOT SET')}")
-        logger.error("\nFor Gmail, use:")
-        logger.error("  SMTP_SERVER=smtp.gmail.com")
-        logger.error("  SMTP_PORT=587")
-        return False
 
-    except Exception as e:
-        logger.error(f"\nUnexpected error: {e}")
-        logger.exception("Full traceback:")
+def send_email(image_path=None, dry_run=False):
+    """
+    Send forecast email via SMTP with image attachment.
+
+    Args:
+        image_path (Path, optional): Path to forecast image. Defaults to output/daily_forecast_email.jpg
+        dry_run (bool): If True, validate settings but don't send email
+
+    Returns:
+        bool: True if email sent successfully (or dry-run passed), False otherwise
+    """
+    session = prepare_email(connect=not dry_run)
+    if session is None:
         return False
+    return deliver_email(session, image_path, dry_run)
 
 
 def main():
@@ -330,7 +503,7 @@ Examples:
   # Test configuration without sending (recommended first step)
   python send_email_smtp.py --dry-run
 
-  # Send email with default image (output/daily_forecast.jpg)
+  # Send email with default image (output/daily_forecast_email.jpg)
   python send_email_smtp.py
 
   # Send email with specific image
@@ -357,7 +530,7 @@ Security Notes:
     parser.add_argument(
         '--image-path',
         type=str,
-        help='Path to forecast image (default: output/daily_forecast.jpg)'
+        help='Path to forecast image (default: output/daily_forecast_email.jpg)'
     )
 
     parser.add_argument(
@@ -368,6 +541,7 @@ Security Notes:
 
     args = parser.parse_args()
 
+    setup_logging()
     logger.info("="*70)
     logger.info("IMS Weather Forecast - Email Delivery (Phase 4 v2)")
     logger.info("="*70)
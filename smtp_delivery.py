@@ -0,0 +1,527 @@
+"""
+IMS Weather Forecast Automation - SMTP Delivery Engine
+
+Sends one message per recipient - nobody sees the rest of the list, and a
+bounce names exactly one address - over persistent, authenticated SMTP
+sessions, so connect / STARTTLS / login is paid once per session instead of
+once per message.
+
+- PersonalizedMessage serializes the MIME message (body and encoded image)
+  once; every copy shares those bytes and only adds its own To: and
+  Message-ID: headers in front.
+- SmtpSession keeps one connection open and sends message after message
+  through it. When the server drops the connection, replies 421 (service
+  not available, closing) or a command times out, the session reconnects
+  and retries the message. Connections are also recycled after
+  MESSAGES_PER_CONNECTION messages, since providers cap them.
+- Other 4xx replies are retried with backoff on the same connection; 5xx
+  replies are permanent and recorded against the recipient.
+- fan_out() spreads the recipients over up to N sessions on worker threads,
+  paced by a per-provider TokenBucket, with a cap on messages in flight and
+  a deadline for the whole fan-out. Recipients not reached in time are
+  'deferred'. It returns a DeliveryResult per recipient.
+
+smtplib has no RFC 2920 command pipelining, so messages on a session are
+sent back to back (one MAIL/RCPT/DATA round trip each) on the open connection.
+benchmarks/smtp_stand_in.py is a local stand-in server with fault injection
+for exercising the engine offline (see benchmarks/bench_smtp.py).
+"""
+
+import math
+import queue
+import random
+import smtplib
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from email.message import Message
+from email.utils import formatdate, make_msgid, parseaddr
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from instrumentation import count, span
+
+
+# ============================================================================
+# CONFIGURATION
+# ============================================================================
+
+MAX_ATTEMPTS = 3             # Per recipient, including reconnects
+RETRY_DELAY = 0.5            # seconds (base delay for exponential backoff)
+RETRY_DELAY_MAX = 8          # seconds (backoff cap)
+MESSAGES_PER_CONNECTION = 100  # Reconnect after this many messages on one connection
+MAX_CONSECUTIVE_FAILURES = 3   # A session gives up after this many failed recipients in a row
+
+# Fan-out
+MAX_SESSIONS = 4               # Concurrent SMTP sessions (connections)
+RECIPIENTS_PER_SESSION = 25    # Open another session only for this many more recipients
+FAN_OUT_DEADLINE = 600         # seconds (whole fan-out, all sessions and retries)
+LOG_EACH_RECIPIENT_LIMIT = 50  # Above this many recipients, only problems are logged one by one
+
+# Sending rate per provider (SMTP host): (messages per second, burst)
+PROVIDER_RATE_LIMITS = {
+    'smtp.gmail.com': (5.0, 10),
+}
+DEFAULT_RATE_LIMIT = (10.0, 20)
+
+SERVICE_NOT_AVAILABLE = 421  # Server is closing the connection; reconnect and retry
+
+# Per-recipient delivery outcome
+DELIVERY_SENT = 'sent'
+DELIVERY_REFUSED = 'refused'  # Permanent (5xx) rejection of the recipient or message - a bounce
+DELIVERY_FAILED = 'failed'    # Retries ran out, or the session itself failed (login, sender)
+DELIVERY_DEFERRED = 'deferred'  # Not delivered before the deadline - try again later
+
+# How a failed attempt is handled
+ERROR_RECONNECT = 'reconnect'
+ERROR_RETRY = 'retry'
+ERROR_PERMANENT = 'permanent'
+
+
+def get_retry_delay(attempt: int) -> float:
+    """
+    Exponential backoff with full jitter.
+
+    Args:
+        attempt: Attempt number that just failed (1-based)
+
+    Returns:
+        Seconds to wait before the next attempt
+    """
+    cap = min(RETRY_DELAY_MAX, RETRY_DELAY * (2 ** (attempt - 1)))
+    return random.uniform(0, cap)
+
+
+def classify_error(error: Exception, recipient: str) -> Tuple[str, Optional[int], str]:
+    """
+    Decide how to handle an exception raised while sending to one recipient.
+
+    Args:
+        error: Exception from smtplib (or the socket underneath)
+        recipient: Address the message was sent to
+
+    Returns:
+        (ERROR_RECONNECT / ERROR_RETRY / ERROR_PERMANENT, SMTP code or None, detail)
+    """
+    code = None
+    detail = str(error)
+    if isinstance(error, smtplib.SMTPRecipientsRefused):
+        code, response = error.recipients.get(recipient, (None, b''))
+        detail = response.decode('utf-8', 'replace') if isinstance(response, bytes) else str(response)
+    elif isinstance(error, smtplib.SMTPResponseException):
+        code = error.smtp_code
+        detail = error.smtp_error.decode('utf-8', 'replace') if isinstance(error.smtp_error, bytes) \
+            else str(error.smtp_error)
+    elif isinstance(error, (smtplib.SMTPServerDisconnected, OSError)):
+        # Includes TimeoutError and ConnectionError
+        return ERROR_RECONNECT, None, detail or type(error).__name__
+    else:
+        return ERROR_PERMANENT, None, detail
+
+    if code == SERVICE_NOT_AVAILABLE or code is None or code < 400:
+        return ERROR_RECONNECT, code, detail
+    if code < 500:
+        return ERROR_RETRY, code, detail
+    return ERROR_PERMANENT, code, detail
+
+
+# ============================================================================
+# MESSAGES
+# ============================================================================
+
+class PersonalizedMessage:
+    """A MIME message serialized once and addressed to one recipient at a time."""
+
+    def __init__(self, msg: Message):
+        """
+        Args:
+            msg: Complete message; its To: and Message-ID: headers are
+                replaced per recipient (the message object is modified)
+        """
+        del msg['To']
+        del msg['Message-ID']
+        if msg['Date'] is None:
+            msg['Date'] = formatdate(localtime=True)
+
+        self.sender = parseaddr(msg['From'])[1]
+        self.domain = self.sender.rpartition('@')[2] or 'localhost'
+        # SMTP wants CRLF line endings; smtplib only fixes them for str messages
+        self.body = msg.as_bytes(policy=msg.policy.clone(linesep='\r\n'))
+
+    def for_recipient(self, recipient: str) -> bytes:
+        """
+        Return the serialized message for one recipient.
+
+        Args:
+            recipient: Email address (ASCII)
+
+        Returns:
+            Message bytes with To: and a fresh Message-ID: header
+
+        Raises:
+            UnicodeEncodeError: If the address is not ASCII
+        """
+        headers = f"To: {recipient}\r\nMessage-ID: {make_msgid(domain=self.domain)}\r\n"
+        return headers.encode('ascii') + self.body
+
+
+class DeliveryResult:
+    """Delivery outcome for one recipient."""
+
+    __slots__ = ('recipient', 'status', 'code', 'detail', 'attempts', 'session', 'seconds')
+
+    def __init__(self, recipient: str, session: str):
+        self.recipient = recipient
+        self.status = DELIVERY_FAILED
+        self.code: Optional[int] = None
+        self.detail = ''
+        self.attempts = 0
+        self.session = session
+        self.seconds = 0.0
+
+    def to_dict(self) -> Dict:
+        """Return the result as a plain dictionary."""
+        return {field: getattr(self, field) for field in self.__slots__}
+
+    def __repr__(self) -> str:
+        return f"DeliveryResult({self.recipient!r}, {self.status}, code={self.code}, attempts={self.attempts})"
+
+
+# ============================================================================
+# SESSION
+# ============================================================================
+
+class SmtpSession:
+    """One persistent SMTP connection, reopened whenever the server drops it."""
+
+    def __init__(self, connect: Callable[[], smtplib.SMTP], name: str = 'smtp',
+                 server: Optional[smtplib.SMTP] = None, logger=None):
+        """
+        Args:
+            connect: Opens a ready (TLS + logged-in) connection, e.g.
+                lambda: connect_smtp(env_vars)
+            name: Session name for logs and results
+            server: Already open connection to start with (e.g. opened while
+                the image was rendering)
+            logger: Optional logger
+        """
+        self.connect = connect
+        self.name = name
+        self.server = server
+        self.logger = logger
+        self.connections = 1 if server is not None else 0
+        self.messages_on_connection = 0
+        self.sent = 0
+        self.reconnects = 0
+
+    def open(self) -> smtplib.SMTP:
+        """Return the open connection, connecting (again) if needed."""
+        if self.server is not None and self.messages_on_connection >= MESSAGES_PER_CONNECTION:
+            self.close()  # Recycle before the provider cuts us off
+        if self.server is None:
+            self.server = self.connect()
+            self.connections += 1
+            self.messages_on_connection = 0
+        return self.server
+
+    def close(self) -> None:
+        """Close the connection politely (errors are ignored)."""
+        if self.server is None:
+            return
+        try:
+            self.server.quit()
+        except (smtplib.SMTPException, OSError):
+            self.server.close()
+        self.server = None
+
+    def drop(self, reason: str) -> None:
+        """Abandon a broken connection; the next send reconnects."""
+        if self.logger:
+            self.logger.warning(f"{self.name}: connection lost ({reason}) - reconnecting")
+        if self.server is not None:
+            self.server.close()
+            self.server = None
+        self.reconnects += 1
+        count('smtp.reconnects')
+
+    def send(self, sender: str, recipient: str, data: bytes,
+             deadline: Optional[float] = None) -> DeliveryResult:
+        """
+        Send one message to one recipient, reconnecting / retrying as needed.
+
+        A message whose DATA was sent but not acknowledged (timeout, dropped
+        connection) is sent again, so a recipient may in rare cases get it twice.
+
+        Args:
+            sender: Envelope sender
+            recipient: Envelope recipient
+            data: Serialized message
+            deadline: time.monotonic() value after which no retry is started;
+                the result is then DELIVERY_DEFERRED
+
+        Returns:
+            DeliveryResult
+        """
+        start = time.perf_counter()
+        result = DeliveryResult(recipient, self.name)
+
+        for attempt in range(1, MAX_ATTEMPTS + 1):
+            result.attempts = attempt
+            try:
+                self.open().sendmail(sender, [recipient], data)
+            except Exception as e:
+                action, result.code, result.detail = classify_error(e, recipient)
+                if action == ERROR_PERMANENT:
+                    # Only a rejected recipient or message is a bounce; login and
+                    # sender errors are failures of the session
+                    if isinstance(e, (smtplib.SMTPRecipientsRefused, smtplib.SMTPDataError)):
+                        result.status = DELIVERY_REFUSED
+                    break
+                if action == ERROR_RECONNECT:
+                    self.drop(result.detail or f"code {result.code}")
+                if attempt < MAX_ATTEMPTS:
+                    # A dropped idle connection is reopened at once; anything else backs off
+                    delay = 0.0 if action == ERROR_RECONNECT and attempt == 1 else get_retry_delay(attempt)
+                    if deadline is not None and time.monotonic() + delay >= deadline:
+                        result.status = DELIVERY_DEFERRED
+                        break
+                    time.sleep(delay)
+                continue
+
+            self.messages_on_connection += 1
+            self.sent += 1
+            result.status = DELIVERY_SENT
+            result.code = 250
+            result.detail = ''
+            count('smtp.bytes_out', len(data))
+            break
+
+        result.seconds = round(time.perf_counter() - start, 4)
+        return result
+
+
+# ============================================================================
+# DELIVERY
+# ============================================================================
+
+class TokenBucket:
+    """Thread-safe token bucket: `rate` tokens per second, at most `burst` saved up."""
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, deadline: Optional[float] = None) -> bool:
+        """
+        Take one token, waiting for it if necessary.
+
+        Args:
+            deadline: time.monotonic() value to give up at (None = wait as long as needed)
+
+        Returns:
+            True if a token was taken, False if it would not arrive before the deadline
+        """
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return True
+                wait = (1 - self.tokens) / self.rate
+            if deadline is not None and now + wait > deadline:
+                return False
+            time.sleep(wait)
+
+
+_buckets: Dict[str, TokenBucket] = {}
+_buckets_lock = threading.Lock()
+
+
+def get_provider_bucket(provider: str, rate_limit: Optional[Tuple[float, int]] = None) -> TokenBucket:
+    """
+    Return the shared token bucket of an SMTP provider.
+
+    Args:
+        provider: SMTP host name
+        rate_limit: (messages per second, burst); default from
+            PROVIDER_RATE_LIMITS or DEFAULT_RATE_LIMIT. Only used when the
+            bucket is created.
+
+    Returns:
+        TokenBucket shared by every fan-out to this provider in the process
+    """
+    with _buckets_lock:
+        bucket = _buckets.get(provider)
+        if bucket is None:
+            rate, burst = rate_limit or PROVIDER_RATE_LIMITS.get(provider, DEFAULT_RATE_LIMIT)
+            bucket = _buckets[provider] = TokenBucket(rate, burst)
+        return bucket
+
+
+def deliver_one(message: PersonalizedMessage, recipient: str, session: SmtpSession,
+                deadline: Optional[float] = None) -> DeliveryResult:
+    """
+    Send a message's copy for one recipient over a session.
+
+    Args:
+        message: Serialized message
+        recipient: Email address
+        session: SmtpSession to send through
+        deadline: time.monotonic() value after which no retry is started
+
+    Returns:
+        DeliveryResult
+    """
+    try:
+        data = message.for_recipient(recipient)
+    except UnicodeEncodeError:
+        result = DeliveryResult(recipient, session.name)
+        result.status = DELIVERY_REFUSED
+        result.detail = 'non-ASCII address'
+        return result
+    return session.send(message.sender, recipient, data, deadline)
+
+
+def get_session_count(recipients: int, max_sessions: int = MAX_SESSIONS) -> int:
+    """Number of sessions worth opening for a recipient count (1 per RECIPIENTS_PER_SESSION)."""
+    return max(1, min(max_sessions, math.ceil(recipients / RECIPIENTS_PER_SESSION)))
+
+
+def fan_out(message: PersonalizedMessage, recipients: Sequence[str],
+            connect: Callable[[], smtplib.SMTP], provider: str,
+            max_sessions: int = MAX_SESSIONS, max_in_flight: Optional[int] = None,
+            deadline_seconds: float = FAN_OUT_DEADLINE,
+            rate_limit: Optional[Tuple[float, int]] = None,
+            server: Optional[smtplib.SMTP] = None, logger=None) -> List[DeliveryResult]:
+    """
+    Send a personalized copy of a message to every recipient over concurrent sessions.
+
+    Each worker thread owns one SmtpSession and takes the next recipient
+    from a shared queue, so a slow or reconnecting session does not hold
+    up the others. Every message first takes a token from the provider's
+    bucket. A session that fails MAX_CONSECUTIVE_FAILURES recipients in a
+    row is closed; if every session gave up, the remaining recipients are
+    marked failed without being attempted. No message is started after
+    the deadline: recipients still waiting when it passes (for the queue,
+    a token or a free in-flight slot) are marked deferred.
+
+    Args:
+        message: Serialized message, shared by all sessions
+        recipients: Email addresses, one message each
+        connect: Opens a ready (TLS + logged-in) connection; called from
+            the worker threads
+        provider: SMTP host, selects the rate limit
+        max_sessions: Upper bound on concurrent sessions (see get_session_count)
+        max_in_flight: Upper bound on messages being sent at the same time
+            (default: one per session)
+        deadline_seconds: Time budget for the whole fan-out
+        rate_limit: (messages per second, burst) overriding the provider default
+        server: Already open connection, used by the first session
+        logger: Optional logger
+
+    Returns:
+        One DeliveryResult per recipient, in order
+    """
+    deadline = time.monotonic() + deadline_seconds
+    bucket = get_provider_bucket(provider, rate_limit)
+    sessions = get_session_count(len(recipients), max_sessions)
+    in_flight = threading.BoundedSemaphore(max_in_flight or sessions)
+    log_each = logger is not None and len(recipients) <= LOG_EACH_RECIPIENT_LIMIT
+
+    pending: 'queue.SimpleQueue[Tuple[int, str]]' = queue.SimpleQueue()
+    for position, recipient in enumerate(recipients):
+        pending.put((position, recipient))
+    results: List[Optional[DeliveryResult]] = [None] * len(recipients)
+    stats = []
+
+    def finish(position: int, result: DeliveryResult) -> None:
+        results[position] = result
+        count(f'smtp.{result.status}')
+        if logger is not None and (log_each or result.status != DELIVERY_SENT):
+            log_delivery_result(result, logger)
+
+    def defer(position: int, recipient: str, session: SmtpSession) -> None:
+        result = DeliveryResult(recipient, session.name)
+        result.status = DELIVERY_DEFERRED
+        result.detail = 'fan-out deadline reached'
+        finish(position, result)
+
+    def work(index: int) -> None:
+        session = SmtpSession(connect, name=f'smtp-{index + 1}',
+                              server=server if index == 0 else None, logger=logger)
+        failures = 0
+        try:
+            while failures < MAX_CONSECUTIVE_FAILURES:
+                try:
+                    position, recipient = pending.get_nowait()
+                except queue.Empty:
+                    return
+                if time.monotonic() >= deadline or not bucket.acquire(deadline):
+                    defer(position, recipient, session)
+                    continue
+                with in_flight:
+                    # Waiting for a free slot can run past the deadline too
+                    if time.monotonic() >= deadline:
+                        defer(position, recipient, session)
+                        continue
+                    result = deliver_one(message, recipient, session, deadline)
+                failures = failures + 1 if result.status == DELIVERY_FAILED else 0
+                finish(position, result)
+            if logger is not None:
+                logger.warning(f"{session.name}: {failures} failures in a row - closing session")
+        finally:
+            session.close()
+            stats.append(session)
+
+    if logger is not None:
+        logger.info(f"Sending {len(recipients)} message(s) over {sessions} SMTP session(s) "
+                    f"({bucket.rate:g}/s to {provider}, deadline {deadline_seconds:.0f}s)")
+    with span('smtp.deliver', recipients=len(recipients), sessions=sessions) as current:
+        with ThreadPoolExecutor(max_workers=sessions, thread_name_prefix='smtp') as pool:
+            for future in [pool.submit(work, index) for index in range(sessions)]:
+                future.result()
+
+        for position, recipient in enumerate(recipients):
+            if results[position] is None:
+                result = DeliveryResult(recipient, 'none')
+                result.detail = 'not attempted: every SMTP session failed'
+                finish(position, result)
+        connections = sum(session.connections for session in stats)
+        reconnects = sum(session.reconnects for session in stats)
+        if current is not None:
+            current.attrs.update(connections=connections, reconnects=reconnects)
+    if logger is not None:
+        logger.info(f"SMTP: {sessions} session(s), {connections} connection(s), {reconnects} reconnect(s)")
+    return results
+
+
+def log_delivery_result(result: DeliveryResult, logger) -> None:
+    """Log one recipient's outcome."""
+    if result.status == DELIVERY_SENT:
+        retries = f", {result.attempts} attempts" if result.attempts > 1 else ''
+        logger.info(f"    ✓ {result.recipient} ({result.seconds * 1000:.0f} ms{retries})")
+    else:
+        code = f" {result.code}" if result.code else ''
+        logger.error(f"    ✗ {result.recipient}: {result.status}{code} {result.detail} "
+                     f"(after {result.attempts} attempt(s))")
+
+
+def summarize_deliveries(results: Sequence[DeliveryResult]) -> Dict[str, int]:
+    """
+    Count delivery results by status.
+
+    Args:
+        results: DeliveryResults
+
+    Returns:
+        {'sent': n, 'refused': n, 'failed': n, 'deferred': n, 'total': n}
+    """
+    summary = {DELIVERY_SENT: 0, DELIVERY_REFUSED: 0, DELIVERY_FAILED: 0, DELIVERY_DEFERRED: 0}
+    for result in results:
+        summary[result.status] += 1
+    summary['total'] = len(results)
+    return summary
@@ -0,0 +1,234 @@
+"""
+IMS Weather Forecast Automation - Stage Graph Executor
+
+Small dependency-graph executor for the workflow. Each stage is a named
+callable with the stages it depends on; a stage starts as soon as all of
+its dependencies have finished, so independent stages (download, base-layer
+load, SMTP login; cities and country extraction) overlap on a thread pool
+and the run takes as long as its longest chain instead of the sum of all
+stages.
+
+A stage receives its dependencies' results as keyword arguments named after
+them. A stage fails by raising; stages downstream of a failed or skipped
+stage are skipped. After a run, critical_path() reports the chain of stages
+that determined the end-to-end latency.
+"""
+
+import logging
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+from instrumentation import span
+
+
+# Stage status
+STAGE_OK = 'ok'
+STAGE_FAILED = 'failed'
+STAGE_SKIPPED = 'skipped'
+
+
+class StageFailed(Exception):
+    """Raised by a stage to fail it with a message (no traceback logged)."""
+
+
+class Stage:
+    """One node of the graph and, after a run, its outcome and timing."""
+
+    __slots__ = ('name', 'func', 'deps', 'status', 'result', 'error', 'start', 'end')
+
+    def __init__(self, name: str, func: Callable, deps: Sequence[str] = ()):
+        """
+        Args:
+            name: Unique stage name (also the keyword its result is passed as)
+            func: Callable taking the dependencies' results as keyword arguments
+            deps: Names of the stages this one needs
+        """
+        self.name = name
+        self.func = func
+        self.deps = tuple(deps)
+        self.status: Optional[str] = None
+        self.result: Any = None
+        self.error: Optional[str] = None
+        self.start: Optional[float] = None  # Seconds since the run started
+        self.end: Optional[float] = None
+
+    @property
+    def seconds(self) -> float:
+        """Wall time of the stage (0 if it never ran)."""
+        if self.start is None or self.end is None:
+            return 0.0
+        return self.end - self.start
+
+
+class StageGraph:
+    """Dependency graph of workflow stages, run concurrently where possible."""
+
+    def __init__(self, logger: logging.Logger, max_workers: Optional[int] = None):
+        """
+        Args:
+            logger: Logger instance
+            max_workers: Thread pool size (default: one thread per stage)
+        """
+        self.logger = logger
+        self.max_workers = max_workers
+        self.stages: Dict[str, Stage] = {}
+        self.wall_seconds = 0.0
+
+    def add(self, name: str, func: Callable, deps: Sequence[str] = ()) -> None:
+        """
+        Declare a stage.
+
+        Dependencies must already be declared, so the graph is acyclic by
+        construction.
+
+        Raises:
+            ValueError: If the name is taken or a dependency is unknown
+        """
+        if name in self.stages:
+            raise ValueError(f"duplicate stage: {name}")
+        unknown = [dep for dep in deps if dep not in self.stages]
+        if unknown:
+            raise ValueError(f"stage {name} depends on unknown stage(s): {', '.join(unknown)}")
+        self.stages[name] = Stage(name, func, deps)
+
+    def result(self, name: str, default: Any = None) -> Any:
+        """Return a stage's result, or default if it didn't complete."""
+        stage = self.stages.get(name)
+        if stage is None or stage.status != STAGE_OK:
+            return default
+        return stage.result
+
+    # ------------------------------------------------------------------------
+    # Execution
+    # ------------------------------------------------------------------------
+
+    def _run_stage(self, stage: Stage, run_start: float) -> Any:
+        stage.start = time.perf_counter() - run_start
+        try:
+            kwargs = {dep: self.stages[dep].result for dep in stage.deps}
+            with span(f'stage.{stage.name}'):
+                return stage.func(**kwargs)
+        finally:
+            stage.end = time.perf_counter() - run_start
+
+    def _skip_dependents(self, failed: str, waiting: Dict[str, Stage]) -> None:
+        for name, stage in list(waiting.items()):
+            if failed in stage.deps and name in waiting:
+                del waiting[name]
+                stage.status = STAGE_SKIPPED
+                stage.error = f"{failed} did not complete"
+                self.logger.warning(f"Stage '{name}' skipped: {stage.error}")
+                self._skip_dependents(name, waiting)
+
+    def run(self) -> bool:
+        """
+        Run every stage, each as soon as its dependencies are done.
+
+        Returns:
+            True if every stage completed, False if any failed or was skipped
+        """
+        run_start = time.perf_counter()
+        waiting = dict(self.stages)
+        running = {}
+
+        with ThreadPoolExecutor(max_workers=self.max_workers or max(1, len(self.stages)),
+                                thread_name_prefix='stage') as pool:
+            while waiting or running:
+                ready = [stage for stage in waiting.values()
+                         if all(self.stages[dep].status == STAGE_OK for dep in stage.deps)]
+                for stage in ready:
+                    del waiting[stage.name]
+                    running[pool.submit(self._run_stage, stage, run_start)] = stage
+
+                if not running:
+                    break  # Only stages blocked by failures remain (already skipped)
+
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    stage = running.pop(future)
+                    try:
+                        stage.result = future.result()
+                        stage.status = STAGE_OK
+                    except StageFailed as e:
+                        stage.status = STAGE_FAILED
+                        stage.error = str(e)
+                        self.logger.error(f"Stage '{stage.name}' failed: {e}")
+                    except Exception as e:
+                        stage.status = STAGE_FAILED
+                        stage.error = f"{type(e).__name__}: {e}"
+                        self.logger.error(f"Stage '{stage.name}' failed: {stage.error}", exc_info=e)
+
+                    if stage.status != STAGE_OK:
+                        self._skip_dependents(stage.name, waiting)
+
+        self.wall_seconds = time.perf_counter() - run_start
+        return all(stage.status == STAGE_OK for stage in self.stages.values())
+
+    # ------------------------------------------------------------------------
+    # Reporting
+    # ------------------------------------------------------------------------
+
+    def critical_path(self) -> List[Stage]:
+        """
+        Return the chain of stages that determined the run's end time.
+
+        Starts from the stage that finished last and walks back through the
+        dependency that finished last (the one it was waiting on).
+
+        Returns:
+            Stages in execution order (empty before a run)
+        """
+        finished = [stage for stage in self.stages.values() if stage.end is not None]
+        if not finished:
+            return []
+
+        path = [max(finished, key=lambda stage: stage.end)]
+        while True:
+            deps = [self.stages[dep] for dep in path[-1].deps if self.stages[dep].end is not None]
+            if not deps:
+                break
+            path.append(max(deps, key=lambda stage: stage.end))
+        return path[::-1]
+
+    def summary(self) -> Dict:
+        """
+        Return timings for the run report.
+
+        Returns:
+            Dict with per-stage start/end/seconds/status, the critical path,
+            its length, the serial sum of all stages and the wall time
+        """
+        path = self.critical_path()
+        return {
+            'stages': {
+                stage.name: {
+                    'status': stage.status,
+                    'deps': list(stage.deps),
+                    'start': round(stage.start, 4) if stage.start is not None else None,
+                    'end': round(stage.end, 4) if stage.end is not None else None,
+                    'seconds': round(stage.seconds, 4),
+                    **({'error': stage.error} if stage.error else {}),
+                }
+                for stage in self.stages.values()
+            },
+            'critical_path': [stage.name for stage in path],
+            'critical_path_seconds': round(path[-1].end, 4) if path else 0.0,
+            'serial_seconds': round(sum(stage.seconds for stage in self.stages.values()), 4),
+            'wall_seconds': round(self.wall_seconds, 4),
+        }
+
+    def log_summary(self) -> None:
+        """Log per-stage timings and the critical path."""
+        summary = self.summary()
+        self.logger.info("Stage timings (start → end, seconds):")
+        for name, stage in summary['stages'].items():
+            if stage['start'] is None:
+                self.logger.info(f"  {name:16s} {stage['status']}")
+            else:
+                self.logger.info(f"  {name:16s} {stage['start']:7.2f} → {stage['end']:7.2f}  "
+                                 f"{stage['seconds']:6.2f}s  {stage['status']}")
+        self.logger.info(f"Critical path: {' → '.join(summary['critical_path'])} "
+                         f"({summary['critical_path_seconds']:.2f}s)")
+        self.logger.info(f"Serial sum of stages: {summary['serial_seconds']:.2f}s, "
+                         f"wall time: {summary['wall_seconds']:.2f}s")
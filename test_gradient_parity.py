@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+Parity check for the vectorized gradient engine.
+
+Compares create_css_linear_gradient() with the per-pixel
+create_css_linear_gradient_reference() on small canvases over a range of
+angles and color-stop layouts. Every pixel must be identical.
+
+Runs standalone (exit status 1 on a mismatch) or under pytest.
+"""
+
+import sys
+
+import numpy as np
+
+from generate_forecast_map import (
+    GRADIENT_ANGLE, GRADIENT_STOPS,
+    create_css_linear_gradient, create_css_linear_gradient_reference,
+)
+
+# Small canvases: odd/even sizes, single pixel, portrait and landscape
+SIZES = [(1, 1), (2, 3), (17, 31), (54, 96), (64, 36)]
+
+ANGLES = [0, 45, 90, 135, 180, 225, 270, 315, GRADIENT_ANGLE, 359.9]
+
+STOP_CASES = {
+    'production': GRADIENT_STOPS,
+    'single stop': [((120, 60, 200), 50)],
+    'three stops': [((255, 0, 0), 0), ((0, 255, 0), 50), ((0, 0, 255), 100)],
+    'unsorted': [((0, 0, 255), 100), ((255, 0, 0), 0), ((0, 255, 0), 50)],
+    'duplicate position': [((10, 20, 30), 20), ((200, 100, 0), 50), ((0, 0, 0), 50), ((255, 255, 255), 80)],
+    'outside 0-100%': [((220, 255, 87), -150), ((34, 178, 255), 250)],
+    'inside 0-100%': [((0, 0, 0), 40), ((255, 255, 255), 60)],
+}
+
+
+def mismatched_pixels(width: int, height: int, angle: float, color_stops) -> int:
+    """Number of pixels where the vectorized and reference gradients differ."""
+    fast = np.asarray(create_css_linear_gradient(width, height, angle, color_stops))
+    reference = np.asarray(create_css_linear_gradient_reference(width, height, angle, color_stops))
+    assert fast.shape == reference.shape == (height, width, 3)
+    return int(np.any(fast != reference, axis=-1).sum())
+
+
+def test_gradient_parity():
+    """Every size x angle x stop layout renders identically in both engines."""
+    failures = []
+    for name, stops in STOP_CASES.items():
+        for width, height in SIZES:
+            for angle in ANGLES:
+                mismatched = mismatched_pixels(width, height, angle, stops)
+                if mismatched:
+                    failures.append(f"{name} {width}x{height} {angle}deg: {mismatched} pixel(s) differ")
+    assert not failures, "\n".join(failures)
+
+
+def main():
+    """Run the parity check and report the result."""
+    cases = len(STOP_CASES) * len(SIZES) * len(ANGLES)
+    try:
+        test_gradient_parity()
+    except AssertionError as e:
+        print(f"GRADIENT PARITY FAILED:\n{e}")
+        sys.exit(1)
+    print(f"Gradient parity OK ({cases} cases)")
+
+
+if __name__ == "__main__":
+    main()
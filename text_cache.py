@@ -0,0 +1,247 @@
+"""
+Font registry and shaped-text cache for Hebrew text rendering.
+
+- get_font(): process-wide registry of variable fonts keyed by
+  (font file, size, weight, width), so each font is opened and its
+  variation axes set once.
+- shape_text(): cache keyed by (text, font key) holding the bidi-reordered
+  string plus the rendered glyph mask and its bbox. Labels that repeat every
+  day (city names, month names, header) are shaped and rasterized once.
+- draw_text(): pastes a cached mask onto a canvas in a given color.
+- missing_glyphs(): characters a font would draw as .notdef (blank or a
+  box), so callers can pick a font that covers the string.
+
+Used by the V2 map generator's text phases.
+"""
+
+from functools import lru_cache
+from typing import Optional, Tuple
+
+from PIL import Image, ImageDraw, ImageFont, features
+
+# Try to import bidi for RTL text rendering
+try:
+    from bidi.algorithm import get_display
+    BIDI_AVAILABLE = True
+except ImportError:
+    BIDI_AVAILABLE = False
+
+
+# ============================================================================
+# CONFIGURATION
+# ============================================================================
+
+SHAPED_TEXT_CACHE_SIZE = 2048
+
+# A code point no font maps; rendering it gives the font's .notdef glyph
+UNMAPPED_CHARACTER = '\U0010FFFF'
+
+# (font file, size, weight, width)
+FontKey = Tuple[str, int, int, int]
+
+
+# ============================================================================
+# FONT REGISTRY
+# ============================================================================
+
+@lru_cache(maxsize=None)
+def get_font(font_path: str, size: int, weight: int, width: int) -> ImageFont.FreeTypeFont:
+    """
+    Load a variable font with the given axes, once per process.
+
+    Axes are matched by name ('Weight'/'Width') so the font file's fvar
+    order doesn't matter.
+
+    Args:
+        font_path: Path to the .ttf file (as string, for hashing)
+        size: Font size in pixels
+        weight: Weight axis value
+        width: Width axis value
+
+    Returns:
+        Configured font object
+
+    Raises:
+        OSError: If the font file can't be loaded
+    """
+    font = ImageFont.truetype(font_path, size)
+
+    try:
+        axes = font.get_variation_axes()
+    except OSError:
+        # Not a variable font - use it as is
+        return font
+
+    values = []
+    for axis in axes:
+        name = axis['name']
+        name = name.decode('ascii', 'ignore') if isinstance(name, bytes) else str(name)
+        if name.lower().startswith('weight'):
+            values.append(weight)
+        elif name.lower().startswith('width'):
+            values.append(width)
+        else:
+            values.append(axis['default'])
+    font.set_variation_by_axes(values)
+
+    return font
+
+
+def resolve_font_file(font_path: str) -> Optional[str]:
+    """
+    Return the file Pillow actually loads for a font path or bare font name.
+
+    Bare names (e.g. 'DejaVuSans.ttf') are searched in the system font
+    directories, so the file behind them can change with the machine.
+
+    Args:
+        font_path: Font file path or name, as passed to get_font()
+
+    Returns:
+        Path of the loaded font file, or None if the font can't be loaded
+    """
+    try:
+        return ImageFont.truetype(font_path, 1).path
+    except OSError:
+        return None
+
+
+def _glyph_signature(font: ImageFont.FreeTypeFont, char: str) -> Tuple:
+    """Return what a font draws for one character (bbox and mask bytes)."""
+    return font.getbbox(char), bytes(font.getmask(char))
+
+
+@lru_cache(maxsize=SHAPED_TEXT_CACHE_SIZE)
+def missing_glyphs(font_key: FontKey, text: str) -> str:
+    """
+    Return the characters of text that a font has no glyph for.
+
+    FreeType draws unmapped characters with the .notdef glyph, so a character
+    drawn exactly like an unmapped code point is missing. Whitespace is skipped.
+
+    Args:
+        font_key: (font file, size, weight, width)
+        text: Text to check
+
+    Returns:
+        Missing characters (sorted, each once); empty if the font covers the text
+    """
+    font = get_font(*font_key)
+    notdef = _glyph_signature(font, UNMAPPED_CHARACTER)
+    return ''.join(sorted(
+        char for char in set(text)
+        if not char.isspace() and _glyph_signature(font, char) == notdef
+    ))
+
+
+@lru_cache(maxsize=1)
+def has_raqm() -> bool:
+    """Return True if Pillow was built with Raqm (native RTL shaping)."""
+    return features.check('raqm')
+
+
+@lru_cache(maxsize=SHAPED_TEXT_CACHE_SIZE)
+def bidi_display(text: str) -> str:
+    """Run the bidi algorithm on text, once per distinct string."""
+    if not BIDI_AVAILABLE:
+        return text
+    return get_display(text)
+
+
+def reorder_text(text: str) -> str:
+    """
+    Return text in visual order for rendering.
+
+    With Raqm, Pillow handles RTL itself and the text is returned unchanged;
+    otherwise python-bidi reorders it.
+
+    Args:
+        text: Logical-order text (may mix Hebrew and digits)
+
+    Returns:
+        Display-order text
+    """
+    if has_raqm():
+        return text
+    return bidi_display(text)
+
+
+# ============================================================================
+# SHAPED TEXT CACHE
+# ============================================================================
+
+class ShapedText:
+    """A rasterized text run: display string, glyph mask and bbox."""
+
+    __slots__ = ('display', 'mask', 'bbox')
+
+    def __init__(self, display: str, mask: Image.Image, bbox: Tuple[int, int, int, int]):
+        """
+        Args:
+            display: Display-order string that was rasterized
+            mask: 'L' mode glyph coverage image, bbox-sized
+            bbox: (left, top, right, bottom) relative to the draw origin
+        """
+        self.display = display
+        self.mask = mask
+        self.bbox = bbox
+
+    @property
+    def width(self) -> int:
+        return self.bbox[2] - self.bbox[0]
+
+    @property
+    def height(self) -> int:
+        return self.bbox[3] - self.bbox[1]
+
+
+@lru_cache(maxsize=SHAPED_TEXT_CACHE_SIZE)
+def shape_text(text: str, font_key: FontKey) -> ShapedText:
+    """
+    Shape and rasterize a text run, once per (text, font key).
+
+    Args:
+        text: Logical-order text
+        font_key: (font file, size, weight, width)
+
+    Returns:
+        ShapedText with the glyph mask and bbox
+    """
+    font = get_font(*font_key)
+    display = reorder_text(text)
+    direction = 'rtl' if has_raqm() else None
+
+    bbox = font.getbbox(display, direction=direction)
+    width = max(1, bbox[2] - bbox[0])
+    height = max(1, bbox[3] - bbox[1])
+
+    mask = Image.new('L', (width, height), 0)
+    ImageDraw.Draw(mask).text((-bbox[0], -bbox[1]), display, fill=255, font=font, direction=direction)
+
+    return ShapedText(display, mask, bbox)
+
+
+def draw_text(canvas: Image.Image, position: Tuple[int, int], text: str,
+              font_key: FontKey, fill: Tuple[int, ...],
+              shaped: Optional[ShapedText] = None) -> Tuple[int, int, int, int]:
+    """
+    Draw a text run onto canvas from the shaped-text cache.
+
+    Args:
+        canvas: PIL Image to draw on
+        position: Top-left corner of the text's ink box
+        text: Logical-order text
+        font_key: (font file, size, weight, width)
+        fill: Text color
+        shaped: Already shaped run (skips the cache lookup)
+
+    Returns:
+        Canvas bbox covered by the text
+    """
+    if shaped is None:
+        shaped = shape_text(text, font_key)
+
+    left, top = position
+    canvas.paste(fill, (left, top, left + shaped.mask.width, top + shaped.mask.height), shaped.mask)
+
+    return (left, top, left + shaped.width, top + shaped.height)
@@ -8,13 +8,17 @@ import logging
 import os
 from datetime import datetime, timedelta
 from pathlib import Path
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Union
 import glob
+import importlib.util
 
-try:
-    from pyluach import dates, hebrewcal
-except ImportError:
-    # pyluach may not be installed yet
+from lazy_import import lazy_import
+
+# pyluach may not be installed yet; when it is, it loads on first Hebrew date
+if importlib.util.find_spec('pyluach') is not None:
+    dates = lazy_import('pyluach.dates')
+    hebrewcal = lazy_import('pyluach.hebrewcal')
+else:
     dates = None
     hebrewcal = None
 
@@ -27,6 +31,7 @@ PROJECT_ROOT = Path(__file__).parent
 LOGS_DIR = PROJECT_ROOT / "logs"
 ARCHIVE_DIR = PROJECT_ROOT / "archive"
 OUTPUT_DIR = PROJECT_ROOT / "output"
+CACHE_DIR = PROJECT_ROOT / "cache"
 XML_FILE = PROJECT_ROOT / "isr_cities_utf8.xml"
 COUNTRY_XML_FILE = PROJECT_ROOT / "isr_country_utf8.xml"
 
@@ -46,8 +51,13 @@ MOT_LOGO_PNG = LOGOS_DIR / "mot_logo.png"
 FONTS_DIR = PROJECT_ROOT / "fonts"
 NOTO_SANS_HEBREW_FONT = FONTS_DIR / "NotoSansHebrew-Variable.ttf"  # Primary for V2
 OPEN_SANS_FONT = FONTS_DIR / "OpenSans-Variable.ttf"              # Backup
+# Last resort with full Hebrew coverage (incl. geresh/gershayim); Pillow finds it
+# in the system font directories (fonts-dejavu on Linux)
+SYSTEM_FALLBACK_FONT = "DejaVuSans.ttf"
 
-ARCHIVE_RETENTION_DAYS = 14
+# Archive entries are compressed, deduplicated blobs (archive_store.py), so
+# a year of history takes less space than two weeks of plain XML did
+ARCHIVE_RETENTION_DAYS = 400
 EXPECTED_CITY_COUNT = 15
 
 
@@ -173,17 +183,20 @@ def format_hebrew_date(date_str: Optional[str] = None) -> str:
 
 def get_archive_filename(date_str: Optional[str] = None) -> str:
     """
-    Generate archive filename for a given date.
+    Generate archive entry filename for a given date.
+
+    The entry is a one-line file naming the compressed blob that holds the
+    XML (see archive_store.py).
 
     Args:
         date_str: Date in YYYY-MM-DD format (default: today)
 
     Returns:
-        Filename like 'isr_cities_2025-10-15.xml'
+        Filename like 'isr_cities_2025-10-15.ref'
     """
     if date_str is None:
         date_str = get_today_date()
-    return f'isr_cities_{date_str}.xml'
+    return f'isr_cities_{date_str}.ref'
 
 
 def get_archive_path(date_str: Optional[str] = None) -> Path:
@@ -201,17 +214,17 @@ def get_archive_path(date_str: Optional[str] = None) -> Path:
 
 def get_country_archive_filename(date_str: Optional[str] = None) -> str:
     """
-    Generate archive filename for country XML for a given date.
+    Generate archive entry filename for country XML for a given date.
 
     Args:
         date_str: Date in YYYY-MM-DD format (default: today)
 
     Returns:
-        Filename like 'isr_country_2025-10-15.xml'
+        Filename like 'isr_country_2025-10-15.ref'
     """
     if date_str is None:
         date_str = get_today_date()
-    return f'isr_country_{date_str}.xml'
+    return f'isr_country_{date_str}.ref'
 
 
 def get_country_archive_path(date_str: Optional[str] = None) -> Path:
@@ -238,12 +251,16 @@ def ensure_directories() -> None:
     LOGS_DIR.mkdir(exist_ok=True)
     ARCHIVE_DIR.mkdir(exist_ok=True)
     OUTPUT_DIR.mkdir(exist_ok=True)
+    CACHE_DIR.mkdir(exist_ok=True)
 
 
 def cleanup_old_archives(logger: logging.Logger, dry_run: bool = False) -> int:
     """
-    Delete XML files in archive older than ARCHIVE_RETENTION_DAYS.
-    Handles both cities and country XML files.
+    Delete archive entries older than ARCHIVE_RETENTION_DAYS.
+    Handles both cities and country entries (and legacy plain XML files).
+
+    Directory-scan fallback for archive_index.cleanup_expired_archives();
+    blobs left unreferenced are collected by the next indexed cleanup.
 
     Args:
         logger: Logger instance for output
@@ -254,17 +271,18 @@ def cleanup_old_archives(logger: logging.Logger, dry_run: bool = False) -> int:
     """
     cutoff_date = datetime.now() - timedelta(days=ARCHIVE_RETENTION_DAYS)
 
-    # Find all XML files in archive (both cities and country)
-    archive_files = glob.glob(str(ARCHIVE_DIR / 'isr_cities_*.xml'))
-    archive_files.extend(glob.glob(str(ARCHIVE_DIR / 'isr_country_*.xml')))
+    # Find all archive entries (both cities and country, .ref or legacy .xml)
+    archive_files = []
+    for pattern in ('isr_cities_*.ref', 'isr_country_*.ref', 'isr_cities_*.xml', 'isr_country_*.xml'):
+        archive_files.extend(glob.glob(str(ARCHIVE_DIR / pattern)))
     deleted_count = 0
 
     for file_path in archive_files:
         # Extract date from filename
         filename = os.path.basename(file_path)
         try:
-            # Format: isr_cities_YYYY-MM-DD.xml or isr_country_YYYY-MM-DD.xml
-            date_str = filename.replace('isr_cities_', '').replace('isr_country_', '').replace('.xml', '')
+            # Format: isr_cities_YYYY-MM-DD.ref or isr_country_YYYY-MM-DD.ref
+            date_str = os.path.splitext(filename.replace('isr_cities_', '').replace('isr_country_', ''))[0]
             file_date = datetime.strptime(date_str, '%Y-%m-%d')
 
             # Check if older than cutoff
@@ -289,6 +307,28 @@ def cleanup_old_archives(logger: logging.Logger, dry_run: bool = False) -> int:
     return deleted_count
 
 
+def ims_xml_to_utf8(raw_content: bytes) -> str:
+    """
+    Decode IMS XML (ISO-8859-8) and rewrite its encoding declaration to UTF-8.
+
+    This is the text the current XML files and the archive hold.
+
+    Args:
+        raw_content: Raw XML bytes as served by IMS
+
+    Returns:
+        XML text to be saved as UTF-8
+
+    Raises:
+        UnicodeDecodeError: If the bytes are not valid ISO-8859-8
+    """
+    xml_text = raw_content.decode('iso-8859-8')
+    if '<?xml' in xml_text:
+        xml_text = xml_text.replace('encoding="ISO-8859-8"', 'encoding="UTF-8"')
+        xml_text = xml_text.replace('encoding="iso-8859-8"', 'encoding="UTF-8"')
+    return xml_text
+
+
 # ============================================================================
 # DATA VALIDATION
 # ============================================================================
@@ -319,10 +359,10 @@ def validate_city_count(cities_data: List[Dict], logger: logging.Logger) -> bool
 
 def validate_city_data(city: Dict, logger: logging.Logger) -> bool:
     """
-    Validate that a city dictionary has all required data.
+    Validate that a city record has all required data.
 
     Args:
-        city: City data dictionary
+        city: CityForecast record or city data dictionary
         logger: Logger instance for output
 
     Returns:
@@ -350,13 +390,13 @@ def validate_city_data(city: Dict, logger: logging.Logger) -> bool:
 # FORMATTING UTILITIES
 # ============================================================================
 
-def format_temperature_range(min_temp: str, max_temp: str) -> str:
+def format_temperature_range(min_temp: Union[int, str], max_temp: Union[int, str]) -> str:
     """
     Format temperature range for display.
 
     Args:
-        min_temp: Minimum temperature as string
-        max_temp: Maximum temperature as string
+        min_temp: Minimum temperature (int, or numeric string)
+        max_temp: Maximum temperature (int, or numeric string)
 
     Returns:
         Formatted string like "18-27°C"